@@ -0,0 +1,72 @@
+"""Build a book index from a synthetic catalog and time top-k queries against it.
+
+Run from the repository root (the catalog and index go to a temporary directory):
+    PYTHONPATH=. python benchmarks/bench_books.py --books 300000
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from source_code.book_index import BookIndex, build_index
+
+GENRES = ["fantasy", "romance", "mystery", "sci-fi", "thriller", "historical", "self-help", "young adult",
+          "horror", "poetry", "biography", "cozy mystery", "literary fiction", "dystopian", "graphic novel"]
+WORDS = ("dragon kingdom heir shadow crown storm garden letter winter summer island secret murder detective "
+         "village love war empire star ship planet robot ghost witch forest river city night house girl boy "
+         "king queen sister brother memory ocean mountain song fire ice stone glass clock road train mirror "
+         "habit mind money leader healing journey family friendship betrayal revenge magic academy").split()
+QUERIES = ["cozy fantasy with dragons", "a mystery set on an island", "space opera with robots",
+           "romance in winter", "books about habits and the mind", "ghost story in an old house",
+           "detective murder in the city", "young adult dystopian"]
+
+
+def write_catalog(path: str, books: int, seed: int = 11):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["title", "author", "genre", "description"])
+        for n in range(books):
+            title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))).title()
+            author = f"Author {rng.randrange(books // 5 + 1)}"
+            genre = ";".join(rng.sample(GENRES, rng.randint(1, 3)))
+            description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 60)))
+            writer.writerow([f"{title} #{n}", author, genre, description])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=300000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "books.csv")
+        write_catalog(source, args.books)
+        start = time.perf_counter()
+        meta = build_index(source, os.path.join(tmp, "index"))
+        print(f"build: {meta['documents']} books, {meta['terms']} terms, {meta['postings']} postings "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        index = BookIndex(os.path.join(tmp, "index"))
+        print(f"open: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        times = []
+        for n in range(args.queries):
+            query = QUERIES[n % len(QUERIES)]
+            start = time.perf_counter()
+            index.search(query, 5)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        print(f"top-5 search: p50 {times[len(times) // 2] * 1000:.2f} ms   "
+              f"p99 {times[int(len(times) * 0.99)] * 1000:.2f} ms   ({args.queries} queries)")
+        for hit in index.search(QUERIES[0], 3):
+            print(f"  {hit.score:6.2f}  {hit.title} by {hit.author}")
+        del index
+
+
+if __name__ == "__main__":
+    main()
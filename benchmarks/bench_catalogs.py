@@ -0,0 +1,104 @@
+"""Compare the shared precompiled catalogs against rebuilding the maps on every request.
+
+Run from the repository root:
+    PYTHONPATH=. python benchmarks/bench_catalogs.py
+"""
+import random
+import time
+import tracemalloc
+
+from source_code.catalogs import BOOK_CATALOG, MUSIC_CATALOG, MUSCLE_CATALOG
+
+INPUTS = [
+    "play me something romantic",
+    "i'm feeling nostalgic tonight",
+    "anything like taylor swift?",
+    "music for when i drive to work",
+    "a playlist to cook dinner to",
+    "just some music please",
+    "recommend a good fantasy book",
+    "i want a thriller to read",
+    "something for my chest and triceps",
+    "legs day",
+]
+
+
+def legacy_music(text):
+    # The old handleRequest rebuilt these dicts (as literals) on every call
+    mood_map = dict(MUSIC_CATALOG["mood"])
+    artist_map = dict(MUSIC_CATALOG["artist"])
+    activity_map = dict(MUSIC_CATALOG["activity"])
+    for mood, playlist in mood_map.items():
+        if mood in text:
+            return "mood", mood
+    for artist, playlist in artist_map.items():
+        if artist in text or f"like {artist}" in text:
+            return "artist", artist
+    for activity, playlist in activity_map.items():
+        if activity in text:
+            return "activity", activity
+    return None
+
+
+def legacy_book(text):
+    genre_map = dict(BOOK_CATALOG["genre"])
+    for genre, (title, link) in genre_map.items():
+        if genre in text:
+            return "genre", genre
+    return None
+
+
+def legacy_muscle(text):
+    muscle_groups = dict(MUSCLE_CATALOG["muscle"])
+    for muscle, plan in muscle_groups.items():
+        if muscle in text:
+            return "muscle", muscle
+    return None
+
+
+def indexed(catalog):
+    def lookup(text):
+        match = catalog.match(text)
+        return (match.kind, match.keyword) if match else None
+    return lookup
+
+
+def measure(fn, corpus, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+
+    # Peak bytes allocated while serving a single request, averaged
+    tracemalloc.start()
+    total = 0
+    sample = corpus[:1000]
+    for text in sample:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn(text)
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return best / len(corpus) * 1e6, total // len(sample)
+
+
+def main():
+    rng = random.Random(3)
+    corpus = [rng.choice(INPUTS) for _ in range(20000)]
+    cases = [
+        ("music", legacy_music, indexed(MUSIC_CATALOG)),
+        ("book", legacy_book, indexed(BOOK_CATALOG)),
+        ("muscle", legacy_muscle, indexed(MUSCLE_CATALOG)),
+    ]
+    for name, legacy, fast in cases:
+        assert all(legacy(text) == fast(text) for text in INPUTS), name
+        legacy_us, legacy_peak = measure(legacy, corpus)
+        fast_us, fast_peak = measure(fast, corpus)
+        print(f"{name:7s} | legacy {legacy_us:6.2f} us, {legacy_peak:5d} B/request"
+              f" | catalog {fast_us:6.2f} us, {fast_peak:5d} B/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Bytes and nanoseconds per request for the models.
+
+Compares the old dict-backed dataclasses with the slotted models, built both
+validated and through trusted(). "path" is one request through routing and
+the response: route_intent, a Request and a Response.
+
+Run from the repository root:
+    PYTHONPATH=. python benchmarks/bench_models.py
+"""
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+from source_code.base_assistant import AIAssistant
+from source_code.intent_router import route_intent
+from source_code.models import CommandType, Request, Response, UserProfile
+
+INPUTS = [
+    "play me something romantic",
+    "i want to build muscle",
+    "help me study for math",
+    "recommend me a book to read",
+    "what's the weather like on mars?",
+    "i need someone to listen to me now",
+]
+
+
+# The models as they were before __slots__ and frozen
+@dataclass
+class LegacyRequest:
+    input_str: str
+    timestamp: datetime
+    command_type: CommandType
+
+    def __post_init__(self):
+        if not self.input_str:
+            raise ValueError("Input cannot be empty")
+
+
+@dataclass
+class LegacyResponse:
+    message: str
+    confidence: float
+    actionPerformed: bool
+
+    def __post_init__(self):
+        if not (0.0 <= self.confidence <= 1.0):
+            raise ValueError("Confidence must be between 0.0 and 1.0")
+
+
+NOW = datetime.now()
+
+PAIRS = {
+    "legacy": lambda text, kind: (LegacyRequest(text, NOW, kind), LegacyResponse(text, 1.0, True)),
+    "slotted": lambda text, kind: (Request(text, NOW, kind), Response(text, 1.0, True)),
+    "trusted": lambda text, kind: (Request.trusted(text, NOW, kind), Response.trusted(text, 1.0, True)),
+}
+
+
+def bytes_per_pair(make, count=100_000):
+    """Memory kept alive per Request + Response pair (the text is shared, so not counted)."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = [make("hello", CommandType.GENERAL) for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    # Minus the list's own slot and the pair tuple, which every flavour pays alike
+    return (after - before) / count - 8 - 56
+
+
+def ns_per_call(fn, args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for item in args:
+            fn(*item)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / len(args)
+
+
+def main():
+    rng = random.Random(5)
+    texts = [rng.choice(INPUTS) for _ in range(50_000)]
+    args = [(text, CommandType.GENERAL) for text in texts]
+    assistant = AIAssistant(UserProfile.trusted("Bench", 20, {}, False))
+
+    def path(text, make_request, make_response):
+        route = route_intent(text)
+        request = make_request(text, NOW, route.command_type or CommandType.GENERAL)
+        return make_response(request.input_str, route.confidence, True)
+
+    paths = {
+        "legacy": (LegacyRequest, LegacyResponse),
+        "slotted": (Request, Response),
+        "trusted": (Request.trusted, Response.trusted),
+    }
+    path_args = {name: [(text, *makers) for text in texts] for name, makers in paths.items()}
+
+    print(f"{'models':8s} | {'bytes/pair':>10s} | {'ns/pair':>8s} | {'ns/path':>8s}")
+    for name, make in PAIRS.items():
+        print(f"{name:8s} | {bytes_per_pair(make):10.0f} | {ns_per_call(make, args):8.0f} | "
+              f"{ns_per_call(path, path_args[name]):8.0f}")
+
+    # The real assistant path, for scale: generateResponse always validates
+    generate = lambda text: assistant.generateResponse(text)
+    print(f"AIAssistant.generateResponse: {ns_per_call(generate, [(t,) for t in texts]):.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Time intake logging and totals for users with years of meals, and food name lookups.
+
+Run from the repository root (logs stay in memory):
+    PYTHONPATH=. python benchmarks/bench_nutrition.py --users 100 --years 3
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from source_code.nutrition import FoodDB, IntakeLog, get_default_db
+
+QUERIES = ["banana", "eggs", "chicken br", "rice", "greek yoghurt", "brocoli", "strawberry", "french fries",
+           "peanut butter", "chiken", "tomatoes", "dark choc"]
+
+
+def history(db: FoodDB, years: int, meals: int, rng: np.random.Generator, first_day: int):
+    """Entries for `years` of days with `meals` foods logged a day."""
+    days = np.repeat(np.arange(first_day, first_day + 365 * years, dtype=np.int32), meals)
+    foods = rng.integers(0, len(db), len(days), dtype=np.int32)
+    grams = rng.uniform(30, 300, len(days)).astype(np.float32)
+    return days, foods, grams
+
+
+def timed(fn, repeat):
+    times = []
+    for n in range(repeat):
+        start = time.perf_counter()
+        fn(n)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2] * 1e6, times[int(len(times) * 0.99)] * 1e6
+
+
+def synthetic_db(foods: int, seed: int) -> FoodDB:
+    rng = random.Random(seed)
+    syllables = ["ba", "na", "ko", "ri", "ce", "to", "fu", "mel", "on", "pa", "sta", "chi", "ken", "be", "an", "so"]
+    names = [" ".join("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 3)))
+             + f" {n}" for n in range(foods)]
+    return FoodDB(names, [100] * foods, np.random.default_rng(seed).uniform(0, 50, (foods, 10)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time intake logs with years of history and food lookups.")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--meals", type=int, default=6, help="foods logged per day")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--foods", type=int, default=200_000, help="size of the synthetic food table for lookups")
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args(argv)
+
+    db = get_default_db()
+    rng = np.random.default_rng(args.seed)
+    today = 739_000
+    first = today - 365 * args.years
+
+    start = time.perf_counter()
+    logs = []
+    for _ in range(args.users):
+        log = IntakeLog(db)
+        log.extend(*history(db, args.years, args.meals, rng, first))
+        logs.append(log)
+    entries = sum(log.size for log in logs)
+    print(f"{args.users} users x {args.years} years x {args.meals} foods/day = {entries:,} entries, "
+          f"loaded in {time.perf_counter() - start:.2f}s")
+
+    picks = rng.integers(0, len(db), args.repeat)
+    median, p99 = timed(lambda n: logs[n % args.users].add(int(picks[n]), 150.0, today), args.repeat)
+    print(f"add + alerts:           median {median:8.1f} us   p99 {p99:8.1f} us")
+
+    empty = IntakeLog(db)
+    median, p99 = timed(lambda n: empty.add(int(picks[n]), 150.0, today), args.repeat)
+    print(f"add, empty log:         median {median:8.1f} us   p99 {p99:8.1f} us")
+
+    def rescan(n):
+        # What add would cost if it re-summed the day from the whole log
+        log = logs[n % args.users]
+        log.totals(today, today + 1)
+
+    median, p99 = timed(rescan, args.repeat // 4)
+    print(f"(re-summing a day from the log: median {median:8.1f} us)")
+
+    median, p99 = timed(lambda n: logs[n % args.users].day_totals(today), args.repeat)
+    print(f"today's totals:         median {median:8.1f} us   p99 {p99:8.1f} us")
+    median, p99 = timed(lambda n: logs[n % args.users].totals(today - 365, today + 1), args.repeat // 4)
+    print(f"last year's totals:     median {median:8.1f} us   p99 {p99:8.1f} us")
+    median, p99 = timed(lambda n: logs[n % args.users].daily(today - 30, today + 1), args.repeat // 4)
+    print(f"last 30 days, per day:  median {median:8.1f} us   p99 {p99:8.1f} us")
+
+    for name, table in (("built-in", db), (f"{args.foods:,} foods", synthetic_db(args.foods, args.seed))):
+        queries = QUERIES if table is db else [table.names[i][:8] for i in range(0, args.foods, args.foods // 50)]
+        median, p99 = timed(lambda n: table.lookup(queries[n % len(queries)]), args.repeat)
+        print(f"lookup ({name}): median {median:8.1f} us   p99 {p99:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Time workout plan generation cold (cache cleared) against cached lookups.
+
+Run from the repository root:
+    PYTHONPATH=. python benchmarks/bench_planner.py
+"""
+import itertools
+import time
+
+from source_code import workout_planner
+from source_code.workout_planner import GOALS, LEVELS, MUSCLES, cache_clear, cache_info, schedule_text
+
+REQUESTS = list(itertools.product(GOALS, range(1, 8), (None,) + MUSCLES, LEVELS))
+
+
+def timed(repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for request in REQUESTS:
+            schedule_text(*request)
+    return (time.perf_counter() - start) / (repeat * len(REQUESTS))
+
+
+def main():
+    cold = []
+    for request in REQUESTS:
+        cache_clear()
+        start = time.perf_counter()
+        schedule_text(*request)
+        cold.append(time.perf_counter() - start)
+    cold.sort()
+
+    cache_clear()
+    timed(1)   # fill the cache
+    cached = timed(20)
+    print(f"{len(REQUESTS)} distinct (goal, days, muscle, level) requests, cache size {workout_planner.PLAN_CACHE_SIZE}")
+    print(f"cold:   mean {sum(cold) / len(cold) * 1e6:8.1f} us   p99 {cold[int(len(cold) * 0.99)] * 1e6:8.1f} us")
+    print(f"cached: mean {cached * 1e6:8.2f} us")
+    print(f"cache: {cache_info()['texts']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Build a playlist engine from a synthetic track catalog and time exact vs IVF queries.
+
+Run from the repository root (the catalog and engine go to a temporary directory):
+    PYTHONPATH=. python benchmarks/bench_playlists.py --tracks 1000000
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from source_code.playlist_engine import ACTIVITY_TARGETS, MOOD_TARGETS, PlaylistEngine, build_engine
+
+
+def write_catalog(path: str, tracks: int, seed: int = 5):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["title", "artist", "tempo", "energy", "valence", "acousticness"])
+        for n in range(tracks):
+            energy = rng.betavariate(2, 2)
+            writer.writerow([f"Track {n}", f"Artist {rng.randrange(tracks // 10 + 1)}",
+                             round(rng.gauss(70 + 80 * energy, 12), 1), round(energy, 3),
+                             round(rng.betavariate(2, 2), 3), round(min(1.0, max(0.0, rng.gauss(1 - energy, 0.2))), 3)])
+
+
+def timed(fn, targets, repeat):
+    times = []
+    for n in range(repeat):
+        start = time.perf_counter()
+        fn(targets[n % len(targets)])
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2] * 1000, times[int(len(times) * 0.99)] * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "tracks.csv")
+        write_catalog(source, args.tracks)
+        start = time.perf_counter()
+        meta = build_engine(source, os.path.join(tmp, "engine"), ivf=True)
+        print(f"build: {meta['tracks']} tracks, {meta['ivf_cells']} IVF cells in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        engine = PlaylistEngine(os.path.join(tmp, "engine"))
+        print(f"open: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        targets = [engine.target(t) for t in list(MOOD_TARGETS.values()) + list(ACTIVITY_TARGETS.values())]
+        for name, exact in (("exact", True), ("ivf", False)):
+            p50, p99 = timed(lambda q: engine.nearest(q, 10, exact=exact), targets, args.queries)
+            print(f"top-10 {name:5s}: p50 {p50:.2f} ms   p99 {p99:.2f} ms")
+
+        # Recall of the approximate search against the exact one, without the per-artist cap
+        found = 0
+        for query in targets:
+            truth = {t.title for t in engine.nearest(query, 10, exact=True, per_artist=0)}
+            found += len(truth & {t.title for t in engine.nearest(query, 10, per_artist=0)})
+        print(f"ivf recall@10: {found / (10 * len(targets)):.3f}")
+        print("calm:", ", ".join(f"{t.title} ({t.score:.3f})" for t in engine.for_mood("calm", 3)))
+        del engine
+
+
+if __name__ == "__main__":
+    main()
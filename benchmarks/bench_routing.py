@@ -0,0 +1,108 @@
+"""Compare the compiled intent router against the old cascaded any() scans,
+and time the batch intent model.
+
+Run from the repository root:
+    PYTHONPATH=. python benchmarks/bench_routing.py
+"""
+import random
+import time
+
+from source_code.intent_model import get_default_model
+from source_code.intent_router import INTENT_ROUTER, INTENT_TABLE, IntentRouter
+from source_code.models import CommandType
+
+UTTERANCES = [
+    "Play me something romantic",
+    "I want to build muscle",
+    "Help me study for math",
+    "Recommend me a book to read",
+    "I need someone to listen to me now",
+    "I've been so stressed and anxious about work lately",
+    "what's the weather like in Hanoi tomorrow",
+    "tell me a joke about cats",
+    "can you suggest a fantasy novel with dragons",
+    "I'm going to the gym later, any exercise tips?",
+]
+
+
+def legacy_classify(input_str: str) -> CommandType:
+    input_str = input_str.lower()
+    if "feel" in input_str or "feeling" in input_str or "listen" in input_str:
+        return None
+    if any(word in input_str for word in ["song", "music", "romantic", "listen", "play", "playlist", "mood", "tune", "songs"]):
+        return CommandType.MUSIC
+    elif any(word in input_str for word in ["workout", "exercise", "gym", "gain muscle", "build muscle", "work out"]):
+        return CommandType.FITNESS
+    elif any(word in input_str for word in ["study", "review", "math", "homework"]):
+        return CommandType.STUDY
+    elif any(word in input_str for word in ["book", "novel", "read", "recommend a book", "story", "fantasy", "romance", "thriller"]):
+        return CommandType.BOOK
+    elif any(word in input_str for word in ["sad", "anxious", "depressed", "cope", "mental", "psychology", "stressed", "burnout", "therapy", "vent"]):
+        return CommandType.PSYCHOLOGY
+    else:
+        return CommandType.GENERAL
+
+
+def make_corpus(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    # Long transcripts hurt the old code most: every miss is a full pass per keyword
+    return [" ".join(rng.choice(UTTERANCES) for _ in range(rng.randint(1, 6))) for _ in range(size)]
+
+
+def timed(fn, corpus, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def widen(table, extra_per_label: int, seed: int = 11):
+    """Pad every category with made-up keywords that never appear in the corpus."""
+    rng = random.Random(seed)
+    wide = []
+    for label, words in table:
+        filler = tuple("".join(rng.choice("bcdfghjkmpqvwxz") for _ in range(rng.randint(4, 9))) for _ in range(extra_per_label))
+        wide.append((label, tuple(words) + filler))
+    return tuple(wide)
+
+
+def cascade(table):
+    """The old classify_command shape: one any() scan per category, in priority order."""
+    def classify(input_str):
+        input_str = input_str.lower()
+        for label, words in table:
+            if any(word in input_str for word in words):
+                return label
+        return CommandType.GENERAL
+    return classify
+
+
+def main():
+    corpus = make_corpus(20000)
+    mismatches = sum(1 for text in corpus if INTENT_ROUTER.route(text).command_type != legacy_classify(text))
+    print(f"{len(corpus)} utterances, {mismatches} mismatches against the legacy classifier")
+
+    for extra in (0, 10, 50, 200):
+        table = widen(INTENT_TABLE, extra)
+        keywords = sum(len(words) for _, words in table)
+        router = IntentRouter(table)
+        legacy = timed(cascade(table), corpus)
+        routed = timed(router.route, corpus)
+        print(f"{keywords:5d} keywords | legacy any() cascade {legacy / len(corpus) * 1e6:7.2f} us"
+              f" | compiled router {routed / len(corpus) * 1e6:7.2f} us")
+
+    model = get_default_model()
+    batch = corpus * 10
+    start = time.perf_counter()
+    routes = model.classify_batch(batch)
+    elapsed = time.perf_counter() - start
+    changed = sum(1 for text, route in zip(corpus, routes) if route.command_type != INTENT_ROUTER.route(text).command_type)
+    print(f"intent model: {len(batch) / elapsed * 60:,.0f} utterances/min in batches, "
+          f"{timed(model.route, corpus) / len(corpus) * 1e6:.2f} us one at a time, "
+          f"{changed} of {len(corpus)} routed differently from the keyword table")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Fill the review card store with many users' cards and time the due queue.
+
+Run from the repository root (the SQLite file goes to a temporary directory):
+    PYTHONPATH=. python benchmarks/bench_srs.py --cards 1000000 --users 1000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from source_code.srs import DAY, ReviewScheduler
+
+NOW = 1_800_000_000.0
+
+
+def deck(user: int, cards: int, seed: int) -> list:
+    rng = random.Random(seed * 1_000_003 + user)
+    # Due dates spread over a month either side of now: about half are due
+    return [{"deck": f"deck {n % 8}", "front": f"card {n}", "due": NOW + rng.uniform(-30, 30) * DAY}
+            for n in range(cards)]
+
+
+def fill(scheduler: ReviewScheduler, users: int, per_user: int, seed: int) -> float:
+    start = time.perf_counter()
+    for user in range(users):
+        scheduler.import_deck(f"user{user}", deck(user, per_user, seed))
+    return time.perf_counter() - start
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return sum(times), times[len(times) // 2] * 1e6, times[int(len(times) * 0.99)] * 1e6
+
+
+def run(name: str, scheduler: ReviewScheduler, users: int, per_user: int, args):
+    seconds = fill(scheduler, users, per_user, args.seed)
+    print(f"{name}: imported {users * per_user} cards in {seconds:.1f}s ({users * per_user / seconds:,.0f} cards/s)")
+    rng = random.Random(args.seed)
+
+    def due():
+        scheduler.due(f"user{rng.randrange(users)}", args.limit, now=NOW)
+
+    total, median, p99 = timed(due, args.queries)
+    print(f"  due({args.limit}):        {args.queries / total:9,.0f} queries/s   median {median:7.1f} us   p99 {p99:7.1f} us")
+
+    def review():
+        cards = scheduler.due(f"user{rng.randrange(users)}", 1, now=NOW)
+        if cards:
+            scheduler.review(cards[0].id, rng.randrange(6), now=NOW)
+
+    total, median, p99 = timed(review, args.queries)
+    print(f"  due + review:   {args.queries / total:9,.0f} reviews/s   median {median:7.1f} us   p99 {p99:7.1f} us")
+
+    start = time.perf_counter()
+    exported = sum(1 for _ in scheduler.export_deck("user0"))
+    print(f"  export of one user: {exported} cards in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time due-queue queries and reviews over many cards.")
+    parser.add_argument("--cards", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=20, help="cards asked for per due query")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--memory", action="store_true", help="also time the in-memory store")
+    args = parser.parse_args(argv)
+    per_user = args.cards // args.users
+
+    with tempfile.TemporaryDirectory() as workdir:
+        scheduler = ReviewScheduler(os.path.join(workdir, "srs.sqlite3"))
+        run("sqlite", scheduler, args.users, per_user, args)
+        scheduler.close()
+    if args.memory:
+        run("memory", ReviewScheduler(), args.users, per_user, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Benchmark suite: routing, every assistant, and end-to-end turns, with no human at input().
+
+Every case replays scripted inputs (answers to follow-up prompts included)
+from a fixed seed, so two runs do the same work. Gemini is replaced by
+MockGemini, an in-process client with a configurable latency, so end-to-end
+numbers are repeatable offline.
+
+Run from the repository root:
+    PYTHONPATH=. python benchmarks/suite.py --json results.json
+    PYTHONPATH=. python benchmarks/suite.py --baseline results.json --threshold 0.25
+
+With --baseline the run fails (exit status 1) when any case's median time
+per op is more than --threshold slower than in the baseline file. The
+baseline must have been saved with the same --rounds and --gemini-latency;
+otherwise the run stops (exit status 2) instead of comparing unlike numbers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from source_code.book_assistant import BookAssistant
+from source_code.fitness_assistant import FitnessAssistant
+from source_code.headless import run_batch
+from source_code.io_channel import ScriptedChannel
+from source_code.loadgen import SCRIPT
+from source_code.main import classify_command
+from source_code.models import CommandType, Request, UserProfile
+from source_code.music_assistant import MusicAssistant
+from source_code.nutrition_assistant import NutritionAssistant
+from source_code.psychology_assistant import PsychologyAssistant
+from source_code.quota import QuotaEngine
+from source_code.response_cache import get_default_cache
+from source_code.server import ChatServer
+from source_code.study_assistant import StudyAssistant
+
+SEED = 15
+
+# Realistic utterances, with every answer their follow-up questions need, so
+# each turn runs its whole flow instead of stopping at the first prompt
+UTTERANCES = [
+    ("play me something romantic", []),
+    ("can you put on some music for my workout", ["something upbeat"]),
+    ("I want to build muscle", ["chest", "yes", "build muscle", "4"]),
+    ("what should I do for leg day at the gym", ["legs", "no"]),
+    ("help me study for my math exam", ["math", "a"]),
+    ("I have a test tomorrow and need to review", ["history", "b", "the cold war", "yes"]),
+    ("recommend me a book to read", ["fantasy"]),
+    ("any good mystery novel?", []),
+    ("I feel so stressed about everything", ["talk to you", "school is stressful", "advice", "no"]),
+    ("I'm feeling a bit down, can you listen", ["playlist"]),
+    ("i feel weird", ["hmm", "just talk", "my friends ignore me", "advice", "no"]),
+    ("what's the capital of Australia?", []),
+    ("tell me a joke", []),
+    ("how far away is the moon", []),
+]
+
+# name -> (assistant class, CommandType, [(request, answers to its questions), ...])
+ASSISTANT_CASES = {
+    "music": (MusicAssistant, CommandType.MUSIC, [
+        ("play me something romantic", []),
+        ("anything like taylor swift", []),
+        ("make me a playlist", ["something for studying"]),
+        ("music please", ["no idea"]),
+    ]),
+    "book": (BookAssistant, CommandType.BOOK, [
+        ("recommend a mystery book", []),
+        ("i want a fantasy novel", []),
+        ("recommend me a book", ["romance"]),
+    ]),
+    "fitness": (FitnessAssistant, CommandType.FITNESS, [
+        ("I want to build muscle", ["legs", "yes", "build muscle", "5"]),
+        ("workout plan", ["biceps", "no"]),
+        ("help me get fit", ["toes", "chest", "yes", "lose weight", "eight", "3"]),
+    ]),
+    "study": (StudyAssistant, CommandType.STUDY, [
+        ("help me study", ["math", "a"]),
+        ("I need to review", ["history", "b", "the cold war", "yes"]),
+        ("study help", ["physics", "explain", "momentum", "no"]),
+    ]),
+    "nutrition": (NutritionAssistant, CommandType.NUTRITION, [
+        ("I had 2 eggs and 150g rice for lunch", []),
+        ("how many calories in a banana?", []),
+        ("track my nutrition", ["a bowl of oatmeal with blueberries and a coffee"]),
+        ("log my dinner", ["chiken and brocoli"]),
+    ]),
+    "psychology": (PsychologyAssistant, CommandType.PSYCHOLOGY, [
+        ("I need someone to listen", ["school is a lot right now", "advice", "no"]),
+        ("talk to me", ["I feel lonely", "listen", "no"]),
+    ]),
+}
+
+
+class MockGemini:
+    """Stands in for GeminiClient behind call_gemini_api/acall_gemini_api: answers after `latency` seconds."""
+
+    model = "mock"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def generate(self, question: str, deadline=None) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return f"(mock) You asked: {question}"
+
+    async def agenerate(self, question: str, deadline=None) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return f"(mock) You asked: {question}"
+
+
+def fresh_user() -> UserProfile:
+    return UserProfile.trusted("Bench", 20, {}, True)
+
+
+# Cases: each returns (run, ops). run() does the work once; ops is how many requests it covers.
+
+def case_classify(rng) -> Tuple[Callable, int]:
+    corpus = [rng.choice(UTTERANCES) for _ in range(2000)]
+
+    def run():
+        for text, answers in corpus:
+            classify_command(text, ScriptedChannel(answers))
+    return run, len(corpus)
+
+
+def case_assistant(name) -> Callable:
+    assistant_class, command_type, script = ASSISTANT_CASES[name]
+
+    def make(rng):
+        corpus = [rng.choice(script) for _ in range(500)]
+        now = datetime.now()
+
+        def run():
+            random.seed(SEED)
+            for text, answers in corpus:
+                io = ScriptedChannel(answers)
+                assistant_class(fresh_user(), io).handleRequest(Request.trusted(text, now, command_type))
+        return run, len(corpus)
+    return make
+
+
+def case_schedule(rng) -> Tuple[Callable, int]:
+    assistant = FitnessAssistant(fresh_user(), ScriptedChannel())
+    goals = ["build muscle", "lose weight", "tone body", "get stronger"]
+    corpus = [(rng.choice(goals), rng.randint(1, 7)) for _ in range(5000)]
+
+    def run():
+        for goal, days in corpus:
+            assistant.generateSchedule(goal, days)
+    return run, len(corpus)
+
+
+def case_headless(rng) -> Tuple[Callable, int]:
+    sessions = []
+    for number in range(200):
+        turns = [{"input": text, "answers": answers} for text, answers in rng.sample(UTTERANCES, 4)]
+        sessions.append(json.dumps({"id": number, "user": {"name": "Bench", "age": 20, "isPremium": True}, "turns": turns}))
+
+    class Discard:
+        def write(self, _):
+            pass
+
+    def run():
+        random.seed(SEED)
+        stats = run_batch(sessions, Discard(), keep_transcript=False)
+        # A turn that runs out of answers stops early and would time less work than it claims
+        if stats["errors"]:
+            raise RuntimeError(f"headless replay had {stats['errors']} failed turns; check UTTERANCES answers")
+    return run, len(sessions)
+
+
+def case_server(latency: float) -> Callable:
+    def make(rng):
+        users = 50
+
+        async def session(server, number):
+            created = server.create_session({"name": f"bench{number}", "age": 20, "isPremium": True})
+            state = server.get_session(created["session_id"])
+            for text, answers in SCRIPT:
+                reply = await server.turn(state, text.format(n=number))
+                answers = iter(answers)
+                while reply["prompt"] is not None:
+                    reply = await server.turn(state, next(answers))
+
+        async def all_sessions():
+            server = ChatServer(MockGemini(latency), quota=QuotaEngine())
+            await asyncio.gather(*(session(server, number) for number in range(users)))
+
+        def run():
+            random.seed(SEED)
+            get_default_cache().clear()
+            asyncio.run(all_sessions())
+        return run, users
+    return make
+
+
+def build_cases(gemini_latency: float) -> Dict[str, Callable]:
+    cases = {"classify_command": case_classify}
+    for name in ASSISTANT_CASES:
+        cases[f"{name}.handleRequest"] = case_assistant(name)
+    cases["fitness.generateSchedule"] = case_schedule
+    cases["headless.sessions"] = case_headless
+    cases["server.sessions"] = case_server(gemini_latency)
+    return cases
+
+
+def measure(make, rounds: int) -> dict:
+    run, ops = make(random.Random(SEED))
+    run()   # warm-up: imports, regex compilation, caches
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) / ops * 1e6)
+    return {
+        "ops": ops,
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def mismatched_settings(meta: dict, args) -> List[str]:
+    """Settings the baseline was saved with that differ from this run, as readable strings."""
+    current = {"rounds": args.rounds, "gemini_latency": args.gemini_latency}
+    return [f"{key} {meta.get(key)} in the baseline, {value} now"
+            for key, value in current.items() if meta.get(key) != value]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Names of the cases whose median is more than `threshold` slower than the baseline."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result["median_us"] > before["median_us"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time routing, the assistants and whole sessions.")
+    parser.add_argument("--rounds", type=int, default=5, help="timed runs per case (the median is reported)")
+    parser.add_argument("--only", default="", help="run only cases whose name contains this text")
+    parser.add_argument("--gemini-latency", type=float, default=0.0, help="seconds the mocked Gemini takes to answer")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    # Study and nutrition cases time the in-memory stores, not disk writes to the real ones
+    os.environ.setdefault("SRS_PATH", "")
+    os.environ.setdefault("NUTRITION_LOGS", "")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        mismatches = mismatched_settings(saved.get("meta", {}), args)
+        if mismatches:
+            print(f"❌ {args.baseline} was measured differently ({'; '.join(mismatches)}). "
+                  f"Run with the same --rounds and --gemini-latency, or save a new baseline.", file=sys.stderr)
+            sys.exit(2)
+        baseline = saved["results"]
+
+    results = {}
+    for name, make in build_cases(args.gemini_latency).items():
+        if args.only.lower() not in name.lower():
+            continue
+        results[name] = result = measure(make, args.rounds)
+        line = f"{name:28s} {result['median_us']:10.1f} us/op  (min {result['min_us']:.1f}, {result['ops']} ops)"
+        if name in baseline:
+            change = result["median_us"] / baseline[name]["median_us"] - 1
+            line += f"  {change:+.0%} vs baseline"
+        print(line)
+
+    if args.json:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "rounds": args.rounds,
+                "gemini_latency": args.gemini_latency,
+            },
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"❌ Slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
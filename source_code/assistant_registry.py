@@ -0,0 +1,82 @@
+"""CommandType -> assistant, importing each assistant module the first time it is needed.
+
+Front ends never name assistant classes; they ask the registry. Adding an
+assistant is one entry in ASSISTANTS (or a register() call from a plugin),
+with no dispatch code to touch:
+
+    register(CommandType.LEGAL, "my_plugins.legal:LegalAssistant")
+
+A factory is any callable taking (user, io), given either directly or as a
+"module:attribute" string that is imported on first use. The registry then
+sets the assistant's `identity` (whose stored data it uses) when one is given.
+"""
+import importlib
+import threading
+from typing import Callable, Dict, Optional, Union
+
+from source_code.base_assistant import AIAssistant
+from source_code.io_channel import IOChannel
+from source_code.models import CommandType, UserProfile
+
+Factory = Callable[[UserProfile, Optional[IOChannel]], AIAssistant]
+
+ASSISTANTS: Dict[CommandType, Union[str, Factory]] = {
+    CommandType.MUSIC: "source_code.music_assistant:MusicAssistant",
+    CommandType.FITNESS: "source_code.fitness_assistant:FitnessAssistant",
+    CommandType.STUDY: "source_code.study_assistant:StudyAssistant",
+    CommandType.BOOK: "source_code.book_assistant:BookAssistant",
+    CommandType.PSYCHOLOGY: "source_code.psychology_assistant:PsychologyAssistant",
+    CommandType.NUTRITION: "source_code.nutrition_assistant:NutritionAssistant",
+}
+# Anything without an entry of its own
+DEFAULT_ASSISTANT: Factory = AIAssistant
+
+_factories: Dict[CommandType, Factory] = {}   # resolved entries
+_lock = threading.Lock()
+
+
+def register(command_type: CommandType, factory: Union[str, Factory]):
+    with _lock:
+        ASSISTANTS[command_type] = factory
+        _factories.pop(command_type, None)
+
+
+def resolve(target: Union[str, Factory]) -> Factory:
+    if not isinstance(target, str):
+        return target
+    module, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+def assistant_factory(command_type: CommandType) -> Factory:
+    factory = _factories.get(command_type)
+    if factory is None:
+        with _lock:
+            factory = _factories[command_type] = resolve(ASSISTANTS.get(command_type, DEFAULT_ASSISTANT))
+    return factory
+
+
+def create_assistant(command_type: CommandType, user: UserProfile, io: Optional[IOChannel] = None,
+                     identity: Optional[str] = None) -> AIAssistant:
+    assistant = assistant_factory(command_type)(user, io)
+    if identity is not None:
+        assistant.identity = identity
+    return assistant
+
+
+class SessionAssistants:
+    """One user's assistants, built on first use; stateless ones are kept for the next turn."""
+
+    def __init__(self, user: UserProfile, io: Optional[IOChannel] = None, identity: Optional[str] = None):
+        self.user = user
+        self.io = io
+        self.identity = identity
+        self._instances: Dict[CommandType, AIAssistant] = {}
+
+    def get(self, command_type: CommandType) -> AIAssistant:
+        assistant = self._instances.get(command_type)
+        if assistant is None:
+            assistant = create_assistant(command_type, self.user, self.io, self.identity)
+            if assistant.stateless:
+                self._instances[command_type] = assistant
+        return assistant
@@ -1,8 +1,20 @@
+from typing import Optional
 from source_code.models import UserProfile, Request, Response
+from source_code.io_channel import IOChannel, ConsoleChannel
+from source_code.conversation import Conversation
 
 class AIAssistant:
-    def __init__(self, user: UserProfile):
+    # A request's progress lives in its Conversation, so one assistant can serve a
+    # whole session. Set False on assistants that keep per-request state on self.
+    stateless = True
+    # Whose stored data (review cards, meal logs) this assistant reads and writes: the
+    # server's user or session, set by the registry; None is the local OS account
+    identity: Optional[str] = None
+
+    def __init__(self, user: UserProfile, io: Optional[IOChannel] = None):
         self.user = user
+        # Where prompts and messages go; the console unless a front end supplies its own
+        self.io = io or ConsoleChannel()
 
     def greetUser(self) -> str:
         return f"Hello, {self.user.name}! How can I assist you today?"
@@ -10,5 +22,9 @@ class AIAssistant:
     def handleRequest(self, request: Request) -> Response:
         return self.generateResponse("I'm here to help!", confidence=0.7)
 
+    def startConversation(self, state: Optional[dict] = None) -> Conversation:
+        # Resumable form of handleRequest; assistants that ask follow-up questions override it
+        return Conversation(self, state)
+
     def generateResponse(self, message: str, confidence: float = 1.0) -> Response:
         return Response(message=message, confidence=confidence, actionPerformed=True)
@@ -0,0 +1,285 @@
+"""On-disk BM25 index over a book catalog, for BookAssistant.
+
+Build it once from a CSV or JSONL dump (one book per row/line with `title`,
+and optionally `author`, `genre`, `description` and `link`):
+
+    PYTHONPATH=. python source_code/book_index.py build books.csv
+    PYTHONPATH=. python source_code/book_index.py search "cozy fantasy with dragons"
+
+The index is a directory (BOOK_INDEX, default ~/.ai_assistant_books):
+
+    meta.json       document count, field weights, BM25 parameters
+    terms.npy       every term, sorted
+    term_starts.npy where each term's postings start (plus the final end)
+    post_docs.npy   int32 document ids, grouped by term
+    post_w.npy      float32 BM25 term-frequency weight of each posting
+    docs.jsonl      title/author/link per book, one line each
+    doc_offsets.npy byte offset of every line in docs.jsonl
+
+Everything is memory-mapped, so opening the index reads next to nothing; a
+query binary-searches terms.npy and touches just the postings of its terms.
+The length-normalised tf part of BM25 is computed at build time; a query
+multiplies it by each term's idf and adds it up per book.
+"""
+import argparse
+import csv
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".ai_assistant_books")
+# A word in the title counts three times as much as one in the description
+FIELD_WEIGHTS = (("title", 3), ("author", 2), ("genre", 2), ("description", 1))
+K1 = 1.2
+B = 0.75
+
+# Longer "words" are junk (URLs, ISBN runs) and would widen every entry of terms.npy
+MAX_TERM = 24
+WORD = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its me my of on or so that the this to was "
+    "were will with you your".split()
+)
+# Request chatter that says nothing about which book is wanted
+QUERY_STOP_WORDS = STOP_WORDS | frozenset(
+    "book books novel novels read reading recommend recommendation suggest something some good great "
+    "want like looking find can could give please about any new one".split()
+)
+
+
+def terms(text: str, stop_words=STOP_WORDS) -> List[str]:
+    words = []
+    for word in WORD.findall(text.lower()):
+        if word in stop_words or len(word) > MAX_TERM:
+            continue
+        # "dragons" and "dragon" are the same search
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+class BookHit(NamedTuple):
+    title: str
+    author: str
+    link: str
+    score: float
+
+
+def goodreads_link(title: str, author: str = "") -> str:
+    from urllib.parse import quote_plus
+    return "https://www.goodreads.com/search?q=" + quote_plus(f"{title} {author}".strip())
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """Stream books from a .csv or .jsonl file."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".json")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def field_text(value) -> str:
+    # JSONL dumps often give genres as a list
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return str(value or "")
+
+
+def build_index(source: str, out_dir: str = DEFAULT_PATH) -> dict:
+    """Index the books in `source` into `out_dir`; returns the contents of meta.json."""
+    os.makedirs(out_dir, exist_ok=True)
+    postings: Dict[str, tuple] = {}   # term -> (doc ids, raw weighted tf)
+    lengths = array("f")
+    offsets = array("q", [0])
+
+    # Step 1: one pass over the dump, writing documents as we go
+    with open(os.path.join(out_dir, "docs.jsonl"), "wb") as docs:
+        for doc_id, record in enumerate(read_records(source)):
+            title = field_text(record.get("title")).strip()
+            author = field_text(record.get("author")).strip()
+            counts = Counter()
+            for field, weight in FIELD_WEIGHTS:
+                for term in terms(field_text(record.get(field))):
+                    counts[term] += weight
+            for term, tf in counts.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array("i"), array("f"))
+                entry[0].append(doc_id)
+                entry[1].append(tf)
+            lengths.append(sum(counts.values()))
+
+            link = field_text(record.get("link") or record.get("url")).strip() or goodreads_link(title, author)
+            line = json.dumps({"title": title, "author": author, "link": link}, ensure_ascii=False).encode("utf-8") + b"\n"
+            docs.write(line)
+            offsets.append(offsets[-1] + len(line))
+
+    # Step 2: precompute the tf half of BM25, now that the average length is known
+    count = len(lengths)
+    doc_lengths = np.frombuffer(lengths, dtype=np.float32)
+    average = float(doc_lengths.mean()) if count else 0.0
+    norms = K1 * (1 - B + B * doc_lengths / average) if count else doc_lengths
+
+    vocabulary = sorted(postings)
+    starts = np.empty(len(vocabulary) + 1, dtype=np.int64)
+    total = sum(len(entry[0]) for entry in postings.values())
+    post_docs = np.empty(total, dtype=np.int32)
+    post_w = np.empty(total, dtype=np.float32)
+    start = 0
+    for n, term in enumerate(vocabulary):
+        ids, tfs = postings.pop(term)
+        end = start + len(ids)
+        ids = np.frombuffer(ids, dtype=np.int32)
+        tfs = np.frombuffer(tfs, dtype=np.float32)
+        post_docs[start:end] = ids
+        post_w[start:end] = tfs * (K1 + 1) / (tfs + norms[ids])
+        starts[n] = start
+        start = end
+    starts[-1] = total
+
+    np.save(os.path.join(out_dir, "post_docs.npy"), post_docs)
+    np.save(os.path.join(out_dir, "post_w.npy"), post_w)
+    np.save(os.path.join(out_dir, "doc_offsets.npy"), np.frombuffer(offsets, dtype=np.int64))
+    np.save(os.path.join(out_dir, "terms.npy"), np.array(vocabulary, dtype=f"<U{MAX_TERM}"))
+    np.save(os.path.join(out_dir, "term_starts.npy"), starts)
+    meta = {"documents": count, "terms": len(vocabulary), "postings": total, "average_length": average,
+            "k1": K1, "b": B, "fields": dict(FIELD_WEIGHTS)}
+    # Written last: a directory without meta.json is not an index
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class BookIndex:
+    def __init__(self, path: str = DEFAULT_PATH):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.documents = self.meta["documents"]
+        self.terms = np.load(os.path.join(path, "terms.npy"), mmap_mode="r")
+        self.starts = np.load(os.path.join(path, "term_starts.npy"), mmap_mode="r")
+        self.post_docs = np.load(os.path.join(path, "post_docs.npy"), mmap_mode="r")
+        self.post_w = np.load(os.path.join(path, "post_w.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "doc_offsets.npy"), mmap_mode="r")
+        with open(os.path.join(path, "docs.jsonl"), "rb") as f:
+            self._docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.documents else b""
+
+    @staticmethod
+    def exists(path: str = DEFAULT_PATH) -> bool:
+        return os.path.exists(os.path.join(path, "meta.json"))
+
+    def idf(self, df: int) -> float:
+        return math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+
+    def postings(self, term: str) -> Optional[Tuple[int, int]]:
+        """The [start, end) of `term`'s postings, or None if no book has it."""
+        i = int(np.searchsorted(self.terms, term))
+        if i < len(self.terms) and self.terms[i] == term:
+            return int(self.starts[i]), int(self.starts[i + 1])
+        return None
+
+    def document(self, doc_id: int) -> dict:
+        return json.loads(self._docs[int(self.offsets[doc_id]):int(self.offsets[doc_id + 1])])
+
+    def search(self, query: str, k: int = 5) -> List[BookHit]:
+        """The k best books for `query` by BM25, best first."""
+        slices = []
+        for term in set(terms(query, QUERY_STOP_WORDS)):
+            span = self.postings(term)
+            if span is not None:
+                slices.append(span)
+        if not slices:
+            return []
+
+        if len(slices) == 1:
+            # One term: its postings are the scores, no accumulation needed
+            start, end = slices[0]
+            docs = self.post_docs[start:end]
+            scores = self.post_w[start:end] * np.float32(self.idf(end - start))
+        else:
+            # A term lists each book once, so one scatter-add per term sums the scores
+            docs = None
+            scores = np.zeros(self.documents, dtype=np.float32)
+            for start, end in slices:
+                scores[self.post_docs[start:end]] += self.post_w[start:end] * np.float32(self.idf(end - start))
+
+        # Everything scoring at least the k-th best score. np.partition on values stays
+        # fast when many books tie, which argpartition does not
+        if len(scores) > k:
+            top = np.flatnonzero(scores >= np.partition(scores, -k)[-k])
+        else:
+            top = np.arange(len(scores))
+        # Best first; ties go to the book listed first in the catalog
+        top = top[np.lexsort((top, -scores[top]))][:k]
+        if docs is not None:
+            top_docs = docs[top]
+        else:
+            # Books that matched nothing score 0
+            top = top[scores[top] > 0]
+            top_docs = top
+
+        hits = []
+        for i, doc_id in zip(top, top_docs):
+            doc = self.document(int(doc_id))
+            hits.append(BookHit(doc["title"], doc["author"], doc["link"], float(scores[i])))
+        return hits
+
+
+_default_index = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def get_default_index() -> Optional[BookIndex]:
+    """The index at BOOK_INDEX, or None when none has been built."""
+    global _default_index, _default_loaded
+    with _default_lock:
+        if not _default_loaded:
+            path = os.getenv("BOOK_INDEX", DEFAULT_PATH)
+            _default_index = BookIndex(path) if path and BookIndex.exists(path) else None
+            _default_loaded = True
+        return _default_index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the book search index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index a .csv or .jsonl book dump")
+    build.add_argument("source")
+    build.add_argument("--index", default=os.getenv("BOOK_INDEX", DEFAULT_PATH))
+    search = commands.add_parser("search", help="show the best matches for a query")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=5)
+    search.add_argument("--index", default=os.getenv("BOOK_INDEX", DEFAULT_PATH))
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        meta = build_index(args.source, args.index)
+        print(f"Indexed {meta['documents']} books ({meta['terms']} terms, {meta['postings']} postings) "
+              f"into {args.index} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    else:
+        index = BookIndex(args.index)
+        start = time.perf_counter()
+        hits = index.search(args.query, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for rank, hit in enumerate(hits, 1):
+            print(f"{rank}. {hit.title} by {hit.author}  ({hit.score:.2f})  {hit.link}")
+        print(f"{len(hits)} results in {elapsed:.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+from source_code.keyword_index import KeywordIndex
+
+
+class CatalogMatch(NamedTuple):
+    kind: str      # which map matched, e.g. "mood" or "artist"
+    keyword: str
+    value: object
+
+
+class Catalog:
+    """Read-only keyword maps plus one compiled matcher that resolves all of them in one pass.
+
+    Maps are checked in the order given and keywords in insertion order, the same
+    priority the old per-request `for key, value in map.items()` loops used.
+    With `word_start`, a keyword only matches where a word begins.
+    """
+
+    def __init__(self, word_start: bool = False, **maps: Mapping[str, object]):
+        self.maps = MappingProxyType({kind: MappingProxyType(dict(entries)) for kind, entries in maps.items()})
+        self.index = KeywordIndex(tuple((kind, entries.keys()) for kind, entries in self.maps.items()), word_start)
+
+    def __getitem__(self, kind: str) -> Mapping[str, object]:
+        return self.maps[kind]
+
+    def match(self, text: str) -> Optional[CatalogMatch]:
+        found = self.index.first(text.lower())
+        if found is None:
+            return None
+        keyword, kind = found
+        return CatalogMatch(kind, keyword, self.maps[kind][keyword])
+
+
+# Shared by every MusicAssistant instance
+MUSIC_CATALOG = Catalog(
+    mood={
+        "tense": "Soothing Instrumentals",
+        "gloomy": "Rainy Day Vibes",
+        "fun": "Party Starters",
+        "energetic": "High BPM Hits",
+        "gentle": "Soft Acoustic",
+        "romantic": "Love Songs",
+        "calm": "Lofi Chill",
+        "relax": "Ambient Escape",
+        "depressed": "Emotional Ballads",
+        "chill": "Evening Chillout",
+        "happy": "Feel Good Hits",
+        "sad": "Sad Vibes",
+        "worry": "Rainy Day Lo-fi",
+        "anxious": "Soothing Instrumentals",
+        "stressed": "Ambient Chill",
+        "overwhelmed": "Piano for Focus",
+        "excited": "Dance Party Mix",
+        "confident": "Empowerment Anthems",
+        "motivated": "Hype & Grind",
+        "inspired": "Creative Flow",
+        "grateful": "Morning Gratitude Vibes",
+        "focused": "Deep Focus Beats",
+        "productive": "Work Vibes",
+        "studying": "No Distraction Lo-fi",
+        "background": "Ambient Study Mix",
+        "lonely": "Companion Songs",
+        "broken": "Healing Melodies",
+        "insecure": "Gentle Affirmations",
+        "burnout": "Mental Reset",
+        "defeated": "Rebuild Energy",
+        "nostalgic": "Throwback Classics",
+        "dreamy": "Ethereal Chill",
+        "romanticized": "Movie Soundtrack Moments",
+        "artistic": "Paint & Chill",
+        "in love": "You are mine and I am yours",
+        "kpop": "Top 100 New Kpop Hits",
+    },
+    artist={
+        "taylor swift": "Taylor Swift Essentials",
+        "bts": "BTS Army Playlist",
+        "drake": "Drake Hits",
+        "coldplay": "Coldplay Chill Mix",
+        "blackpink": "BLACKPINK Essentials",
+        "ed sheeran": "Ed Sheeran Acoustic Vibes",
+    },
+    activity={
+        "study": "Lo-fi Study Mix",
+        "run": "Power Run Beats",
+        "clean": "Motivation Mix",
+        "sleep": "Nighttime Ambience",
+        "drive": "Roadtrip Vibes",
+        "cook": "Kitchen Grooves",
+        "work out": "Fitness Music Motivation",
+        "shower": "Singing in the Shower",
+    },
+)
+
+# Shared by every BookAssistant instance: genre -> (title, link)
+BOOK_CATALOG = Catalog(
+    genre={
+        "romance": ("The Love Hypothesis by Ali Hazelwood", "https://www.goodreads.com/book/show/56732449-the-love-hypothesis"),
+        "fantasy": ("A Court of Thorns and Roses by Sarah J. Maas", "https://www.goodreads.com/book/show/16096824-a-court-of-thorns-and-roses"),
+        "mystery": ("The Girl with the Dragon Tattoo by Stieg Larsson", "https://www.goodreads.com/book/show/2429135.The_Girl_with_the_Dragon_Tattoo"),
+        "sci-fi": ("Project Hail Mary by Andy Weir", "https://www.goodreads.com/book/show/54493401-project-hail-mary"),
+        "thriller": ("The Silent Patient by Alex Michaelides", "https://www.goodreads.com/book/show/40097951-the-silent-patient"),
+        "historical": ("The Nightingale by Kristin Hannah", "https://www.goodreads.com/book/show/21853621-the-nightingale"),
+        "self-help": ("Atomic Habits by James Clear", "https://www.goodreads.com/book/show/40121378-atomic-habits"),
+        "young adult": ("They Both Die at the End by Adam Silvera", "https://www.goodreads.com/book/show/33385229-they-both-die-at-the-end"),
+    },
+)
+
+# Shared by every FitnessAssistant instance
+MUSCLE_CATALOG = Catalog(
+    muscle={
+        "chest": "Chest Sculpting Routine",
+        "triceps": "Triceps Toner Program",
+        "shoulder": "Shoulder Definition Circuit",
+        "legs": "Leg Power Workout",
+        "glutes": "Glute Builder Plan",
+        "forearms": "Forearm Strength Set",
+        "abs": "Core Crusher Circuit",
+        "back": "Back Strength Workout",
+        "biceps": "Bicep Blast Session",
+    },
+)
@@ -1,22 +1,26 @@
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
-from models import UserProfile, Request, CommandType
-from music_assistant import MusicAssistant
-from fitness_assistant import FitnessAssistant
-from study_assistant import StudyAssistant
-from base_assistant import AIAssistant
-from book_assistant import BookAssistant
-from psychology_assistant import PsychologyAssistant
+from source_code.models import UserProfile, Request, CommandType
+from source_code.main import LIMIT_MESSAGE, classify_command as console_classify_command
+from source_code.assistant_registry import SessionAssistants
+from source_code.intent_router import route_intent, route_followup
+from source_code.io_channel import IOChannel
+from source_code.scrollback import make_scrollback
+from source_code.quota import get_default_quota, quota_key
+from source_code.tracing import span, traced_session, waiting
 from datetime import datetime
 import threading
-import requests
-import json
+import queue
 import os
 
+# How often the Tk loop applies queued UI updates, and the most it applies per pass
+UI_DRAIN_MS = 30
+UI_DRAIN_BATCH = 500
+
 def classify_command(input_str: str, chat_gui=None) -> CommandType:
-    input_str = input_str.lower()
+    route = route_intent(input_str)
 
-    if "feel" in input_str or "feeling" in input_str or "listen" in input_str:
+    if route.command_type is None:
         if chat_gui:
             # GUI mode - show options and wait for user response
             chat_gui.add_message("AI Assistant", "🧠 I hear you. I know some feelings can be heavy.", "assistant")
@@ -29,83 +33,23 @@ def classify_command(input_str: str, chat_gui=None) -> CommandType:
             return None  # Will be determined by follow-up
         else:
             # Console mode - original main.py logic
-            print("\n🧠 I hear you. I know some feelings can be heavy.")
-            print("Would you like me to:")
-            print("🎵 1) Recommend a song or playlist to soothe your mood")
-            print("💬 2) Just listen to what you want to share — I'm here for you.")
-
-            for _ in range(2):
-                follow_up = input("You can say something like 'playlist' or 'talk to you': ").strip().lower()
-                if any(word in follow_up for word in ["song", "playlist", "listen to music", "music", "tune", "songs", "playlists"]):
-                    return CommandType.MUSIC
-                elif any(word in follow_up for word in ["talk", "vent", "listen to me", "share", "express", "tell you", "someone to talk"]):
-                    return CommandType.PSYCHOLOGY
-                else:
-                    print("Hmm... I didn't quite understand. Can you try rephrasing?")
-            print("❓Still a bit unclear... Let me know if there's anything else I can help with.")
-            return CommandType.GENERAL
-
-    if any(word in input_str for word in ["song", "music", "romantic", "listen", "play", "playlist", "mood", "tune", "songs"]):
-        return CommandType.MUSIC
-    elif any(word in input_str for word in ["workout", "exercise", "gym", "gain muscle", "build muscle", "work out"]):
-        return CommandType.FITNESS
-    elif any(word in input_str for word in ["study", "review", "math", "homework"]):
-        return CommandType.STUDY
-    elif any(word in input_str for word in ["book", "novel", "read", "recommend a book", "story", "fantasy", "romance", "thriller"]):
-        return CommandType.BOOK
-    elif any(word in input_str for word in ["sad", "anxious", "depressed", "cope", "mental", "psychology", "stressed", "burnout", "therapy", "vent"]):
-        return CommandType.PSYCHOLOGY
-    else:
-        return CommandType.GENERAL
-
-def call_gemini_api(question, api_key=None):
-    """Call Gemini API for general questions"""
-    try:
-        # Try to get API key from environment variable or use default
-        if api_key is None:
-            api_key = os.getenv('GEMINI_API_KEY', 'your-Gemini-API') # Please use your Gemini API's key here
-
-        if api_key == 'YOUR_GEMINI_API_KEY':
-            return "Please set your GEMINI_API_KEY environment variable to use AI responses for general questions."
-
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-        headers = {
-            'Content-Type': 'application/json',
-            'X-goog-api-key': api_key
-        }
-        data = {
-            "contents": [
-                {
-                    "parts": [
-                        {
-                            "text": question
-                        }
-                    ]
-                }
-            ]
-        }
-
-        response = requests.post(url, headers=headers, json=data, timeout=30)
-
-        if response.status_code == 200:
-            result = response.json()
-            if 'candidates' in result and len(result['candidates']) > 0:
-                content = result['candidates'][0]['content']
-                if 'parts' in content and len(content['parts']) > 0:
-                    return content['parts'][0]['text'].strip()
-            return "Sorry, I couldn't generate a response."
-        else:
-            error_data = response.json()
-            if 'error' in error_data:
-                return f"API Error: {error_data['error']['message']}"
-            return "Sorry, there was an error connecting to the AI service."
-
-    except requests.exceptions.Timeout:
-        return "Sorry, the request timed out. Please try again."
-    except requests.exceptions.RequestException:
-        return "Sorry, there was a network error. Please check your connection."
-    except Exception:
-        return "Sorry, there was an unexpected error. Please try again."
+            return console_classify_command(input_str)
+
+    return route.command_type
+
+class GUIChannel(IOChannel):
+    """Routes an assistant's prompts and messages through the chat window."""
+
+    def __init__(self, chat_gui):
+        self.chat_gui = chat_gui
+
+    def ask(self, prompt=""):
+        # The user's thinking time is not the assistant's latency
+        with waiting():
+            return self.chat_gui.gui_input(prompt)
+
+    def say(self, message=""):
+        self.chat_gui.gui_print(message)
 
 class ChatGUI:
     def __init__(self, root):
@@ -116,8 +60,7 @@ class ChatGUI:
 
         # User data 
         self.user = None
-        self.request_count = 0
-        self.free_limit = 3
+        self.quota = get_default_quota()
 
         # GUI-specific state for handling interactive prompts
         self.waiting_for_input = False
@@ -132,9 +75,18 @@ class ChatGUI:
         # State for handling assistant input requests
         self.pending_input_prompt = None
         self.waiting_for_assistant_input = False
+        self.input_replies = queue.SimpleQueue()
+        self.io = GUIChannel(self)
+
+        # Every change to the chat goes through this queue, so worker threads never touch Tk
+        self.ui_updates = queue.SimpleQueue()
+
+        # Stream Gemini answers into the chat as they arrive (GEMINI_STREAM=0 turns it off)
+        self.stream_responses = os.getenv("GEMINI_STREAM", "1") != "0"
 
         self.setup_ui()
         self.show_welcome_dialog()
+        self.root.after(UI_DRAIN_MS, self.drain_ui_updates)
 
     def setup_ui(self):
         # Main container 
@@ -173,6 +125,11 @@ class ChatGUI:
         )
         self.chat_display.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        # Keep only a window of the chat in the widget; the rest waits on disk until scrolled to
+        self.scrollback = make_scrollback(self.chat_display)
+        if self.scrollback:
+            self.chat_display.configure(yscrollcommand=self.on_chat_scroll)
+
         # Input area
         input_frame = tk.Frame(main_frame, bg="#223355", height=56)
         input_frame.pack(side=tk.BOTTOM, fill=tk.X)
@@ -344,7 +301,7 @@ class ChatGUI:
 
         # Create UserProfile 
         self.user = UserProfile(name=name, age=age, preferences={}, isPremium=is_premium)
-        self.request_count = 0
+        self.assistants = SessionAssistants(self.user, self.io)
 
         # Update UI
         self.user_label.config(text=f"User: {name} ({age} years old)")
@@ -367,28 +324,76 @@ class ChatGUI:
 
     def update_requests_label(self):
         if self.user:
-            if self.user.isPremium:
-                self.requests_label.config(text="Premium User - Unlimited requests")
+            plan = "Premium User" if self.user.isPremium else "Free User"
+            remaining = self.quota.remaining(*quota_key(self.user))
+            if remaining is None:
+                self.requests_label.config(text=f"{plan} - Unlimited requests")
             else:
-                remaining = self.free_limit - self.request_count
-                self.requests_label.config(text=f"Free User - {remaining} requests remaining")
+                self.requests_label.config(text=f"{plan} - {int(remaining)} requests remaining")
 
     def add_message(self, sender, message, tag):
-        self.chat_display.config(state=tk.NORMAL)
-
-        # Add timestamp
+        """Queue a chat message; safe to call from any thread."""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.chat_display.insert(tk.END, f"[{timestamp}] ", "timestamp")
-
-        # Add sender
-        self.chat_display.insert(tk.END, f"{sender}: ", tag)
-
-        # Add message (bubble effect: indent and spacing by tag)
-        self.chat_display.insert(tk.END, f"{message}\n\n", tag)
+        self.ui_updates.put([
+            (f"[{timestamp}] ", "timestamp"),
+            (f"{sender}: ", tag),
+            # Bubble effect: indent and spacing by tag
+            (f"{message}\n\n", tag),
+        ])
+
+    def call_in_ui(self, func, *args):
+        """Queue `func(*args)` to run on the Tk thread, in order with queued messages."""
+        self.ui_updates.put((func, args))
+
+    def drain_ui_updates(self):
+        """Apply queued UI updates: runs of text become one insert and one scroll."""
+        if self.ui_updates.empty():
+            self.root.after(UI_DRAIN_MS, self.drain_ui_updates)
+            return
 
+        pending = []
+        try:
+            with span("render"):
+                for _ in range(UI_DRAIN_BATCH):
+                    try:
+                        update = self.ui_updates.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(update, list):
+                        pending.extend(update)
+                        continue
+                    # Text queued before a call has to be on screen before the call runs
+                    self.insert_text(pending)
+                    pending = []
+                    func, args = update
+                    func(*args)
+                self.insert_text(pending)
+                pending = []
+        finally:
+            self.insert_text(pending)
+            self.root.after(UI_DRAIN_MS, self.drain_ui_updates)
+
+    def insert_text(self, segments):
+        if not segments:
+            return
+        if self.scrollback:
+            self.scrollback.append(segments)
+            return
+        # Text.insert takes any number of (text, tag) pairs in one call
+        args = []
+        for text, tag in segments:
+            args.extend((text, tag))
+        self.chat_display.config(state=tk.NORMAL)
+        self.chat_display.insert(tk.END, *args)
         self.chat_display.config(state=tk.DISABLED)
         self.chat_display.see(tk.END)
 
+    def on_chat_scroll(self, first, last):
+        self.chat_display.vbar.set(first, last)
+        # Page from disk once the view reaches either end (after this scroll has been drawn)
+        if float(first) <= 0.0 or float(last) >= 1.0:
+            self.root.after_idle(self.scrollback.on_scroll, float(first), float(last))
+
     def send_message(self, _=None):
         message = self.input_entry.get().strip()
         if not message:
@@ -407,7 +412,10 @@ class ChatGUI:
         # Handle assistant input requests
         if self.waiting_for_assistant_input:
             self.waiting_for_assistant_input = False
-            self.pending_input_response = message
+            # Wakes the worker blocked in gui_input; input stays off until it asks again or answers
+            self.input_entry.config(state=tk.DISABLED)
+            self.send_button.config(state=tk.DISABLED)
+            self.input_replies.put(message)
             return
 
         # Handle continue conversation logic
@@ -427,132 +435,130 @@ class ChatGUI:
                 self.add_message("AI Assistant", "— 'Recommend me a book to read'", "assistant")
                 self.add_message("AI Assistant", "— 'I need someone to listen to me now'", "assistant")
                 self.add_message("AI Assistant", "👉 Your request:", "assistant")
-                # Update request count for free users (same as main.py)
-                if not self.user.isPremium:
-                    self.request_count += 1
-                    self.update_requests_label()
+                # Quotas refill over time, so show the current count
+                self.update_requests_label()
                 return
             else:
-                # Use Gemini API for other responses
-                gemini_response = call_gemini_api(message)
-                self.add_message("AI Assistant", gemini_response, "assistant")
-                self.add_message("AI Assistant", "🔁 Is there anything else I can help you with? (yes/no):", "assistant")
-                self.waiting_for_continue = True
+                # Anything else is a question for Gemini: a GENERAL turn, charged and streamed like any other
+                self.run_in_worker(self.process_message, message, CommandType.GENERAL)
                 return
 
-        # Disable input while processing
+        self.run_in_worker(self.process_message, message)
+
+    def run_in_worker(self, target, *args):
+        # Disable input while processing; the worker re-enables it when it answers or asks
         self.input_entry.config(state=tk.DISABLED)
         self.send_button.config(state=tk.DISABLED)
-
-        # Process in background thread
-        threading.Thread(target=self.process_message, args=(message,), daemon=True).start()
+        threading.Thread(target=target, args=args, daemon=True).start()
 
     def gui_input(self, prompt=""):
         """Handle input requests from assistants in GUI mode"""
+        # Runs on the worker thread: let the Tk loop show the prompt, then sleep
+        # until send_message hands over the user's reply
+        self.call_in_ui(self.show_input_prompt, prompt)
+        return self.input_replies.get()
+
+    def show_input_prompt(self, prompt):
         if prompt.strip():
             self.add_message("AI Assistant", prompt, "assistant")
 
         # Set up waiting state
         self.pending_input_prompt = prompt
         self.waiting_for_assistant_input = True
-        self.pending_input_response = None
 
         # Re-enable input for user response
         self.input_entry.config(state=tk.NORMAL)
         self.send_button.config(state=tk.NORMAL)
         self.input_entry.focus()
 
-        # Wait for user response
-        while self.waiting_for_assistant_input and self.pending_input_response is None:
-            self.root.update()
-            threading.Event().wait(0.1)  # Small delay to prevent busy waiting
-
-        return self.pending_input_response or ""
-
     def gui_print(self, *args, **_):
         """Handle print requests from assistants in GUI mode"""
         message = " ".join(str(arg) for arg in args)
         if message.strip():
             self.add_message("AI Assistant", message, "assistant")
 
-    def process_message(self, message):
-        try:
-            # Handle follow-up for feeling classification
-            if self.waiting_for_followup:
-                if any(word in message.lower() for word in ["song", "playlist", "listen to music", "music", "tune", "songs", "playlists"]):
-                    command_type = CommandType.MUSIC
-                    self.waiting_for_followup = False
-                elif any(word in message.lower() for word in ["talk", "vent", "listen to me", "share", "express", "tell you", "someone to talk"]):
-                    command_type = CommandType.PSYCHOLOGY
-                    self.waiting_for_followup = False
-                else:
-                    self.followup_attempts += 1
-                    if self.followup_attempts < 2:
-                        self.root.after(0, self.handle_response, "", "Hmm... I didn't quite understand. Can you try rephrasing?", True)
+    def process_message(self, message, command_type=None):
+        with span("turn") as turn:
+            try:
+                # The caller already knows what kind of request this is
+                if command_type is not None:
+                    if self.quota.exhausted(*quota_key(self.user)):
+                        self.call_in_ui(self.handle_response, "", LIMIT_MESSAGE, False)
                         return
-                    else:
-                        self.root.after(0, self.handle_response, "", "❓Still a bit unclear... Let me know if there's anything else I can help with.", True)
-                        command_type = CommandType.GENERAL
+
+                # Handle follow-up for feeling classification
+                elif self.waiting_for_followup:
+                    command_type = route_followup(message).command_type
+                    if command_type is not None:
                         self.waiting_for_followup = False
-            else:
-                # Check request limit 
-                if not self.user.isPremium and self.request_count >= self.free_limit:
-                    limit_msg = "🚫 Sorry, you have reached your plan limit. 💎 Please upgrade to premium or come back later after reset."
-                    self.root.after(0, self.handle_response, "", limit_msg, False)
-                    return
+                    else:
+                        self.followup_attempts += 1
+                        if self.followup_attempts < 2:
+                            self.call_in_ui(self.handle_response, "", "Hmm... I didn't quite understand. Can you try rephrasing?", True)
+                            return
+                        else:
+                            self.call_in_ui(self.handle_response, "", "❓Still a bit unclear... Let me know if there's anything else I can help with.", True)
+                            command_type = CommandType.GENERAL
+                            self.waiting_for_followup = False
+                else:
+                    # Check request limit 
+                    if self.quota.exhausted(*quota_key(self.user)):
+                        self.call_in_ui(self.handle_response, "", LIMIT_MESSAGE, False)
+                        return
 
-                # Classify command (same as main.py)
-                command_type = classify_command(message, self)
-                if command_type is None:  # Waiting for follow-up
-                    return
+                    # Classify command (same as main.py)
+                    with span("classify") as timed:
+                        command_type = classify_command(message, self)
+                        timed.label = command_type
+                    if command_type is None:  # Waiting for follow-up
+                        return
 
-            # Create request (same as main.py)
-            self.user.preferences["raw_input"] = message
-            request = Request(input_str=message, timestamp=datetime.now(), command_type=command_type)
+                # Charge the request now that its type (and so its cost) is known
+                if not self.quota.consume(*quota_key(self.user), command_type).allowed:
+                    self.call_in_ui(self.handle_response, "", LIMIT_MESSAGE, False)
+                    return
+                self.call_in_ui(self.update_requests_label)
+                turn.label = command_type
 
-            # Temporarily replace input/print for assistant execution
-            import builtins
-            original_input = builtins.input
-            original_print = builtins.print
-            builtins.input = self.gui_input
-            builtins.print = self.gui_print
+                # Create request (same as main.py)
+                self.user.preferences["raw_input"] = message
+                request = Request(input_str=message, timestamp=datetime.now(), command_type=command_type)
 
-            try:
                 # Select correct assistant or use Gemini API for general questions
                 if command_type == CommandType.GENERAL:
-                    # Use Gemini API for general questions
-                    greeting = ""
-                    gemini_response = call_gemini_api(message)
-                    self.root.after(0, self.handle_response_with_continue, greeting, gemini_response, True)
+                    self.answer_general(message)
                 else:
-                    # Use existing assistants for specific domains
-                    if command_type == CommandType.MUSIC:
-                        assistant = MusicAssistant(self.user)
-                    elif command_type == CommandType.FITNESS:
-                        assistant = FitnessAssistant(self.user)
-                    elif command_type == CommandType.STUDY:
-                        assistant = StudyAssistant(self.user)
-                    elif command_type == CommandType.BOOK:
-                        assistant = BookAssistant(self.user)
-                    elif command_type == CommandType.PSYCHOLOGY:
-                        assistant = PsychologyAssistant(self.user)
-                    else:
-                        assistant = AIAssistant(self.user)
+                    # Use existing assistants for specific domains; they talk through the chat window
+                    with span("select_assistant", command_type):
+                        assistant = self.assistants.get(command_type)
 
                     # Get greeting and response - same as main.py
                     greeting = assistant.greetUser()
-                    response = assistant.handleRequest(request)
+                    with span("handle_request", command_type):
+                        response = assistant.handleRequest(request)
 
                     # Ask to continue - same as main.py
-                    self.root.after(0, self.handle_response_with_continue, greeting, response.message, True)
+                    self.call_in_ui(self.handle_response_with_continue, greeting, response.message, True)
 
-            finally:
-                # Restore original input/print
-                builtins.input = original_input
-                builtins.print = original_print
+            except Exception as e:
+                self.call_in_ui(self.handle_error, str(e))
 
+    def answer_general(self, message):
+        """Answer a GENERAL question from Gemini. Runs on the worker thread."""
+        try:
+            # Imported here: requests is slow to load
+            from source_code.gemini_api import call_gemini_api, stream_gemini_api
+            greeting = ""
+            if self.stream_responses:
+                # Show the answer piece by piece as Gemini writes it
+                self.begin_streamed_response(greeting)
+                stream_gemini_api(message, self.append_streamed_chunk)
+                self.call_in_ui(self.finish_streamed_response)
+            else:
+                gemini_response = call_gemini_api(message)
+                self.call_in_ui(self.handle_response_with_continue, greeting, gemini_response, True)
         except Exception as e:
-            self.root.after(0, self.handle_error, str(e))
+            self.call_in_ui(self.handle_error, str(e))
 
     def handle_response_with_continue(self, greeting, response, success):
         if success:
@@ -565,9 +571,6 @@ class ChatGUI:
             # Ask to continue - same as main.py
             self.add_message("AI Assistant", "🔁 Is there anything else I can help you with? (yes/no):", "assistant")
             self.waiting_for_continue = True
-
-            # Update request counter only after user chooses to continue (like main.py)
-            # This will be done in send_message when user responds
         else:
             self.add_message("System", response, "system")
 
@@ -576,6 +579,29 @@ class ChatGUI:
         self.send_button.config(state=tk.NORMAL)
         self.input_entry.focus()
 
+    def begin_streamed_response(self, greeting):
+        self.add_message("AI Assistant", f"💡 {greeting}", "greeting")
+
+        # Open the response line; chunks are appended to it until the stream ends
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.ui_updates.put([(f"[{timestamp}] ", "timestamp"), ("AI Assistant: 🤖 ", "response")])
+
+    def append_streamed_chunk(self, chunk):
+        # Chunks that arrive between two drains go in with a single insert
+        self.ui_updates.put([(chunk, "response")])
+
+    def finish_streamed_response(self):
+        self.ui_updates.put([("\n\n", "response")])
+
+        # Ask to continue - same as main.py
+        self.add_message("AI Assistant", "🔁 Is there anything else I can help you with? (yes/no):", "assistant")
+        self.waiting_for_continue = True
+
+        # Re-enable input
+        self.input_entry.config(state=tk.NORMAL)
+        self.send_button.config(state=tk.NORMAL)
+        self.input_entry.focus()
+
     def handle_response(self, greeting, response, success):
         if success:
             # Add greeting
@@ -603,12 +629,22 @@ class ChatGUI:
         self.send_button.config(state=tk.NORMAL)
         self.input_entry.focus()
 
+def warm_up_gemini():
+    from source_code.gemini_api import get_api_key
+    from source_code.gemini_client import get_default_client
+    get_default_client(get_api_key()).warm_up()
+
 def main():
+    # Load requests and open connections to Gemini while the user fills in the welcome dialog
+    threading.Thread(target=warm_up_gemini, daemon=True).start()
+
     root = tk.Tk()
     ChatGUI(root)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
+    # TRACE_PROFILE / TRACE_EXPORT: profile the session, dump the stage histograms (see tracing.py)
+    with traced_session():
+        main()
 
 
@@ -0,0 +1,85 @@
+"""Resumable, serializable conversations.
+
+A Conversation is an assistant's handleRequest written as a state machine:
+instead of blocking on input(), every question is returned as a Step and the
+conversation waits, holding nothing but `self.state`, until `resume(reply)`
+is called with the answer. The state is a plain JSON-friendly dict, so a
+session waiting on a human can be parked (to_dict) and picked up again by
+any worker (see main.restore_conversation).
+
+`run()` drives a conversation to the end over an IOChannel, which is how the
+console, GUI and headless front ends still use them as ordinary blocking calls.
+"""
+from typing import List, NamedTuple, Optional, Tuple
+from source_code.models import Request, Response
+
+
+class Step(NamedTuple):
+    messages: Tuple[str, ...]      # lines to show, in order, before the prompt
+    prompt: Optional[str]          # what to ask next; None once finished
+    response: Optional[Response]   # the final answer, once finished
+
+    @property
+    def done(self) -> bool:
+        return self.response is not None
+
+
+class Conversation:
+    """Default conversation: answers in one step with the assistant's handleRequest.
+
+    Subclasses override begin() and add one `step_<name>(reply)` method per
+    question; `self.state["step"]` names the method that takes the next reply.
+    """
+
+    def __init__(self, assistant, state: Optional[dict] = None):
+        self.assistant = assistant
+        self.state = state if state is not None else {}
+        self._outbox: List[str] = []
+
+    @property
+    def user(self):
+        return self.assistant.user
+
+    def start(self, request: Request) -> Step:
+        self.state["command_type"] = request.command_type.value
+        self.state["input"] = request.input_str
+        return self.begin(request)
+
+    def resume(self, reply: str) -> Step:
+        step = self.state.get("step")
+        if step is None:
+            raise RuntimeError("This conversation is not waiting for a reply")
+        return getattr(self, f"step_{step}")(reply)
+
+    def begin(self, request: Request) -> Step:
+        return self.finish(self.assistant.handleRequest(request))
+
+    # Helpers for subclasses
+
+    def say(self, message: str):
+        self._outbox.append(message)
+
+    def ask(self, prompt: str, step: str) -> Step:
+        self.state["step"] = step
+        messages, self._outbox = tuple(self._outbox), []
+        return Step(messages, prompt, None)
+
+    def finish(self, response: Response) -> Step:
+        self.state.pop("step", None)
+        messages, self._outbox = tuple(self._outbox), []
+        return Step(messages, None, response)
+
+    # Driving and parking
+
+    def run(self, request: Request, io) -> Response:
+        """Play the whole conversation over an IOChannel and return the final response."""
+        step = self.start(request)
+        while True:
+            for message in step.messages:
+                io.say(message)
+            if step.done:
+                return step.response
+            step = self.resume(io.ask(step.prompt))
+
+    def to_dict(self) -> dict:
+        return dict(self.state)
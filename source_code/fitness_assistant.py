@@ -1,97 +1,82 @@
 from source_code.base_assistant import AIAssistant
+from typing import Optional
 from source_code.models import Request, Response
+from source_code.conversation import Conversation, Step
+from source_code.catalogs import MUSCLE_CATALOG
+from source_code.workout_planner import DEFAULT_LEVEL, LEVELS, resolve_goal, schedule_text
 
 class FitnessAssistant(AIAssistant):
     def greetUser(self) -> str:
         return f"💪 Hey {self.user.name}, let’s build some muscle and confidence together!"
 
     def handleRequest(self, request: Request) -> Response:
-        input_text = request.input_str.lower()
+        return self.startConversation().run(request, self.io)
 
-        # Step 1: Ask what muscle group to target
-        muscle_groups = {
-            "chest": "Chest Sculpting Routine",
-            "triceps": "Triceps Toner Program",
-            "shoulder": "Shoulder Definition Circuit",
-            "legs": "Leg Power Workout",
-            "glutes": "Glute Builder Plan",
-            "forearms": "Forearm Strength Set",
-            "abs": "Core Crusher Circuit",
-            "back": "Back Strength Workout",
-            "biceps": "Bicep Blast Session"
-        }
+    def startConversation(self, state: Optional[dict] = None) -> Conversation:
+        return FitnessConversation(self, state)
 
-        while "muscle" not in self.user.preferences:
-            print("💭 What muscle group would you like to build? (e.g., chest, legs, glutes, abs, forearms, biceps,...)")
-            selected = input("Your answer: ").lower()
+    def generateSchedule(self, goal: str, days: int) -> str:
+        # Built for the chosen muscle and level; identical requests come from the planner's cache
+        muscle = self.user.preferences.get("muscle")
+        level = self.user.preferences.get("level")
+        return schedule_text(resolve_goal(goal), days, muscle, level if level in LEVELS else DEFAULT_LEVEL)
 
-            for muscle, plan in muscle_groups.items():
-                if muscle in selected:
-                    self.user.preferences["muscle"] = muscle
-                    self.user.preferences["plan"] = plan
-                    print(f"✅ Got it! Here's your recommended workout: '{plan}' 💪")
-                    break
-            else:
-                print("❌ Sorry, I didn’t recognize that muscle group. Please try again.\n")
+class FitnessConversation(Conversation):
+    def begin(self, request: Request) -> Step:
+        return self.ask_muscle()
 
-        # Step 2: Ask if they want a schedule
-        print("🗓️ Would you like a personal workout schedule to match your goals? (yes/no)")
-        wants_schedule = input("Your answer: ").strip().lower()
+    # Step 1: Ask what muscle group to target
+    def ask_muscle(self) -> Step:
+        if "muscle" not in self.user.preferences:
+            self.say("💭 What muscle group would you like to build? (e.g., chest, legs, glutes, abs, forearms, biceps,...)")
+            return self.ask("Your answer: ", "muscle")
+        return self.ask_schedule()
 
-        if wants_schedule not in ["yes", "y"]:
-            return self.generateResponse("No worries! Happy exercising! 💪 Let me know if you need anything else.")
+    def step_muscle(self, reply: str) -> Step:
+        match = MUSCLE_CATALOG.match(reply.lower())
+        if match:
+            self.user.preferences["muscle"] = match.keyword
+            self.user.preferences["plan"] = match.value
+            self.say(f"✅ Got it! Here's your recommended workout: '{match.value}' 💪")
+        else:
+            self.say("❌ Sorry, I didn’t recognize that muscle group. Please try again.\n")
+        return self.ask_muscle()
 
-        # Step 3: Ask long-term goal
-        print("🎯 What is your long-term fitness goal? (e.g., lose weight, tone body, build muscle)")
-        goal = input("Your answer: ").strip().lower()
-        self.user.preferences["goal"] = goal
+    # Step 2: Ask if they want a schedule
+    def ask_schedule(self) -> Step:
+        self.say("🗓️ Would you like a personal workout schedule to match your goals? (yes/no)")
+        return self.ask("Your answer: ", "wants_schedule")
 
-        # Step 4: Ask days/week (loop until valid)
-        while True:
-            print("📆 How many days per week can you work out? (1–7)")
-            try:
-                days = int(input("Your answer: ").strip())
-                if 1 <= days <= 7:
-                    break
-                else:
-                    print("❌ Please enter a number between 1 and 7.\n")
-            except ValueError:
-                print("❌ That wasn't a valid number. Try again with a number between 1 and 7.\n")
+    def step_wants_schedule(self, reply: str) -> Step:
+        if reply.strip().lower() not in ["yes", "y"]:
+            return self.finish(self.assistant.generateResponse("No worries! Happy exercising! 💪 Let me know if you need anything else."))
 
-        # Step 5: Generate hardcoded schedule
-        schedule = self.generateSchedule(goal, days)
-        return self.generateResponse(f"✅ Based on your goal '{goal}' and availability of {days} days/week, here's your custom schedule:\n\n{schedule}")
+        # Step 3: Ask long-term goal
+        self.say("🎯 What is your long-term fitness goal? (e.g., lose weight, tone body, build muscle)")
+        return self.ask("Your answer: ", "goal")
 
-    def generateSchedule(self, goal: str, days: int) -> str:
-        plans = {
-            "lose weight": {
-                1: "1x/week: Full-body HIIT + 30-min walk",
-                3: "Mon/Wed/Fri: Cardio + Bodyweight Circuits",
-                5: "Mon–Fri: Cardio + Strength Intervals",
-                7: "Daily: HIIT (3x) + LISS Cardio (4x)"
-            },
-            "tone body": {
-                1: "1x/week: Pilates + light resistance",
-                3: "Mon/Wed/Fri: Resistance Band Training",
-                5: "Mon–Fri: Alternating upper/lower splits",
-                7: "Daily: Short full-body tone + stretching"
-            },
-            "build muscle": {
-                1: "1x/week: Full-body Strength Circuit",
-                3: "Mon/Wed/Fri: Push, Pull, Legs split",
-                5: "5-day Muscle Split (Chest, Back, Legs, Shoulders, Arms)",
-                7: "Bodybuilding-style training w/ active recovery"
-            }
-        }
+    def step_goal(self, reply: str) -> Step:
+        goal = reply.strip().lower()
+        self.state["goal"] = goal
+        self.user.preferences["goal"] = goal
+        return self.ask_days()
 
-        match = plans.get(goal, plans["build muscle"])
-        # Return closest plan available
-        if days >= 7:
-            return match.get(7)
-        elif days >= 5:
-            return match.get(5)
-        elif days >= 3:
-            return match.get(3)
-        else:
-            return match.get(1)
+    # Step 4: Ask days/week (loop until valid)
+    def ask_days(self) -> Step:
+        self.say("📆 How many days per week can you work out? (1–7)")
+        return self.ask("Your answer: ", "days")
 
+    def step_days(self, reply: str) -> Step:
+        try:
+            days = int(reply.strip())
+        except ValueError:
+            self.say("❌ That wasn't a valid number. Try again with a number between 1 and 7.\n")
+            return self.ask_days()
+        if not 1 <= days <= 7:
+            self.say("❌ Please enter a number between 1 and 7.\n")
+            return self.ask_days()
+
+        # Step 5: Generate hardcoded schedule
+        goal = self.state["goal"]
+        schedule = self.assistant.generateSchedule(goal, days)
+        return self.finish(self.assistant.generateResponse(f"✅ Based on your goal '{goal}' and availability of {days} days/week, here's your custom schedule:\n\n{schedule}"))
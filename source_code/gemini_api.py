@@ -0,0 +1,158 @@
+"""Gemini calls for GENERAL questions, shared by the GUI, console and headless paths.
+
+Try it from a terminal (answers are printed as they stream in):
+    PYTHONPATH=. python source_code/gemini_api.py "tell me a joke"
+"""
+import os
+import sys
+from typing import Callable, Optional, Union
+
+from source_code.gemini_client import GeminiClient, GeminiConnectionError, GeminiError, GeminiTimeout
+from source_code.resilience import FALLBACK_ANSWER, CircuitOpenError, ResilientClient, get_resilient_client
+from source_code.response_cache import ResponseCache, get_default_cache
+from source_code.single_flight import get_default_flight
+from source_code.tracing import span
+
+
+def get_api_key(api_key=None):
+    # Try to get API key from environment variable or use default
+    if api_key is None:
+        api_key = os.getenv('GEMINI_API_KEY', 'your-Gemini-API') # Please use your Gemini API's key here
+    return api_key
+
+
+def error_message(error: Exception) -> str:
+    """The apology shown to the user for a failed Gemini call."""
+    if isinstance(error, CircuitOpenError):
+        # Gemini has been failing: answer locally instead of trying again
+        return FALLBACK_ANSWER
+    if isinstance(error, GeminiTimeout):
+        return "Sorry, the request timed out. Please try again."
+    if isinstance(error, GeminiConnectionError):
+        return "Sorry, there was a network error. Please check your connection."
+    if isinstance(error, GeminiError):
+        if error.message:
+            return f"API Error: {error.message}"
+        return "Sorry, there was an error connecting to the AI service."
+    return "Sorry, there was an unexpected error. Please try again."
+
+
+def call_gemini_api(question, api_key=None):
+    """Call Gemini API for general questions"""
+    with span("gemini", "GENERAL") as timed:
+        try:
+            api_key = get_api_key(api_key)
+            if api_key == 'YOUR_GEMINI_API_KEY':
+                return "Please set your GEMINI_API_KEY environment variable to use AI responses for general questions."
+
+            # Repeated questions are answered from the cache without calling Gemini
+            client = get_resilient_client(api_key)
+            cache = get_default_cache()
+            answer = cache.get(question, client.model)
+            if answer is not None:
+                timed.stage = "gemini_cached"
+                return answer
+
+            def fetch():
+                # Shared pooled client: keeps connections warm, retries and fails fast when Gemini is down
+                answer = client.generate(question)
+                # Errors are raised above, so only real answers reach the cache
+                if answer is not None:
+                    cache.put(question, client.model, answer)
+                return answer
+
+            # Users asking the same thing at the same moment share one call
+            answer = get_default_flight().do(ResponseCache.key(question, client.model), fetch)
+            if answer is None:
+                return "Sorry, I couldn't generate a response."
+            return answer
+
+        except Exception as e:
+            return error_message(e)
+
+
+async def acall_gemini_api(question, client: Optional[Union[GeminiClient, ResilientClient]] = None):
+    """Asyncio form of call_gemini_api for the server; `client` defaults to the shared one."""
+    with span("gemini", "GENERAL") as timed:
+        try:
+            client = client or get_resilient_client(get_api_key())
+            cache = get_default_cache()
+            answer = cache.get(question, client.model)
+            if answer is not None:
+                timed.stage = "gemini_cached"
+                return answer
+
+            answer = await client.agenerate(question)
+            if answer is None:
+                return "Sorry, I couldn't generate a response."
+            cache.put(question, client.model, answer)
+            return answer
+
+        except Exception as e:
+            return error_message(e)
+
+
+def stream_gemini_api(question, on_chunk: Callable[[str], None], api_key=None) -> str:
+    """Like call_gemini_api, but hands each piece of the answer to `on_chunk` as it arrives.
+
+    Returns the full text that was shown. If the stream fails part-way, the
+    apology is passed to `on_chunk` after whatever already arrived. A question
+    already being answered for someone else waits for that call and is shown
+    in one piece.
+    """
+    shown = []
+
+    def emit(text):
+        shown.append(text)
+        on_chunk(text)
+
+    with span("gemini", "GENERAL") as timed:
+        try:
+            api_key = get_api_key(api_key)
+            if api_key == 'YOUR_GEMINI_API_KEY':
+                emit("Please set your GEMINI_API_KEY environment variable to use AI responses for general questions.")
+                return "".join(shown)
+
+            client = get_resilient_client(api_key)
+            cache = get_default_cache()
+            answer = cache.get(question, client.model)
+            if answer is not None:
+                timed.stage = "gemini_cached"
+                emit(answer)
+                return answer
+
+            received = []
+
+            def fetch():
+                for chunk in client.stream(question):
+                    # Leading whitespace of the first chunk would show up as an indent
+                    if not received:
+                        chunk = chunk.lstrip()
+                    received.append(chunk)
+                    emit(chunk)
+                answer = "".join(received).strip()
+                if answer:
+                    cache.put(question, client.model, answer)
+                return answer
+
+            answer = get_default_flight().do(ResponseCache.key(question, client.model), fetch)
+            if not answer:
+                emit("Sorry, I couldn't generate a response.")
+            elif not received:
+                # Someone else's call answered it
+                emit(answer)
+
+        except Exception as e:
+            emit(("\n" if shown else "") + error_message(e))
+
+        return "".join(shown)
+
+
+def main(argv=None):
+    question = " ".join(argv if argv is not None else sys.argv[1:]) or input("💬 Ask me anything: ")
+    stream_gemini_api(question, lambda chunk: print(chunk, end="", flush=True))
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Pooled, keep-alive client for the Gemini generateContent API.
+
+One GeminiClient owns a requests.Session whose connection pool is sized to the
+concurrency limit, so GENERAL questions reuse warm TCP/TLS connections instead
+of paying a fresh handshake each time. Calls run on a bounded thread pool:
+`generate()` is the blocking form used by the GUI and console, `agenerate()` is
+the asyncio form for servers. Both take a per-request deadline in seconds.
+`stream()` uses streamGenerateContent and yields text chunks as they arrive.
+
+Point GEMINI_BASE_URL at a local stand-in (see gemini_stub.py) to test offline.
+"""
+import asyncio
+import concurrent.futures
+import json
+import os
+import threading
+import time
+from typing import Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+
+class GeminiError(Exception):
+    """The API answered with an error, or the call could not be completed."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class GeminiTimeout(GeminiError):
+    """The request did not finish before its deadline."""
+
+
+class GeminiConnectionError(GeminiError):
+    """The request never got an HTTP answer (DNS, refused, reset, ...)."""
+
+
+def iter_sse_text(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the text chunks of a streamGenerateContent server-sent-event stream.
+
+    Works on any iterable of decoded lines (an HTTP response, a file, a list), so
+    the console, GUI and headless paths can share it.
+    """
+    for line in lines:
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if not data or data == "[DONE]":
+            continue
+        chunk = json.loads(data)
+        if "error" in chunk:
+            raise GeminiError(chunk["error"].get("message", ""), status=chunk["error"].get("code"))
+        text = GeminiClient.extract_text(chunk)
+        if text:
+            yield text
+
+
+class GeminiClient:
+    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_MODEL,
+                 base_url: Optional[str] = None, max_concurrency: int = 8, timeout: float = 30.0):
+        self.api_key = api_key if api_key is not None else os.getenv("GEMINI_API_KEY", "")
+        self.model = model
+        self.base_url = (base_url or os.getenv("GEMINI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+        # One keep-alive connection per worker thread, never more
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json", "X-goog-api-key": self.api_key})
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gemini")
+        self._closed = False
+
+    def url(self, method: str = "generateContent") -> str:
+        return f"{self.base_url}/models/{self.model}:{method}"
+
+    @staticmethod
+    def payload(question: str) -> dict:
+        return {"contents": [{"parts": [{"text": question}]}]}
+
+    @staticmethod
+    def extract_text(result: dict) -> Optional[str]:
+        """Pull the first candidate's text out of a generateContent body, or None if it has none."""
+        candidates = result.get("candidates") or []
+        if candidates:
+            parts = candidates[0].get("content", {}).get("parts") or []
+            if parts and "text" in parts[0]:
+                return parts[0]["text"]
+        return None
+
+    def _post(self, question: str, timeout: float) -> Optional[str]:
+        try:
+            response = self.session.post(self.url(), json=self.payload(question), timeout=timeout)
+        except requests.exceptions.Timeout:
+            raise GeminiTimeout("Request timed out") from None
+        except requests.exceptions.RequestException as e:
+            raise GeminiConnectionError(str(e)) from None
+
+        if response.status_code != 200:
+            try:
+                message = response.json()["error"]["message"]
+            except (ValueError, KeyError, TypeError):
+                message = ""
+            raise GeminiError(message, status=response.status_code)
+
+        text = self.extract_text(response.json())
+        return text.strip() if text is not None else None
+
+    def stream(self, question: str, deadline: Optional[float] = None) -> Iterator[str]:
+        """Yield answer chunks as Gemini produces them. Runs in the caller's thread.
+
+        The pool still caps open connections at max_concurrency: extra streams wait
+        for a free connection.
+        """
+        deadline = deadline or self.timeout
+        expires = time.monotonic() + deadline
+        try:
+            response = self.session.post(self.url("streamGenerateContent"), params={"alt": "sse"},
+                                         json=self.payload(question), timeout=deadline, stream=True)
+        except requests.exceptions.Timeout:
+            raise GeminiTimeout("Request timed out") from None
+        except requests.exceptions.RequestException as e:
+            raise GeminiConnectionError(str(e)) from None
+
+        with response:
+            if response.status_code != 200:
+                try:
+                    message = response.json()["error"]["message"]
+                except (ValueError, KeyError, TypeError):
+                    message = ""
+                raise GeminiError(message, status=response.status_code)
+
+            # text/event-stream has no charset, and requests would assume Latin-1
+            response.encoding = "utf-8"
+            try:
+                for text in iter_sse_text(response.iter_lines(decode_unicode=True)):
+                    yield text
+                    if time.monotonic() > expires:
+                        raise GeminiTimeout("Request timed out")
+            except requests.exceptions.Timeout:
+                raise GeminiTimeout("Request timed out") from None
+            except requests.exceptions.RequestException as e:
+                raise GeminiConnectionError(str(e)) from None
+
+    def submit(self, question: str, deadline: float) -> concurrent.futures.Future:
+        """Queue one request on the client's pool; the future gives the answer text."""
+        if self._closed:
+            raise GeminiError("Client is closed")
+        return self._executor.submit(self._post, question, deadline)
+
+    def generate(self, question: str, deadline: Optional[float] = None) -> Optional[str]:
+        """Blocking call. Returns the answer text, or None when the model gave no candidates."""
+        deadline = deadline or self.timeout
+        future = self.submit(question, deadline)
+        try:
+            # The deadline covers time spent queued behind the concurrency limit too
+            return future.result(timeout=deadline)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise GeminiTimeout("Request timed out") from None
+
+    async def agenerate(self, question: str, deadline: Optional[float] = None) -> Optional[str]:
+        """Asyncio form of generate(); the event loop never blocks on the network."""
+        deadline = deadline or self.timeout
+        future = asyncio.wrap_future(self.submit(question, deadline))
+        try:
+            return await asyncio.wait_for(future, timeout=deadline)
+        except asyncio.TimeoutError:
+            raise GeminiTimeout("Request timed out") from None
+
+    def warm_up(self, connections: Optional[int] = None, timeout: float = 5.0) -> int:
+        """Open up to `connections` pooled connections ahead of the first real request.
+
+        Returns how many connections were opened. Failures are ignored: warm-up is
+        only an optimization and the real request will report any problem.
+        """
+        connections = min(connections or self.max_concurrency, self.max_concurrency)
+        # Hold every worker at the barrier so each HEAD gets its own connection
+        barrier = threading.Barrier(connections)
+
+        def open_connection():
+            try:
+                barrier.wait(timeout)
+                self.session.head(self.base_url, timeout=timeout)
+                return True
+            except (requests.exceptions.RequestException, threading.BrokenBarrierError):
+                return False
+
+        futures = [self._executor.submit(open_connection) for _ in range(connections)]
+        return sum(1 for future in futures if future.result())
+
+    def close(self):
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_clients = {}
+_default_lock = threading.Lock()
+
+
+def get_default_client(api_key: Optional[str] = None) -> GeminiClient:
+    """Process-wide client per API key, configured from the environment and created on first use."""
+    api_key = api_key if api_key is not None else os.getenv("GEMINI_API_KEY", "")
+    with _default_lock:
+        client = _default_clients.get(api_key)
+        if client is None:
+            client = GeminiClient(
+                api_key=api_key,
+                max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+                timeout=float(os.getenv("GEMINI_TIMEOUT", "30")),
+            )
+            _default_clients[api_key] = client
+        return client
@@ -0,0 +1,178 @@
+"""Local stand-in for the Gemini API, for offline testing and load runs.
+
+Answers POST /v1beta/models/<model>:generateContent with a canned candidate
+that echoes the question, after an optional artificial latency, and
+:streamGenerateContent?alt=sse with the same answer split into word chunks
+sent as server-sent events. Connections
+are kept alive (HTTP/1.1), so the pooled client's reuse can be observed via
+`connections_opened`.
+
+Faults can be injected to exercise retries, hedging and the circuit breaker
+(see resilience.py): --fail-rate answers that share of requests with
+--fail-status, --slow-rate delays that share by --slow-latency more.
+
+Usage:
+    PYTHONPATH=. python source_code/gemini_stub.py --port 8089 --latency 0.05
+    PYTHONPATH=. python source_code/gemini_stub.py --fail-rate 0.3 --slow-rate 0.05 --slow-latency 2
+    GEMINI_BASE_URL=http://127.0.0.1:8089/v1beta PYTHONPATH=. python source_code/chat_gui.py
+"""
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; don't let Nagle hold the body back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections_opened += 1
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.requests_served += 1
+
+        method = self.path.split("?", 1)[0].rsplit(":", 1)[-1]
+        if method not in ("generateContent", "streamGenerateContent"):
+            self.send_json(404, {"error": {"code": 404, "message": f"Unknown method {self.path}"}})
+            return
+
+        try:
+            question = body["contents"][0]["parts"][0]["text"]
+        except (KeyError, IndexError, TypeError):
+            self.send_json(400, {"error": {"code": 400, "message": "Invalid request payload"}})
+            return
+
+        fault = self.server.roll_fault()
+        if fault == "fail":
+            status = self.server.fail_status
+            self.send_json(status, {"error": {"code": status, "message": "Injected fault"}})
+            return
+        if fault == "slow":
+            time.sleep(self.server.slow_latency)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        answer = f"(stub) You asked: {question}"
+        if method == "streamGenerateContent":
+            self.send_stream(answer)
+        else:
+            self.send_json(200, {"candidates": [{"content": {"parts": [{"text": answer}]}}]})
+
+    def send_stream(self, answer: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            text = word if i == len(words) - 1 else word + " "
+            event = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+            data = f"data: {event}\r\n\r\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+            if self.server.chunk_latency:
+                time.sleep(self.server.chunk_latency)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class GeminiStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency: float = 0.0, chunk_latency: float = 0.0,
+                 fail_rate: float = 0.0, fail_status: int = 503, slow_rate: float = 0.0,
+                 slow_latency: float = 1.0, seed: Optional[int] = None):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        # Fault injection; the rates may be changed while serving
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests_served = 0
+        self.faults_injected = 0
+
+    def roll_fault(self) -> Optional[str]:
+        """"fail", "slow" or None for the next request."""
+        with self.lock:
+            roll = self.rng.random()
+            if roll < self.fail_rate:
+                fault = "fail"
+            elif roll < self.fail_rate + self.slow_rate:
+                fault = "slow"
+            else:
+                return None
+            self.faults_injected += 1
+            return fault
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1beta"
+
+    def start(self) -> "GeminiStubServer":
+        """Serve from a background thread; returns self for chaining."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Gemini API stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each answer")
+    parser.add_argument("--chunk-latency", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with an error")
+    parser.add_argument("--fail-status", type=int, default=503, help="HTTP status of injected errors")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="extra seconds for slow requests")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible faults")
+    args = parser.parse_args(argv)
+
+    server = GeminiStubServer((args.host, args.port), latency=args.latency, chunk_latency=args.chunk_latency,
+                              fail_rate=args.fail_rate, fail_status=args.fail_status, slow_rate=args.slow_rate,
+                              slow_latency=args.slow_latency, seed=args.seed)
+    print(f"Gemini stand-in listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
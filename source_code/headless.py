@@ -0,0 +1,153 @@
+"""Headless batch/replay runner for the assistant pipeline.
+
+Reads sessions as JSONL, one per line:
+
+    {"id": "s1", "user": {"name": "Lien", "age": 20, "isPremium": false},
+     "turns": [{"input": "I want to build muscle", "answers": ["legs", "no"]},
+               "Play me something romantic"]}
+
+Each turn is routed through classify_command and the assistant classes exactly
+like the console loop in main.py. "answers" are fed, in order, to every prompt
+the pipeline asks during that turn (follow-up questions, schedules, ...).
+One Response record per turn is streamed out as JSONL.
+
+Usage:
+    PYTHONPATH=. python source_code/headless.py sessions.jsonl -o responses.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, TextIO
+
+from source_code.main import LIMIT_MESSAGE, classify_command
+from source_code.assistant_registry import create_assistant
+from source_code.models import UserProfile, Request
+from source_code.io_channel import ScriptedChannel
+from source_code.quota import QuotaEngine
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def load_user(data: dict) -> UserProfile:
+    return UserProfile(
+        name=data["name"],
+        age=int(data["age"]),
+        preferences=dict(data.get("preferences", {})),
+        isPremium=bool(data.get("isPremium", False)),
+    )
+
+
+def run_turn(user: UserProfile, text: str, answers: Iterable[str],
+             quota: Optional[QuotaEngine] = None, quota_key=None, identity: Optional[str] = None) -> dict:
+    """Run one request through classification and the selected assistant.
+
+    With a quota, the request is charged once its CommandType is known and
+    QuotaExceeded is raised when it doesn't fit.
+    """
+    io = ScriptedChannel(answers)
+    record = {"input": text}
+
+    try:
+        command_type = classify_command(text, io)
+        if quota is not None and not quota.consume(*quota_key, command_type).allowed:
+            raise QuotaExceeded(LIMIT_MESSAGE)
+        user.preferences["raw_input"] = text
+        request = Request(input_str=text, timestamp=datetime.now(), command_type=command_type)
+        # Every turn replays its own answers, so it gets its own assistant and channel
+        assistant = create_assistant(command_type, user, io, identity)
+        record["command_type"] = command_type.value
+        record["greeting"] = assistant.greetUser()
+        response = assistant.handleRequest(request)
+        record.update(message=response.message, confidence=response.confidence, actionPerformed=response.actionPerformed)
+    except QuotaExceeded:
+        raise
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    record["transcript"] = io.transcript
+    return record
+
+
+def run_session(session: dict, session_id, quota: Optional[QuotaEngine] = None) -> Iterator[dict]:
+    user = load_user(session["user"])
+    # Each replayed session gets its own bucket, so runs don't depend on earlier sessions
+    quota = quota or QuotaEngine()
+    key = (f"session {session_id}", "premium" if user.isPremium else "free")
+
+    for turn_number, turn in enumerate(session.get("turns", [])):
+        if isinstance(turn, str):
+            turn = {"input": turn}
+
+        limited = {"session": session_id, "turn": turn_number, "input": turn["input"], "error": LIMIT_MESSAGE}
+        if quota.exhausted(*key):
+            yield limited
+            return
+        try:
+            record = run_turn(user, turn["input"], turn.get("answers", []), quota, key, identity=key[0])
+        except QuotaExceeded:
+            # Too expensive for what is left; a cheaper request may still fit
+            yield limited
+            continue
+        yield {"session": session_id, "turn": turn_number, **record}
+
+
+def run_batch(lines: Iterable[str], out: TextIO, keep_transcript: bool = True) -> dict:
+    """Replay every session in `lines`, streaming records to `out`. Returns run statistics."""
+    stats = {"sessions": 0, "turns": 0, "errors": 0}
+    quota = QuotaEngine()   # in memory: replays never touch the shared quota store
+    start = time.perf_counter()
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        session = json.loads(line)
+        stats["sessions"] += 1
+        for record in run_session(session, session.get("id", line_number), quota):
+            stats["turns"] += 1
+            if "error" in record:
+                stats["errors"] += 1
+            if not keep_transcript:
+                record.pop("transcript", None)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["requests_per_second"] = stats["turns"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay JSONL sessions through the assistant pipeline without input().")
+    parser.add_argument("sessions", help="JSONL file of sessions, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="where to write Response records (default: stdout)")
+    parser.add_argument("--seed", type=int, default=None, help="seed random replies for reproducible runs")
+    parser.add_argument("--no-transcript", action="store_true", help="leave prompts and printed lines out of the records")
+    args = parser.parse_args(argv)
+    # Replays keep study cards and intake logs in memory unless told where to store them
+    os.environ.setdefault("SRS_PATH", "")
+    os.environ.setdefault("NUTRITION_LOGS", "")
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    source = sys.stdin if args.sessions == "-" else open(args.sessions, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run_batch(source, out, keep_transcript=not args.no_transcript)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"{stats['sessions']} sessions, {stats['turns']} turns, {stats['errors']} errors "
+          f"in {stats['seconds']:.2f}s ({stats['requests_per_second']:.0f} requests/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Hashed bag-of-words intent model: routes whole batches of utterances at once.
+
+Substring keywords mis-route easily ("already" contains "read", so it went to
+BOOK). The model works on whole words and word pairs instead, hashed into a
+fixed number of columns, and is a multinomial naive Bayes trained from the
+router's own keyword tables plus the labelled EXAMPLES below.
+
+Scoring a batch is one sparse product X @ W: X holds each utterance's feature
+counts and W the per-CommandType log-likelihoods. X's non-zeros come row by
+row, so the product is one np.add.reduceat over the matching rows of W, and
+no SciPy is needed. The confidence is the softmax over the CommandTypes.
+When the model is unsure, the keyword table decides, as it did before, but a
+keyword has to start a word.
+
+Live turns are routed by the keyword table (intent_router.route_intent); the
+model is for logs. Route a log file offline (one utterance per line, one
+CommandType per line out; the file is read BATCH_SIZE lines at a time):
+    PYTHONPATH=. python source_code/intent_model.py transcripts.txt -o routes.txt
+"""
+import argparse
+import contextlib
+import itertools
+import math
+import re
+import sys
+import threading
+import zlib
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from source_code.intent_router import DEFAULT_CONFIDENCE, INTENT_TABLE, IntentRouter, Route
+from source_code.models import CommandType
+
+# Hash columns; the trained vocabulary is a few hundred features, so collisions are rare
+FEATURE_BITS = 14
+# Below this the keyword table decides instead
+MIN_CONFIDENCE = 0.6
+# Utterances scored per sparse product; bounds the temporary arrays
+BATCH_SIZE = 65536
+# A keyword counts as this many examples of its label
+KEYWORD_WEIGHT = 2.0
+
+WORD = re.compile(r"[a-z0-9']+")
+# Words too common to say anything about the request
+STOP_WORDS = frozenset("""
+    a an the i i'm im me my you your it its is am are was be been to of on in at for and or
+    some something any anything can could would please just so this that with about now
+    have want need like get let do did
+""".split())
+
+# Labelled utterances on top of the keyword tables. None is the "feelings"
+# label that makes the assistant ask: playlist or someone to talk to?
+EXAMPLES = (
+    (None, "i feel sad"), (None, "i feel so stressed about everything"), (None, "i'm feeling a bit down"),
+    (None, "feeling lonely tonight"), (None, "i feel weird"), (None, "i just feel tired of it all"),
+    (None, "can you listen"), (None, "i feel anxious and low"), (None, "not feeling great today"),
+    (CommandType.MUSIC, "play me something romantic"), (CommandType.MUSIC, "put on some music"),
+    (CommandType.MUSIC, "make me a playlist for the road"), (CommandType.MUSIC, "any songs like taylor swift"),
+    (CommandType.MUSIC, "i want to hear some jazz"), (CommandType.MUSIC, "recommend a song for my mood"),
+    (CommandType.MUSIC, "play some chill tunes"), (CommandType.MUSIC, "music for my workout"),
+    (CommandType.FITNESS, "i want to build muscle"), (CommandType.FITNESS, "give me a workout plan"),
+    (CommandType.FITNESS, "what should i do for leg day at the gym"), (CommandType.FITNESS, "help me lose weight"),
+    (CommandType.FITNESS, "how many push ups should i do"), (CommandType.FITNESS, "i want to get fit and stronger"),
+    (CommandType.FITNESS, "exercise routine for my arms"), (CommandType.FITNESS, "training schedule for running"),
+    (CommandType.NUTRITION, "i had two eggs and toast for breakfast"), (CommandType.NUTRITION, "how many calories in a banana"),
+    (CommandType.NUTRITION, "log my lunch chicken and rice"), (CommandType.NUTRITION, "am i eating too much sugar"),
+    (CommandType.NUTRITION, "track what i ate today"), (CommandType.NUTRITION, "i ate a burger and fries"),
+    (CommandType.NUTRITION, "what should i eat to get more protein"), (CommandType.NUTRITION, "help me with my diet"),
+    (CommandType.STUDY, "help me study for my math exam"), (CommandType.STUDY, "i have a test tomorrow"),
+    (CommandType.STUDY, "i need to review for finals"), (CommandType.STUDY, "explain recursion to me"),
+    (CommandType.STUDY, "help with my homework"), (CommandType.STUDY, "how do i prepare for an exam"),
+    (CommandType.STUDY, "tips to learn physics"), (CommandType.STUDY, "quiz me on history"),
+    (CommandType.BOOK, "recommend me a book to read"), (CommandType.BOOK, "any good mystery novel"),
+    (CommandType.BOOK, "i want a fantasy novel with dragons"), (CommandType.BOOK, "what should i read next"),
+    (CommandType.BOOK, "suggest a thriller book"), (CommandType.BOOK, "books like harry potter"),
+    (CommandType.BOOK, "a good romance story"), (CommandType.BOOK, "i love reading sci fi"),
+    (CommandType.PSYCHOLOGY, "i need someone to talk to"), (CommandType.PSYCHOLOGY, "i am stressed about work"),
+    (CommandType.PSYCHOLOGY, "how do i cope with anxiety"), (CommandType.PSYCHOLOGY, "i think i have burnout"),
+    (CommandType.PSYCHOLOGY, "why do people procrastinate"), (CommandType.PSYCHOLOGY, "i want to vent"),
+    (CommandType.PSYCHOLOGY, "i've been depressed lately"), (CommandType.PSYCHOLOGY, "talk to me about my mental health"),
+    (CommandType.GENERAL, "what's the capital of australia"), (CommandType.GENERAL, "tell me a joke"),
+    (CommandType.GENERAL, "how far away is the moon"), (CommandType.GENERAL, "what's the weather like tomorrow"),
+    (CommandType.GENERAL, "who won the world cup"), (CommandType.GENERAL, "what time is it in tokyo"),
+    (CommandType.GENERAL, "how do airplanes fly"), (CommandType.GENERAL, "translate hello into french"),
+    (CommandType.GENERAL, "i already did that"), (CommandType.GENERAL, "what is the meaning of life"),
+    (CommandType.GENERAL, "write me a short poem about the sea"), (CommandType.GENERAL, "how does a computer work"),
+)
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping, so "songs", "reading" and "workouts" meet their keywords."""
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 4 and word.endswith("ed"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokens(text: str) -> List[str]:
+    """Stemmed words of the lower-cased text, then each pair of neighbouring words."""
+    words = [stem(word) for word in WORD.findall(text.lower()) if word not in STOP_WORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class IntentModel:
+    def __init__(self, labels: Sequence[Hashable], feature_bits: int = FEATURE_BITS):
+        self.labels = list(labels)
+        self.dim = 1 << feature_bits
+        self.weights = np.zeros((self.dim, len(self.labels)), dtype=np.float32)  # W: log P(feature | label)
+        self.prior = np.zeros(len(self.labels), dtype=np.float32)
+        self.known = np.zeros(self.dim, dtype=bool)      # columns seen in training
+        self._columns: Dict[str, int] = {}              # token -> hash column, memoized
+        self.fallback = IntentRouter(INTENT_TABLE, word_start=True)
+        self._rows: Dict[int, List[float]] = {}
+        self._prior: List[float] = []
+
+    def column(self, token: str) -> int:
+        column = self._columns.get(token)
+        if column is None:
+            # crc32 rather than hash(): the same column in every process
+            column = self._columns[token] = zlib.crc32(token.encode("utf-8")) & (self.dim - 1)
+        return column
+
+    def fit(self, examples: Iterable[Tuple[Hashable, str, float]], alpha: float = 0.1) -> "IntentModel":
+        """Train from (label, text, weight) triples."""
+        counts = np.zeros((self.dim, len(self.labels)), dtype=np.float64)
+        per_label = np.zeros(len(self.labels), dtype=np.float64)
+        for label, text, weight in examples:
+            index = self.labels.index(label)
+            per_label[index] += weight
+            for token in tokens(text):
+                counts[self.column(token), index] += weight
+
+        self.known = counts.sum(axis=1) > 0
+        vocabulary = int(self.known.sum())
+        totals = counts.sum(axis=0)
+        self.weights = np.log((counts + alpha) / (totals + alpha * vocabulary)).astype(np.float32)
+        # Unseen columns say nothing about the label
+        self.weights[~self.known] = 0.0
+        self.prior = np.log(per_label / per_label.sum()).astype(np.float32)
+        # Plain-float copies of the trained rows for route(): one utterance is too small for NumPy
+        self._rows = {int(c): self.weights[c].tolist() for c in np.flatnonzero(self.known)}
+        self._prior = self.prior.tolist()
+        return self
+
+    def features(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(row, column) of every known token: the non-zeros of X."""
+        rows, columns = [], []
+        column, known = self.column, self.known
+        for row, text in enumerate(texts):
+            for token in tokens(text):
+                c = column(token)
+                if known[c]:
+                    rows.append(row)
+                    columns.append(c)
+        return np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)
+
+    def predict_proba(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-label probabilities (len(texts) x len(labels)), and whether each text had any known word."""
+        rows, columns = self.features(texts)
+        n = len(texts)
+        # X @ W: the rows are sorted, so each text's weight rows are summed in one reduceat
+        scores = np.zeros((n, len(self.labels)), dtype=np.float64)
+        has_known = np.zeros(n, dtype=bool)
+        if len(rows):
+            starts = np.flatnonzero(np.concatenate(([True], rows[1:] != rows[:-1])))
+            scores[rows[starts]] = np.add.reduceat(self.weights[columns], starts, axis=0, dtype=np.float64)
+            has_known[rows] = True
+        scores += self.prior
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores, has_known
+
+    def classify_batch(self, texts: Sequence[str], min_confidence: float = MIN_CONFIDENCE) -> List[Route]:
+        """One Route per text; the keyword table decides the ones the model is unsure about.
+
+        Every keyword is in the model's vocabulary, so a text without a single
+        known word could only match a keyword inside some other word ("already")
+        and is GENERAL.
+        """
+        routes = []
+        for start in range(0, len(texts), BATCH_SIZE):
+            chunk = texts[start:start + BATCH_SIZE]
+            probabilities, has_known = self.predict_proba(chunk)
+            best = probabilities.argmax(axis=1)
+            confidence = probabilities[np.arange(len(chunk)), best]
+            confident = has_known & (confidence >= min_confidence)
+            labels = self.labels
+            for text, label_index, p, known, sure in zip(chunk, best.tolist(), confidence.tolist(),
+                                                         has_known.tolist(), confident.tolist()):
+                if sure:
+                    routes.append(Route(labels[label_index], p))
+                elif known:
+                    routes.append(self.fallback.route(text))
+                else:
+                    routes.append(Route(CommandType.GENERAL, DEFAULT_CONFIDENCE))
+        return routes
+
+    def route(self, text: str, min_confidence: float = MIN_CONFIDENCE) -> Route:
+        """classify_batch for a single utterance, in plain Python (15 to 45 us, depending on its length)."""
+        scores = list(self._prior)
+        known = False
+        for token in tokens(text):
+            row = self._rows.get(self.column(token))
+            if row is not None:
+                known = True
+                scores = [score + weight for score, weight in zip(scores, row)]
+        if not known:
+            return Route(CommandType.GENERAL, DEFAULT_CONFIDENCE)
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        best = exps.index(1.0)
+        confidence = 1.0 / sum(exps)
+        if confidence < min_confidence:
+            return self.fallback.route(text)
+        return Route(self.labels[best], confidence)
+
+
+def training_examples(table=INTENT_TABLE, examples=EXAMPLES):
+    for label, keywords in table:
+        for keyword in keywords:
+            yield label, keyword, KEYWORD_WEIGHT
+    for label, text in examples:
+        yield label, text, 1.0
+
+
+_default_model = None
+_default_model_lock = threading.Lock()
+
+
+def get_default_model() -> IntentModel:
+    """Process-wide model, trained on first use (a few milliseconds)."""
+    global _default_model
+    if _default_model is not None:
+        return _default_model
+    with _default_model_lock:
+        if _default_model is None:
+            labels = [label for label, _ in INTENT_TABLE] + [CommandType.GENERAL]
+            _default_model = IntentModel(labels).fit(training_examples())
+        return _default_model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route utterances in bulk, one per line.")
+    parser.add_argument("input", help="text file, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="where to write one CommandType per line (default: stdout)")
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE)
+    args = parser.parse_args(argv)
+
+    model = get_default_model()
+    with contextlib.ExitStack() as stack:
+        # Only close what we opened: stdin and stdout stay usable for the caller
+        source = sys.stdin if args.input == "-" else stack.enter_context(open(args.input, encoding="utf-8"))
+        sink = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w", encoding="utf-8"))
+        while True:
+            lines = [line.rstrip("\n") for line in itertools.islice(source, BATCH_SIZE)]
+            if not lines:
+                break
+            for route in model.classify_batch(lines, args.min_confidence):
+                sink.write(f"{route.command_type.value if route.command_type else 'FEELINGS'}\t{route.confidence:.2f}\n")
+        sink.flush()
+
+
+if __name__ == "__main__":
+    main()
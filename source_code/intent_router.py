@@ -0,0 +1,61 @@
+from typing import NamedTuple, Optional
+from source_code.keyword_index import KeywordIndex
+from source_code.models import CommandType
+
+# Keyword -> CommandType tables, highest priority first.
+# A `None` label means the user is talking about their feelings and we have to
+# ask whether they want music or someone to talk to before routing.
+INTENT_TABLE = (
+    (None, ("feel", "feeling", "listen")),
+    (CommandType.MUSIC, ("song", "music", "romantic", "listen", "play", "playlist", "mood", "tune", "songs")),
+    (CommandType.FITNESS, ("workout", "exercise", "gym", "gain muscle", "build muscle", "work out")),
+    (CommandType.NUTRITION, ("nutrition", "calorie", "diet", "nutrient", "macros", "breakfast", "lunch", "dinner", "vitamin")),
+    (CommandType.STUDY, ("study", "review", "math", "homework")),
+    (CommandType.BOOK, ("book", "novel", "read", "recommend a book", "story", "fantasy", "romance", "thriller")),
+    (CommandType.PSYCHOLOGY, ("sad", "anxious", "depressed", "cope", "mental", "psychology", "stressed", "burnout", "therapy", "vent")),
+)
+
+# Answers to "playlist or talk to you?" after a feelings message
+FOLLOWUP_TABLE = (
+    (CommandType.MUSIC, ("song", "playlist", "listen to music", "music", "tune", "songs", "playlists")),
+    (CommandType.PSYCHOLOGY, ("talk", "vent", "listen to me", "share", "express", "tell you", "someone to talk")),
+)
+
+# Confidence reported when nothing matched and we fall back to GENERAL
+DEFAULT_CONFIDENCE = 0.5
+
+
+class Route(NamedTuple):
+    command_type: Optional[CommandType]  # None when a follow-up question is needed
+    confidence: float
+
+
+class IntentRouter:
+    """Routes an utterance to a CommandType with one cache lookup per word (see KeywordIndex)."""
+
+    def __init__(self, table, default: Optional[CommandType] = CommandType.GENERAL, word_start: bool = False):
+        self.index = KeywordIndex(table, word_start)
+        self.default = default
+
+    def route(self, input_str: str) -> Route:
+        mask = self.index.mask(input_str.lower())
+        if not mask:
+            return Route(self.default, DEFAULT_CONFIDENCE if self.default else 0.0)
+
+        # Same priority order as the old if/elif chain: the label of the first keyword in the table wins
+        slot = self.index.slot(mask)
+        return Route(self.index.labels[slot], bin(mask & self.index.label_masks[slot]).count("1") / bin(mask).count("1"))
+
+
+# Built once at import and shared by the console, GUI and every other front end
+INTENT_ROUTER = IntentRouter(INTENT_TABLE)
+FOLLOWUP_ROUTER = IntentRouter(FOLLOWUP_TABLE, default=None)
+
+
+def route_intent(input_str: str) -> Route:
+    # Live turns stay on the keyword table; intent_model.py routes logs in bulk
+    return INTENT_ROUTER.route(input_str)
+
+
+def route_followup(input_str: str) -> Route:
+    return FOLLOWUP_ROUTER.route(input_str)
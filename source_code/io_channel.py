@@ -0,0 +1,53 @@
+"""How an assistant talks to its user.
+
+Assistants never call input()/print() directly; they use the IOChannel they
+were given. Each front end supplies its own: the console uses ConsoleChannel,
+the GUI routes through its chat window, and the headless runner replays
+scripted answers. Because nothing global is patched, any number of sessions
+can run side by side in one process.
+"""
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+from source_code.tracing import waiting
+
+
+class IOChannel(ABC):
+    @abstractmethod
+    def ask(self, prompt: str = "") -> str:
+        """Show `prompt` and wait for the user's reply."""
+
+    @abstractmethod
+    def say(self, message: str = ""):
+        """Show a line to the user."""
+
+
+class ConsoleChannel(IOChannel):
+    def ask(self, prompt: str = "") -> str:
+        # The user's thinking time is not the assistant's latency
+        with waiting():
+            return input(prompt)
+
+    def say(self, message: str = ""):
+        print(message)
+
+
+class ScriptedChannel(IOChannel):
+    """Answers prompts from a list and records everything that was shown."""
+
+    def __init__(self, answers: Iterable[str] = (), transcript: Optional[List[str]] = None):
+        self.answers = iter(answers)
+        self.transcript = transcript if transcript is not None else []
+
+    def ask(self, prompt: str = "") -> str:
+        if prompt.strip():
+            self.transcript.append(prompt.strip())
+        try:
+            return next(self.answers)
+        except StopIteration:
+            # Same error input() raises when stdin runs dry
+            raise EOFError(f"No scripted answer left for prompt: {prompt.strip()!r}") from None
+
+    def say(self, message: str = ""):
+        if message.strip():
+            self.transcript.append(message.strip())
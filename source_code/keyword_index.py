@@ -0,0 +1,158 @@
+import re
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+# Words remembered with the keywords they contain; the cache starts over when full
+WORD_CACHE = 65536
+
+
+class KeywordIndex:
+    """Finds every keyword of a prioritized table with one cache lookup per word of the text.
+
+    The table is a sequence of (label, keywords) pairs, highest priority first.
+    Matches may overlap exactly like the old `keyword in text` substring checks
+    did ("listen" still matches inside "listening", "read" inside "already").
+    With `word_start`, a keyword only matches where a word begins, so "read"
+    no longer matches inside "already" but still starts "reading".
+
+    A keyword without whitespace can only occur inside one whitespace-separated
+    word, so the text is split once and each word is looked up in a cache of
+    the keywords found inside it. A word never seen before is scanned once with
+    a trie-shaped regex of all keywords; after that, the cost of a request
+    depends on how many words it has, not on how many keywords there are. A
+    keyword with spaces in it ("work out") is only looked for when one of the
+    words holds its first word.
+    """
+
+    def __init__(self, table: Sequence[Tuple[Hashable, Iterable[str]]], word_start: bool = False):
+        self.labels: List[Hashable] = []
+        self.keywords: List[str] = []
+        # keyword -> ranks of the keyword in table order (a keyword may appear under several labels)
+        entries: Dict[str, List[int]] = {}
+        # rank -> position of its label in self.labels
+        self._slots: List[int] = []
+
+        for label, keywords in table:
+            if label not in self.labels:
+                self.labels.append(label)
+            for keyword in keywords:
+                entries.setdefault(keyword.lower(), []).append(len(self.keywords))
+                self.keywords.append(keyword.lower())
+                self._slots.append(self.labels.index(label))
+
+        # Bit r of a mask is set when the keyword of rank r matched; label i owns label_masks[i]
+        self.label_masks: List[int] = [0] * len(self.labels)
+        for rank, slot in enumerate(self._slots):
+            self.label_masks[slot] |= 1 << rank
+
+        words = {keyword: list(ranks) for keyword, ranks in entries.items() if keyword.split() == [keyword]}
+        phrases = {keyword: ranks for keyword, ranks in entries.items() if keyword.strip() and keyword not in words}
+        # A phrase can only occur where a word holds its first word: such words carry the
+        # pseudo-rank len(keywords) + i of phrase i, and only those phrases are then looked for
+        self._shift = len(self.keywords)
+        for index, phrase in enumerate(phrases):
+            words.setdefault(phrase.split()[0], []).append(self._shift + index)
+        self._words = _Matcher(words, word_start)
+        self._phrases = [(phrase, _mask(ranks), re.compile(r"\b" + re.escape(phrase)) if word_start else None)
+                         for phrase, ranks in phrases.items()]
+        # word -> mask of the keywords inside it (0 for most words); replaced when full
+        self._known: Dict[str, int] = {}
+
+    def _learn(self, word: str) -> int:
+        if len(self._known) >= WORD_CACHE:
+            self._known = {}
+        mask = self._known[word] = _mask(self._words.ranks(word))
+        return mask
+
+    def mask(self, text: str) -> int:
+        """Bit mask of the ranks of every keyword found in the lower-cased text."""
+        known = self._known
+        mask = 0
+        for word in text.split():
+            bits = known.get(word)
+            if bits is None:
+                bits = self._learn(word)
+            mask |= bits
+        pending = mask >> self._shift
+        if pending:
+            mask ^= pending << self._shift
+            while pending:
+                low = pending & -pending
+                phrase, phrase_mask, pattern = self._phrases[low.bit_length() - 1]
+                if pattern.search(text) if pattern else phrase in text:
+                    mask |= phrase_mask
+                pending ^= low
+        return mask
+
+    def slot(self, mask: int) -> int:
+        """Position in self.labels of the label of the first keyword in the (non-empty) mask."""
+        return self._slots[(mask & -mask).bit_length() - 1]
+
+    def tally(self, text: str) -> List[int]:
+        """Count distinct matching keywords per label, in the order of self.labels."""
+        mask = self.mask(text)
+        return [bin(mask & label_mask).count("1") if mask else 0 for label_mask in self.label_masks]
+
+    def counts(self, text: str) -> Dict[Hashable, int]:
+        """Count distinct matching keywords per label."""
+        return {label: count for label, count in zip(self.labels, self.tally(text)) if count}
+
+    def first(self, text: str) -> Optional[Tuple[str, Hashable]]:
+        """Return the (keyword, label) that comes first in table order, if any matched."""
+        mask = self.mask(text)
+        if not mask:
+            return None
+        best = (mask & -mask).bit_length() - 1
+        return self.keywords[best], self.labels[self._slots[best]]
+
+
+def _mask(ranks: Iterable[int]) -> int:
+    mask = 0
+    for rank in ranks:
+        mask |= 1 << rank
+    return mask
+
+
+class _Matcher:
+    """All occurrences of a set of keywords, overlapping ones included, with one trie-shaped regex."""
+
+    def __init__(self, entries: Dict[str, List[int]], word_start: bool):
+        # The regex only reports the longest keyword starting at a position, so
+        # each keyword also carries the ranks of every shorter keyword it starts with.
+        self.hits: Dict[str, Tuple[int, ...]] = {
+            keyword: tuple(sorted(rank for other, ranks in entries.items() if keyword.startswith(other) for rank in ranks))
+            for keyword in entries
+        }
+        prefix = r"\b" if word_start else ""
+        self.pattern = re.compile(prefix + _trie_pattern(entries)) if entries else None
+
+    def ranks(self, text: str) -> Tuple[int, ...]:
+        if self.pattern is None:
+            return ()
+        found = []
+        search = self.pattern.search
+        match = search(text)
+        while match:
+            found.extend(self.hits[match.group()])
+            # Restart one character after the match start so overlapping keywords are still found
+            match = search(text, match.start() + 1)
+        return tuple(sorted(set(found)))
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Build a regex where keywords sharing a prefix share one branch, longest match first."""
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A keyword ends here but longer ones may continue: trying them first keeps the longest
+        return f"(?:{body}|)" if "" in node else body
+
+    return build(trie)
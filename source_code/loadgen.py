@@ -0,0 +1,186 @@
+"""Load generator for the chat server (source_code/server.py).
+
+Opens N concurrent users, each on its own keep-alive connection. Every user
+creates a session and plays the scripted requests below, answering every
+prompt the assistants ask. It reports throughput and p50/p99 latency per turn.
+
+    PYTHONPATH=. python source_code/loadgen.py --users 200 --url http://127.0.0.1:8080
+
+With --self-host it starts the chat server and the Gemini stand-in
+(gemini_stub.py) in-process, so one command gives a complete run:
+
+    PYTHONPATH=. python source_code/loadgen.py --self-host --users 200 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+# (request, answers to the prompts it leads to), played in order by every user.
+# {n} is the user number, so GENERAL questions aren't all answered from the cache.
+SCRIPT: List[Tuple[str, List[str]]] = [
+    ("I want to build muscle", ["legs", "yes", "tone body", "3"]),
+    ("play me something romantic", []),
+    ("what is the capital of France? (asked by user {n})", []),
+    ("I feel a bit lost today", ["talk to you", "school is stressful", "advice", "no"]),
+    ("I need help to study", ["math", "b", "fractions", "yes"]),
+    ("recommend a mystery book", []),
+]
+
+
+class HTTPConnection:
+    """Just enough HTTP/1.1 to talk JSON to the chat server over one kept-alive socket."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, body=None) -> Tuple[int, dict]:
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+        )
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def run_user(host: str, port: int, user_number: int, rounds: int, latencies: List[float], errors: List[str]):
+    connection = HTTPConnection(host, port)
+    await connection.connect()
+    try:
+        for _ in range(rounds):
+            # Premium, so the free-plan limit doesn't cut the script short
+            status, created = await connection.request(
+                "POST", "/sessions", {"name": f"user{user_number}", "age": 20, "isPremium": True})
+            if status != 201:
+                errors.append(created.get("error", str(status)))
+                return
+            turns_path = f"/sessions/{created['session_id']}/turns"
+
+            for text, answers in SCRIPT:
+                text = text.format(n=user_number)
+                answers = iter(answers)
+                while True:
+                    start = time.perf_counter()
+                    status, reply = await connection.request("POST", turns_path, {"text": text})
+                    latencies.append(time.perf_counter() - start)
+                    if status != 200:
+                        errors.append(reply.get("error", str(status)))
+                        break
+                    if reply.get("prompt") is None:
+                        break
+                    text = next(answers, None)
+                    if text is None:
+                        # The session is stuck on a question we can't answer
+                        errors.append(f"script ran out of answers at {reply['prompt']!r}")
+                        return
+
+            await connection.request("DELETE", f"/sessions/{created['session_id']}")
+    finally:
+        connection.close()
+
+
+async def run_load(url: str, users: int, rounds: int) -> dict:
+    parts = urlsplit(url)
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_user(parts.hostname, parts.port or 80, n, rounds, latencies, errors) for n in range(users)))
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "users": users,
+        "turns": len(latencies),
+        "errors": len(errors),
+        "seconds": seconds,
+        "turns_per_second": len(latencies) / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def self_hosted(args) -> dict:
+    from source_code.gemini_client import GeminiClient
+    from source_code.gemini_stub import GeminiStubServer
+    from source_code.quota import QuotaEngine
+    from source_code.resilience import from_env
+    from source_code.server import ChatServer
+
+    # Load runs must not fill the real study cards and intake logs
+    os.environ.setdefault("SRS_PATH", "")
+    os.environ.setdefault("NUTRITION_LOGS", "")
+    stub = GeminiStubServer(latency=args.latency, fail_rate=args.fail_rate, slow_rate=args.slow_rate,
+                            slow_latency=args.slow_latency, seed=0)
+    stub.start()
+    gemini = from_env(GeminiClient(api_key="stub", base_url=stub.base_url, max_concurrency=args.gemini_concurrency))
+    server = ChatServer(gemini, gemini_concurrency=args.gemini_concurrency, quota=QuotaEngine())
+    listener = await server.serve("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        stats = await run_load(f"http://127.0.0.1:{port}", args.users, args.rounds)
+        stats["gemini"] = gemini.stats_dict()
+        stats["gemini"]["faults_injected"] = stub.faults_injected
+        return stats
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        gemini.close()
+        stub.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive the chat server with N concurrent users.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="chat server to load")
+    parser.add_argument("--users", type=int, default=50, help="concurrent users")
+    parser.add_argument("--rounds", type=int, default=1, help="sessions each user plays through")
+    parser.add_argument("--self-host", action="store_true", help="start the server and a Gemini stand-in in-process")
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in Gemini latency in seconds (--self-host)")
+    parser.add_argument("--gemini-concurrency", type=int, default=8, help="server's Gemini concurrency (--self-host)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of stand-in calls that fail (--self-host)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of stand-in calls that are slow (--self-host)")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="extra seconds for slow calls (--self-host)")
+    args = parser.parse_args(argv)
+
+    if args.self_host:
+        stats = asyncio.run(self_hosted(args))
+    else:
+        stats = asyncio.run(run_load(args.url, args.users, args.rounds))
+
+    print(f"{stats['users']} users, {stats['turns']} turns, {stats['errors']} errors in {stats['seconds']:.2f}s")
+    print(f"throughput: {stats['turns_per_second']:.0f} turns/s   p50: {stats['p50_ms']:.1f} ms   p99: {stats['p99_ms']:.1f} ms")
+    if "gemini" in stats:
+        print("gemini: " + "  ".join(f"{name}={value}" for name, value in stats["gemini"].items()))
+
+
+if __name__ == "__main__":
+    main()
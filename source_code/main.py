@@ -1,44 +1,48 @@
 from source_code.models import UserProfile, Request, CommandType
-from source_code.music_assistant import MusicAssistant
-from source_code.fitness_assistant import FitnessAssistant
-from source_code.study_assistant import StudyAssistant
 from source_code.base_assistant import AIAssistant
-from source_code.book_assistant import BookAssistant
-from source_code.psychology_assistant import PsychologyAssistant
+from source_code.assistant_registry import SessionAssistants, create_assistant
+from source_code.intent_router import route_intent, route_followup
+from source_code.io_channel import IOChannel, ConsoleChannel
+from source_code.conversation import Conversation
+from source_code.quota import get_default_quota, quota_key
+from source_code.tracing import span, traced_session
 from datetime import datetime
+from typing import Optional
 
-def classify_command(input_str: str) -> CommandType:
-    input_str = input_str.lower()
+LIMIT_MESSAGE = "🚫 Sorry, you have reached your plan limit. 💎 Please upgrade to premium or come back later after reset."
 
-    if "feel" in input_str or "feeling" in input_str or "listen" in input_str:
-        print("\n🧠 I hear you. I know some feelings can be heavy.")
-        print("Would you like me to:")
-        print("🎵 1) Recommend a song or playlist to soothe your mood")
-        print("💬 2) Just listen to what you want to share — I’m here for you.")
+def classify_command(input_str: str, io: Optional[IOChannel] = None) -> CommandType:
+    io = io or ConsoleChannel()
+    route = route_intent(input_str)
+
+    if route.command_type is None:
+        io.say("\n🧠 I hear you. I know some feelings can be heavy.")
+        io.say("Would you like me to:")
+        io.say("🎵 1) Recommend a song or playlist to soothe your mood")
+        io.say("💬 2) Just listen to what you want to share — I’m here for you.")
         
         for _ in range(2):
-            follow_up = input("You can say something like 'playlist' or 'talk to you': ").strip().lower()
-            if any(word in follow_up for word in ["song", "playlist", "listen to music", "music", "tune", "songs", "playlists"]):
-                return CommandType.MUSIC
-            elif any(word in follow_up for word in ["talk", "vent", "listen to me", "share", "express", "tell you", "someone to talk"]):
-                return CommandType.PSYCHOLOGY
+            follow_up = io.ask("You can say something like 'playlist' or 'talk to you': ").strip()
+            command_type = route_followup(follow_up).command_type
+            if command_type is not None:
+                return command_type
             else:
-                print("Hmm... I didn’t quite understand. Can you try rephrasing?")
-        print("❓Still a bit unclear... Let me know if there's anything else I can help with.")
+                io.say("Hmm... I didn’t quite understand. Can you try rephrasing?")
+        io.say("❓Still a bit unclear... Let me know if there's anything else I can help with.")
         return CommandType.GENERAL
 
-    if any(word in input_str for word in ["song", "music", "romantic", "listen", "play", "playlist", "mood", "tune", "songs"]):
-        return CommandType.MUSIC
-    elif any(word in input_str for word in ["workout", "exercise", "gym", "gain muscle", "build muscle", "work out"]):
-        return CommandType.FITNESS
-    elif any(word in input_str for word in ["study", "review", "math", "homework"]):
-        return CommandType.STUDY
-    elif any(word in input_str for word in ["book", "novel", "read", "recommend a book", "story", "fantasy", "romance", "thriller"]):
-        return CommandType.BOOK
-    elif any(word in input_str for word in ["sad", "anxious", "depressed", "cope", "mental", "psychology", "stressed", "burnout", "therapy", "vent"]):
-        return CommandType.PSYCHOLOGY
-    else:
-        return CommandType.GENERAL
+    return route.command_type
+
+def select_assistant(command_type: CommandType, user: UserProfile, io: Optional[IOChannel] = None) -> AIAssistant:
+    # Looked up in assistant_registry.py, which imports each assistant on first use
+    return create_assistant(command_type, user, io)
+
+def restore_conversation(state: dict, user: UserProfile, io: Optional[IOChannel] = None,
+                         assistants: Optional[SessionAssistants] = None) -> Conversation:
+    """Rebuild a parked conversation from its to_dict() state, ready for resume()."""
+    command_type = CommandType(state["command_type"])
+    assistant = assistants.get(command_type) if assistants else select_assistant(command_type, user, io)
+    return assistant.startConversation(state)
 
 def main():
     print("👋 Hey there! I’m your personal AI Assistant.")
@@ -71,15 +75,16 @@ def main():
     # Create UserProfile
     user = UserProfile(name=name, age=age, preferences={}, isPremium=is_premium)
 
-    # Request limit for free users
+    # Request limits per plan, kept across runs (see quota.py)
     # Premium users can ask unlimitedly
-    free_limit = 3
-    request_count = 0
+    quota = get_default_quota()
+    # Built the first time each kind of request comes up, then reused
+    assistants = SessionAssistants(user)
 
     # Start assistant loop
     while True:
-        if not user.isPremium and request_count >= free_limit:
-            print("🚫 Sorry, you have reached your plan limit. 💎 Please upgrade to premium or come back later after reset.")
+        if quota.exhausted(*quota_key(user)):
+            print(LIMIT_MESSAGE)
             break
 
         # Ask for request
@@ -92,28 +97,28 @@ def main():
                              "— 'I need someone to listen to me now'\n"
                              "\n👉 Your request: ").strip()
 
-        command_type = classify_command(mood_or_goal)
-        user.preferences["raw_input"] = mood_or_goal
-        request = Request(input_str=mood_or_goal, timestamp=datetime.now(), command_type=command_type)
-
-        # Select correct assistant
-        if command_type == CommandType.MUSIC:
-            assistant = MusicAssistant(user)
-        elif command_type == CommandType.FITNESS:
-            assistant = FitnessAssistant(user)
-        elif command_type == CommandType.STUDY:
-            assistant = StudyAssistant(user)
-        elif command_type == CommandType.BOOK:
-            assistant = BookAssistant(user)
-        elif command_type == CommandType.PSYCHOLOGY:
-            assistant = PsychologyAssistant(user)
-        else:
-            assistant = AIAssistant(user)
+        with span("turn") as turn:
+            with span("classify") as timed:
+                command_type = classify_command(mood_or_goal)
+                timed.label = turn.label = command_type
+
+            # Some requests can cost more than what is left; a cheaper one may still fit
+            if not quota.consume(*quota_key(user), command_type).allowed:
+                print(LIMIT_MESSAGE)
+                continue
+
+            user.preferences["raw_input"] = mood_or_goal
+            request = Request(input_str=mood_or_goal, timestamp=datetime.now(), command_type=command_type)
+
+            # Select correct assistant
+            with span("select_assistant", command_type):
+                assistant = assistants.get(command_type)
 
-        # Output assistant response
-        print("\n💡 " + assistant.greetUser())
-        response = assistant.handleRequest(request)
-        print("🤖 " + response.message)
+            # Output assistant response
+            print("\n💡 " + assistant.greetUser())
+            with span("handle_request", command_type):
+                response = assistant.handleRequest(request)
+            print("🤖 " + response.message)
 
         # Ask to continue
         cont = input("\n🔁 Is there anything else I can help you with? (yes/no): ").strip().lower()
@@ -122,8 +127,8 @@ def main():
             break
         else:
             print(f"\n✅ I'm still here with you, {name}. What would you like to do next?")
-            if not user.isPremium:
-                request_count += 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # TRACE_PROFILE / TRACE_EXPORT: profile the session, dump the stage histograms (see tracing.py)
+    with traced_session():
+        main()
\ No newline at end of file
@@ -0,0 +1,407 @@
+"""Food composition table, food name lookup and daily intake logs for NutritionAssistant.
+
+The table (foods.csv next to this module, or FOOD_DB for a bigger one with the
+same columns) gives every food's nutrients per 100 g plus a typical serving in
+grams. It is loaded into a float32 matrix with one column per nutrient, so a
+day's totals are one product of the logged grams with the logged foods' rows.
+
+Names are found exact first, then as the prefix of a name ("chicken br"),
+then word by word ("chicken" -> chicken breast), then by a close spelling of a word
+("brocoli"). Prefixes and words are binary searches over sorted lists.
+
+An IntakeLog keeps a user's logged foods as append-only columns (day, food,
+grams) plus running totals per day. Logging a food adds its nutrients to that
+day's totals and reports the limits it just went past, without looking at
+the rest of the log; totals over a range of days are vectorized sums. Each
+entry is also appended to the user's JSONL file, so logs survive restarts.
+Only the LOG_CACHE most recently used logs stay in memory; a dropped one is
+read back from its file the next time it is needed (without a folder, it is
+gone).
+
+Configuration:
+    FOOD_DB          CSV food table (default: the built-in foods.csv)
+    NUTRITION_LOGS   folder of per-user intake logs ("" keeps them in memory)
+"""
+import bisect
+import csv
+import difflib
+import json
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from urllib.parse import quote
+
+import numpy as np
+
+BUILTIN_FOODS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "foods.csv")
+DEFAULT_LOG_DIR = os.path.join(os.path.expanduser("~"), ".ai_assistant_nutrition")
+
+NUTRIENTS = ("calories", "protein", "carbs", "fat", "fiber", "sugar", "sodium", "calcium", "iron", "vitamin_c")
+UNITS = {"calories": "kcal", "sodium": "mg", "calcium": "mg", "iron": "mg", "vitamin_c": "mg"}
+COLUMN = {name: j for j, name in enumerate(NUTRIENTS)}
+# Daily upper limits (alerts) and targets (recommendations) for an adult
+DAILY_LIMITS = {"calories": 2000, "fat": 78, "sugar": 50, "sodium": 2300}
+DAILY_TARGETS = {"protein": 50, "fiber": 28, "calcium": 1000, "iron": 18, "vitamin_c": 90}
+# Foods recommended per nutrient
+RECOMMEND = 3
+
+# Full names tried per prefix; longer runs of matches are cut off here
+PREFIX_SCAN = 64
+# How close a misspelt word must be to a known one (difflib ratio)
+FUZZY_CUTOFF = 0.85
+# Intake logs kept in memory, least recently used dropped first
+LOG_CACHE = 1024
+
+
+def unit(nutrient: str) -> str:
+    return UNITS.get(nutrient, "g")
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("oes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+class FoodIndex:
+    """Food name -> row of the food table."""
+
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        self.exact: Dict[str, int] = {}
+        for food, name in enumerate(self.names):
+            self.exact.setdefault(name, food)
+            self.exact.setdefault(singular(name), food)
+        self.sorted_names = sorted(self.exact)
+        # Every word of every name (and its singular), sorted, with the food it belongs to
+        pairs = sorted({(form, food) for food, name in enumerate(self.names)
+                        for word in name.split() for form in (word, singular(word))})
+        self.words = [word for word, _ in pairs]
+        self.word_foods = [food for _, food in pairs]
+        # Distinct words by first letter: the candidates for a misspelling
+        self.vocabulary: Dict[str, List[str]] = {}
+        for word in dict.fromkeys(self.words):
+            self.vocabulary.setdefault(word[0], []).append(word)
+
+    def prefixed(self, keys: List[str], prefix: str) -> range:
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\x7f", start, min(len(keys), start + PREFIX_SCAN))
+        return range(start, end)
+
+    def word_matches(self, word: str) -> range:
+        """Rows of self.words for `word`: the word itself, its singular, words it starts, or a close spelling."""
+        for form in (word, singular(word)):
+            start = bisect.bisect_left(self.words, form)
+            end = bisect.bisect_right(self.words, form, start)
+            if end > start:
+                return range(start, min(end, start + PREFIX_SCAN))
+        if len(word) >= 3:
+            found = self.prefixed(self.words, word)
+            if found:
+                return found
+        close = difflib.get_close_matches(word, self.vocabulary.get(word[:1], ()), n=1, cutoff=FUZZY_CUTOFF)
+        return self.word_matches(close[0]) if close else range(0)
+
+    def lookup(self, query: str) -> Optional[int]:
+        query = normalize(query)
+        if not query:
+            return None
+        food = self.exact.get(query)
+        if food is None:
+            food = self.exact.get(singular(query))
+        if food is not None:
+            return food
+
+        # "chicken br": the shortest name it starts
+        names = self.prefixed(self.sorted_names, query)
+        if names:
+            return self.exact[min((self.sorted_names[i] for i in names), key=len)]
+
+        # Word by word: the food sharing most words; the table lists plain foods first ("rice" -> white rice)
+        votes = Counter()
+        for word in query.split():
+            votes.update({self.word_foods[i] for i in self.word_matches(word)})
+        if not votes:
+            return None
+        return max(votes, key=lambda food: (votes[food], -food))
+
+    def suggest(self, query: str, k: int = 3) -> List[str]:
+        """Names close to an unknown food, for "did you mean"."""
+        foods = []
+        for word in normalize(query).split():
+            for i in self.word_matches(word):
+                if self.word_foods[i] not in foods:
+                    foods.append(self.word_foods[i])
+        return [self.names[food] for food in foods[:k]]
+
+
+class FoodDB:
+    def __init__(self, names: Sequence[str], servings: Sequence[float], values: np.ndarray):
+        self.names = [normalize(name) for name in names]
+        self.servings = np.asarray(servings, dtype=np.float32)      # grams in one serving
+        self.values = np.asarray(values, dtype=np.float32)          # (foods, NUTRIENTS) per 100 g
+        self.index = FoodIndex(self.names)
+        # Per nutrient, the foods richest in it per calorie (at least 20 kcal, so tea can't win)
+        density = self.values / np.maximum(self.values[:, COLUMN["calories"]], 20)[:, None]
+        self.richest = np.argsort(-density, axis=0, kind="stable")[:RECOMMEND]
+
+    @classmethod
+    def load(cls, path: str = BUILTIN_FOODS) -> "FoodDB":
+        names, servings, rows = [], [], []
+        with open(path, encoding="utf-8", newline="") as f:
+            for record in csv.DictReader(f):
+                names.append(record["name"])
+                servings.append(float(record.get("serving") or 100))
+                rows.append([float(record.get(nutrient) or 0) for nutrient in NUTRIENTS])
+        return cls(names, servings, np.array(rows, dtype=np.float32).reshape(-1, len(NUTRIENTS)))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def lookup(self, name: str) -> Optional[int]:
+        return self.index.lookup(name)
+
+    def nutrients(self, food: int, grams: float) -> np.ndarray:
+        return self.values[food].astype(np.float64) * (grams / 100)
+
+    def richest_in(self, nutrient: str) -> List[str]:
+        return [self.names[food] for food in self.richest[:, COLUMN[nutrient]]]
+
+
+# --- Reading meals out of free text ---------------------------------------
+
+NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+                "eight": 8, "nine": 9, "ten": 10, "half": 0.5, "couple": 2, "few": 3}
+# Units with a fixed weight; anything else ("cup", "slice", ...) counts servings
+GRAMS_PER = {"g": 1, "gr": 1, "gram": 1, "grams": 1, "kg": 1000, "oz": 28.35, "ounce": 28.35, "ounces": 28.35,
+             "lb": 453.6, "lbs": 453.6, "ml": 1, "l": 1000}
+SERVING_UNITS = frozenset("""
+    serving servings cup cups slice slices piece pieces bowl bowls glass glasses can cans plate plates
+    portion portions bar bars scoop scoops handful handfuls bottle bottles mug mugs
+""".split())
+FILLER = frozenset("""
+    i ive i've im i'm had have has ate eaten eat eating drank drink drinking just also some for breakfast lunch
+    dinner snack snacks today tonight this morning afternoon evening yesterday my the of log add track please
+    was were with at in on and a an want need help me to diet nutrition food foods meal meals healthy healthier
+    what whats what's should can could you how many much is are there did do intake check show about like would
+    something more less day daily plan it that not calories calorie macros nutrients contain contains does
+""".split())
+ITEM_SEPARATORS = re.compile(r",|;|\+|&|\band\b|\bwith\b|\bplus\b|\bthen\b")
+TOKEN = re.compile(r"\d+(?:\.\d+)?|[a-z']+")
+QUESTION = re.compile(r"\bhow (?:many|much)\b|\bwhat(?:'s| is)?\b.*\bin\b|\bnutrition (?:facts|of|in)\b|\?")
+
+
+class MealItem(NamedTuple):
+    name: str
+    quantity: float
+    unit: Optional[str]   # a GRAMS_PER unit, a serving unit, or None for servings
+
+
+def parse_meal(text: str) -> List[MealItem]:
+    """The foods mentioned in "2 eggs, 150g rice and a banana" with their amounts."""
+    items = []
+    for part in ITEM_SEPARATORS.split(text.lower()):
+        quantity, unit_word, name = None, None, []
+        for token in TOKEN.findall(part):
+            if quantity is None and not name and (token[0].isdigit() or token in NUMBER_WORDS):
+                quantity = float(token) if token[0].isdigit() else NUMBER_WORDS[token]
+            elif quantity is not None and unit_word is None and not name and (token in GRAMS_PER or token in SERVING_UNITS):
+                unit_word = token
+            elif token not in FILLER:
+                name.append(token)
+        if name:
+            items.append(MealItem(" ".join(name), quantity or 1.0, unit_word))
+    return items
+
+
+def is_question(text: str) -> bool:
+    """"How many calories in a banana?" asks about a food instead of logging it."""
+    return QUESTION.search(text.lower()) is not None
+
+
+def asked_food(text: str) -> str:
+    # What follows the last "in"/"of" names the food: "how much protein is in a protein bar"
+    match = re.search(r".*\b(?:in|of)\s+(.+)", text.lower())
+    return match.group(1) if match else text
+
+
+def grams(db: FoodDB, food: int, item: MealItem) -> float:
+    if item.unit in GRAMS_PER:
+        return item.quantity * GRAMS_PER[item.unit]
+    return item.quantity * float(db.servings[food])
+
+
+# --- Intake logs --------------------------------------------------------------
+
+class Alert(NamedTuple):
+    nutrient: str
+    total: float
+    limit: float
+
+
+def limit_vector(limits: Dict[str, float]) -> np.ndarray:
+    vector = np.full(len(NUTRIENTS), np.inf)
+    for nutrient, limit in limits.items():
+        vector[COLUMN[nutrient]] = limit
+    return vector
+
+
+class IntakeLog:
+    """One user's logged foods: append-only columns plus running totals per day (date ordinals)."""
+
+    def __init__(self, db: FoodDB, path: Optional[str] = None, limits: Optional[Dict[str, float]] = None,
+                 capacity: int = 256):
+        self.db = db
+        self.path = path
+        self.limits = limit_vector(DAILY_LIMITS if limits is None else limits)
+        self._lock = threading.Lock()
+        self.size = 0
+        self.days = np.empty(capacity, dtype=np.int32)
+        self.foods = np.empty(capacity, dtype=np.int32)
+        self.grams = np.empty(capacity, dtype=np.float32)
+        self._totals: Dict[int, np.ndarray] = {}       # day -> nutrient totals
+        self._day_rows: Dict[int, List[int]] = {}      # day -> its entries
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _reserve(self, extra: int):
+        if self.size + extra <= len(self.days):
+            return
+        capacity = max(2 * len(self.days), self.size + extra)
+        for name in ("days", "foods", "grams"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def add(self, food: int, grams: float, day: int) -> List[Alert]:
+        """Log `grams` of `food` on `day`; returns the limits this entry went past."""
+        with self._lock:
+            self._reserve(1)
+            row = self.size
+            self.days[row], self.foods[row], self.grams[row] = day, food, grams
+            self.size += 1
+            self._day_rows.setdefault(day, []).append(row)
+
+            totals = self._totals.get(day)
+            if totals is None:
+                totals = self._totals[day] = np.zeros(len(NUTRIENTS))
+            before = totals.copy()
+            totals += self.db.nutrients(food, grams)
+            crossed = np.flatnonzero((before <= self.limits) & (totals > self.limits))
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"day": day, "food": self.db.names[food], "grams": round(float(grams), 1)}) + "\n")
+            return [Alert(NUTRIENTS[j], float(totals[j]), float(self.limits[j])) for j in crossed]
+
+    def extend(self, days: Sequence[int], foods: Sequence[int], grams: Sequence[float]):
+        """Append many entries at once (loading and imports); totals are rebuilt per touched day."""
+        days = np.asarray(days, dtype=np.int32)
+        if not len(days):
+            return
+        with self._lock:
+            self._reserve(len(days))
+            start, self.size = self.size, self.size + len(days)
+            self.days[start:self.size] = days
+            self.foods[start:self.size] = foods
+            self.grams[start:self.size] = grams
+            for row, day in enumerate(days.tolist(), start):
+                self._day_rows.setdefault(day, []).append(row)
+            touched = np.unique(days)
+            daily = self._sum_by_day(touched[0], touched[-1] + 1, np.arange(start, self.size))
+            for day in touched.tolist():
+                self._totals[day] = self._totals.get(day, 0) + daily[day - touched[0]]
+
+    def _load(self, path: str):
+        days, foods, amounts = [], [], []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                food = self.db.index.exact.get(entry["food"])
+                if food is not None:   # dropped from the food table since
+                    days.append(entry["day"])
+                    foods.append(food)
+                    amounts.append(entry["grams"])
+        if days:
+            self.extend(days, foods, amounts)
+
+    def _sum_by_day(self, first: int, end: int, rows: np.ndarray) -> np.ndarray:
+        # (end - first, NUTRIENTS) totals of `rows`, one bincount per nutrient
+        slot = self.days[rows] - first
+        weights = self.grams[rows].astype(np.float64) / 100
+        values = self.db.values[self.foods[rows]]
+        return np.stack([np.bincount(slot, weights=weights * values[:, j], minlength=end - first)
+                         for j in range(len(NUTRIENTS))], axis=1)
+
+    def day_totals(self, day: int) -> np.ndarray:
+        with self._lock:
+            totals = self._totals.get(day)
+            return totals.copy() if totals is not None else np.zeros(len(NUTRIENTS))
+
+    def totals(self, first: int, end: int) -> np.ndarray:
+        """Nutrient totals of days first <= day < end."""
+        with self._lock:
+            days = self.days[:self.size]
+            rows = np.flatnonzero((days >= first) & (days < end))
+            return (self.grams[rows].astype(np.float64) / 100) @ self.db.values[self.foods[rows]]
+
+    def daily(self, first: int, end: int) -> np.ndarray:
+        """(end - first, NUTRIENTS) totals, one row per day."""
+        with self._lock:
+            days = self.days[:self.size]
+            return self._sum_by_day(first, end, np.flatnonzero((days >= first) & (days < end)))
+
+    def contributors(self, day: int, nutrient: str, k: int = 2) -> List[str]:
+        """The foods that gave the most of `nutrient` on `day`."""
+        with self._lock:
+            rows = self._day_rows.get(day, [])
+            amounts = Counter()
+            for row in rows:
+                food = int(self.foods[row])
+                amounts[food] += float(self.grams[row]) * float(self.db.values[food, COLUMN[nutrient]])
+        return [self.db.names[food] for food, amount in amounts.most_common(k) if amount > 0]
+
+
+_default_db = None
+_logs: "OrderedDict[str, IntakeLog]" = OrderedDict()   # user -> log, least recently used first
+_default_lock = threading.Lock()
+
+
+def get_default_db() -> FoodDB:
+    """Process-wide food table, from FOOD_DB or the built-in one."""
+    global _default_db
+    with _default_lock:
+        if _default_db is None:
+            _default_db = FoodDB.load(os.getenv("FOOD_DB") or BUILTIN_FOODS)
+        return _default_db
+
+
+def get_intake_log(user: str) -> IntakeLog:
+    """`user`'s intake log, read from NUTRITION_LOGS the first time it is asked for."""
+    db = get_default_db()
+    with _default_lock:
+        log = _logs.get(user)
+        if log is not None:
+            _logs.move_to_end(user)
+            return log
+        folder = os.getenv("NUTRITION_LOGS", DEFAULT_LOG_DIR)
+        path = None
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, quote(user, safe="") + ".jsonl")
+        log = _logs[user] = IntakeLog(db, path)
+        while len(_logs) > LOG_CACHE:
+            _logs.popitem(last=False)
+        return log
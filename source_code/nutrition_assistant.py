@@ -0,0 +1,139 @@
+from source_code.base_assistant import AIAssistant
+from typing import List, Optional, Tuple
+from source_code.models import Request, Response
+from source_code.conversation import Conversation, Step
+from source_code.nutrition import (COLUMN, DAILY_LIMITS, DAILY_TARGETS, FoodDB, IntakeLog, MealItem, asked_food,
+                                   get_default_db, get_intake_log, grams, is_question, parse_meal, unit)
+from source_code.quota import local_identity
+
+# What the daily summary shows, in order
+SUMMARY = ("calories", "protein", "carbs", "fat", "fiber", "sugar", "sodium")
+
+
+def nutrition_key(identity: Optional[str] = None) -> str:
+    # Logs outlive the session, so like quota buckets they follow who is signed in
+    # (see quota_key), never the display name anyone can type
+    return identity or local_identity()
+
+
+def amount(value: float) -> str:
+    return f"{value:,.0f}" if value >= 10 else f"{value:.1f}".rstrip("0").rstrip(".")
+
+
+def label(nutrient: str) -> str:
+    return nutrient.replace("_", " ")
+
+
+def describe(nutrients, keys=("calories", "protein", "carbs", "fat")) -> str:
+    return " · ".join(f"{amount(nutrients[COLUMN[key]])} {unit(key)} {label(key)}" if key != "calories"
+                      else f"{amount(nutrients[COLUMN[key]])} kcal" for key in keys)
+
+
+class NutritionAssistant(AIAssistant):
+    def greetUser(self) -> str:
+        return f"🥗 Hi {self.user.name}, let’s keep an eye on what fuels you today!"
+
+    def handleRequest(self, request: Request) -> Response:
+        return self.startConversation().run(request, self.io)
+
+    def startConversation(self, state: Optional[dict] = None) -> Conversation:
+        return NutritionConversation(self, state)
+
+    @property
+    def foods(self) -> FoodDB:
+        return get_default_db()
+
+    @property
+    def log(self) -> IntakeLog:
+        return get_intake_log(nutrition_key(self.identity))
+
+    def find_foods(self, items: List[MealItem]) -> Tuple[List[Tuple[MealItem, int]], List[MealItem]]:
+        """Split parsed items into (item, food) pairs that were found and items that were not."""
+        found, unknown = [], []
+        for item in items:
+            food = self.foods.lookup(item.name)
+            if food is None:
+                unknown.append(item)
+            else:
+                found.append((item, food))
+        return found, unknown
+
+    def describe_food(self, text: str) -> Response:
+        items = parse_meal(text)
+        found, _ = self.find_foods(items)
+        if not found:
+            suggestions = self.foods.index.suggest(items[0].name) if items else []
+            hint = f" Did you mean {', '.join(suggestions)}?" if suggestions else ""
+            return self.generateResponse(f"❓ Sorry, I don’t know that food yet.{hint}", confidence=0.6)
+        item, food = found[0]
+        weight = grams(self.foods, food, item)
+        nutrients = self.foods.nutrients(food, weight)
+        return self.generateResponse(
+            f"🔎 {self.foods.names[food].capitalize()} ({amount(weight)} g): {describe(nutrients, SUMMARY)}.")
+
+    def log_meal(self, found: List[Tuple[MealItem, int]], day: int, unknown: List[MealItem] = ()) -> Response:
+        log = self.log
+        lines = ["🍽️ Logged for today:"]
+        alerts = []
+        for item, food in found:
+            weight = grams(self.foods, food, item)
+            alerts += log.add(food, weight, day)
+            lines.append(f"• {self.foods.names[food]} ({amount(weight)} g): {describe(self.foods.nutrients(food, weight))}")
+        for item in unknown:
+            suggestions = self.foods.index.suggest(item.name)
+            hint = f" (did you mean {', '.join(suggestions)}?)" if suggestions else ""
+            lines.append(f"❓ I couldn’t find “{item.name}”{hint}")
+
+        totals = log.day_totals(day)
+        for alert in alerts:
+            # Later items of the same meal may have added more, so quote the total now
+            sources = log.contributors(day, alert.nutrient)
+            lines.append(f"⚠️ That takes you past your daily {label(alert.nutrient)} limit: "
+                         f"{amount(totals[COLUMN[alert.nutrient]])} of {amount(alert.limit)} {unit(alert.nutrient)}."
+                         + (f" Most of it came from {' and '.join(sources)}." if sources else ""))
+
+        parts = []
+        for nutrient in SUMMARY:
+            cap = DAILY_LIMITS.get(nutrient) or DAILY_TARGETS.get(nutrient)
+            value = amount(totals[COLUMN[nutrient]])
+            parts.append(f"{label(nutrient)} {value}/{amount(cap)} {unit(nutrient)}" if cap else f"{label(nutrient)} {value} {unit(nutrient)}")
+        lines.append("📊 Today so far: " + " · ".join(parts))
+
+        # The target furthest from being met, with foods that help most per calorie
+        share, nutrient = min((totals[COLUMN[n]] / target, n) for n, target in DAILY_TARGETS.items())
+        if share < 1:
+            *others, last = self.foods.richest_in(nutrient)
+            lines.append(f"💡 Low on {label(nutrient)} so far: {', '.join(others)} and {last} are rich in it.")
+        return self.generateResponse("\n".join(lines))
+
+
+class NutritionConversation(Conversation):
+    # Step 1: Log what the request already names, or ask what was eaten
+    def begin(self, request: Request) -> Step:
+        self.state["day"] = request.timestamp.date().toordinal()
+        text = request.input_str
+        if is_question(text):
+            return self.finish(self.assistant.describe_food(asked_food(text)))
+        found, unknown = self.assistant.find_foods(parse_meal(text))
+        if found:
+            return self.finish(self.assistant.log_meal(found, self.state["day"], unknown))
+        self.state["attempts"] = 0
+        return self.ask_meal()
+
+    def ask_meal(self) -> Step:
+        return self.ask("🥗 What did you eat? (e.g., 2 eggs, 150 g rice and a banana)\n🍽️ Your answer: ", "meal")
+
+    # Step 2: Log the answer
+    def step_meal(self, reply: str) -> Step:
+        items = parse_meal(reply)
+        found, unknown = self.assistant.find_foods(items)
+        if found:
+            return self.finish(self.assistant.log_meal(found, self.state["day"], unknown))
+
+        self.state["attempts"] += 1
+        suggestions = self.assistant.foods.index.suggest(items[0].name) if items else []
+        if self.state["attempts"] >= 2:
+            return self.finish(self.assistant.generateResponse(
+                "🤔 I couldn’t match that to a food I know. Try simple names like “chicken”, “rice” or “apple”."))
+        self.say("❓ I couldn’t find that food." + (f" Did you mean {', '.join(suggestions)}?" if suggestions else ""))
+        return self.ask_meal()
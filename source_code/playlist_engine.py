@@ -0,0 +1,351 @@
+"""Nearest-neighbour playlists over a local track catalog, for MusicAssistant.
+
+Every track is a point in (tempo, energy, valence, acousticness) space. A
+mood, activity or artist becomes a target point, and a playlist is the k
+tracks closest to it by cosine similarity. Build the engine once from a CSV
+or JSONL dump with `title`, `artist`, `tempo` (BPM) and `energy`,
+`valence`, `acousticness` (0-1):
+
+    PYTHONPATH=. python source_code/playlist_engine.py build tracks.csv
+    PYTHONPATH=. python source_code/playlist_engine.py mood calm
+
+The engine is a directory (MUSIC_INDEX, default ~/.ai_assistant_music):
+
+    meta.json           track count, feature mean/std, IVF settings
+    features.npy        float32 (tracks, 4), standardised and unit length
+    tracks.jsonl        title/artist per track, one line each
+    track_offsets.npy   byte offset of every line in tracks.jsonl
+    artists.npy         every artist (lower-cased), sorted
+    artist_starts.npy   where each artist's tracks start in artist_tracks.npy
+    artist_tracks.npy   track ids grouped by artist
+    centroids.npy       IVF cells (catalogs of IVF_MIN tracks or more) ...
+    cell_starts.npy     ... where each cell starts in cell_tracks.npy
+    cell_tracks.npy     ... and the track ids grouped by cell
+
+All arrays are memory-mapped, so a worker starts without parsing the catalog.
+Features are standardised before normalising, so cosine similarity compares
+how a track differs from the average track rather than raw magnitudes. Big
+catalogs also get an inverted-file (IVF) index: tracks are clustered with
+spherical k-means and a query only scores the NPROBE cells nearest to it.
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from array import array
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from source_code.book_index import read_records
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".ai_assistant_music")
+FEATURES = ("tempo", "energy", "valence", "acousticness")
+IVF_MIN = 200_000   # smaller catalogs are scanned exactly
+NPROBE = 8
+PER_ARTIST = 2      # at most this many tracks by one artist in a playlist
+
+# Target (tempo, energy, valence, acousticness) for every keyword in MUSIC_CATALOG
+MOOD_TARGETS = {
+    "tense": (80, 0.3, 0.4, 0.7),
+    "gloomy": (75, 0.3, 0.2, 0.6),
+    "fun": (122, 0.8, 0.85, 0.15),
+    "energetic": (135, 0.9, 0.7, 0.05),
+    "gentle": (85, 0.25, 0.6, 0.85),
+    "romantic": (95, 0.45, 0.7, 0.5),
+    "calm": (80, 0.2, 0.55, 0.75),
+    "relax": (75, 0.2, 0.5, 0.7),
+    "depressed": (70, 0.25, 0.15, 0.6),
+    "chill": (90, 0.35, 0.55, 0.5),
+    "happy": (118, 0.75, 0.9, 0.2),
+    "sad": (72, 0.3, 0.15, 0.55),
+    "worry": (78, 0.3, 0.35, 0.65),
+    "anxious": (76, 0.25, 0.4, 0.75),
+    "stressed": (78, 0.25, 0.45, 0.7),
+    "overwhelmed": (72, 0.2, 0.45, 0.85),
+    "excited": (128, 0.9, 0.85, 0.1),
+    "confident": (110, 0.8, 0.7, 0.1),
+    "motivated": (125, 0.85, 0.65, 0.05),
+    "inspired": (105, 0.6, 0.7, 0.35),
+    "grateful": (100, 0.5, 0.8, 0.5),
+    "focused": (90, 0.35, 0.5, 0.6),
+    "productive": (105, 0.5, 0.6, 0.4),
+    "studying": (85, 0.25, 0.5, 0.7),
+    "background": (85, 0.25, 0.5, 0.65),
+    "lonely": (75, 0.3, 0.25, 0.65),
+    "broken": (70, 0.3, 0.2, 0.6),
+    "insecure": (85, 0.35, 0.45, 0.6),
+    "burnout": (70, 0.2, 0.45, 0.8),
+    "defeated": (95, 0.55, 0.4, 0.3),
+    "nostalgic": (100, 0.5, 0.6, 0.45),
+    "dreamy": (85, 0.3, 0.55, 0.55),
+    "romanticized": (95, 0.45, 0.6, 0.5),
+    "artistic": (95, 0.4, 0.55, 0.55),
+    "in love": (100, 0.5, 0.85, 0.45),
+    "kpop": (125, 0.85, 0.75, 0.1),
+}
+ACTIVITY_TARGETS = {
+    "study": (85, 0.25, 0.5, 0.7),
+    "run": (165, 0.9, 0.65, 0.05),
+    "clean": (118, 0.75, 0.8, 0.2),
+    "sleep": (65, 0.1, 0.4, 0.9),
+    "drive": (115, 0.7, 0.7, 0.2),
+    "cook": (108, 0.6, 0.8, 0.35),
+    "work out": (135, 0.9, 0.6, 0.05),
+    "shower": (120, 0.75, 0.85, 0.2),
+}
+
+
+class Track(NamedTuple):
+    title: str
+    artist: str
+    score: float
+
+
+def build_engine(source: str, out_dir: str = DEFAULT_PATH, ivf: Optional[bool] = None, seed: int = 0) -> dict:
+    """Turn the tracks in `source` into an engine in `out_dir`; returns the contents of meta.json.
+
+    `ivf` forces the approximate index on or off; by default only catalogs of
+    IVF_MIN tracks or more get one.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    values = array("f")
+    artists: List[str] = []
+    offsets = array("q", [0])
+    skipped = 0
+
+    # Step 1: stream the dump, keeping only tracks with all four features
+    with open(os.path.join(out_dir, "tracks.jsonl"), "wb") as tracks:
+        for record in read_records(source):
+            try:
+                row = [float(record[name]) for name in FEATURES]
+            except (KeyError, TypeError, ValueError):
+                skipped += 1
+                continue
+            values.extend(row)
+            artist = str(record.get("artist") or "").strip()
+            artists.append(artist.lower())
+            line = json.dumps({"title": str(record.get("title") or "").strip(), "artist": artist},
+                              ensure_ascii=False).encode("utf-8") + b"\n"
+            tracks.write(line)
+            offsets.append(offsets[-1] + len(line))
+
+    # Step 2: standardise, then scale to unit length so a dot product is the cosine
+    features = np.frombuffer(values, dtype=np.float32).reshape(-1, len(FEATURES))
+    count = len(features)
+    mean = features.mean(axis=0) if count else np.zeros(len(FEATURES), np.float32)
+    std = features.std(axis=0) if count else np.ones(len(FEATURES), np.float32)
+    std[std == 0] = 1
+    features = unit_rows((features - mean) / std)
+    np.save(os.path.join(out_dir, "features.npy"), features)
+    np.save(os.path.join(out_dir, "track_offsets.npy"), np.frombuffer(offsets, dtype=np.int64))
+
+    # Step 3: group tracks by artist
+    names = np.array(artists or [""], dtype=str)[:count]
+    order = np.argsort(names, kind="stable")
+    unique, starts = np.unique(names[order], return_index=True)
+    np.save(os.path.join(out_dir, "artists.npy"), unique)
+    np.save(os.path.join(out_dir, "artist_starts.npy"), np.append(starts, count).astype(np.int64))
+    np.save(os.path.join(out_dir, "artist_tracks.npy"), order.astype(np.int32))
+
+    # Step 4: the approximate index
+    cells = 0
+    if ivf if ivf is not None else count >= IVF_MIN:
+        centroids, assignment = spherical_kmeans(features, int(np.sqrt(count)), seed=seed)
+        cells = len(centroids)
+        order = np.argsort(assignment, kind="stable")
+        starts = np.searchsorted(assignment[order], np.arange(cells + 1))
+        np.save(os.path.join(out_dir, "centroids.npy"), centroids)
+        np.save(os.path.join(out_dir, "cell_starts.npy"), starts.astype(np.int64))
+        np.save(os.path.join(out_dir, "cell_tracks.npy"), order.astype(np.int32))
+
+    meta = {"tracks": count, "skipped": skipped, "features": list(FEATURES),
+            "mean": [float(v) for v in mean], "std": [float(v) for v in std], "ivf_cells": cells}
+    # Written last: a directory without meta.json is not an engine
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return (matrix / norms).astype(np.float32)
+
+
+def spherical_kmeans(points: np.ndarray, cells: int, iterations: int = 10, sample: int = 50_000, seed: int = 0):
+    """Cluster unit vectors by cosine; returns (unit centroids, cell of every point)."""
+    rng = np.random.default_rng(seed)
+    cells = max(1, min(cells, len(points)))
+    # Train on a sample: the centroids settle long before every point is seen
+    train = points[rng.choice(len(points), size=min(sample, len(points)), replace=False)]
+    centroids = train[rng.choice(len(train), size=cells, replace=False)]
+    for _ in range(iterations):
+        nearest = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, nearest, train)
+        empty = ~sums.any(axis=1)
+        # A cell that lost all its points restarts at a random point
+        sums[empty] = train[rng.choice(len(train), size=int(empty.sum()))]
+        centroids = unit_rows(sums)
+
+    assignment = np.empty(len(points), dtype=np.int32)
+    for start in range(0, len(points), 100_000):
+        assignment[start:start + 100_000] = np.argmax(points[start:start + 100_000] @ centroids.T, axis=1)
+    return centroids, assignment
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first (ties: lowest position first)."""
+    if len(scores) > k:
+        top = np.flatnonzero(scores >= np.partition(scores, -k)[-k])
+    else:
+        top = np.arange(len(scores))
+    return top[np.lexsort((top, -scores[top]))][:k]
+
+
+class PlaylistEngine:
+    def __init__(self, path: str = DEFAULT_PATH):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.mean = np.array(self.meta["mean"], dtype=np.float32)
+        self.std = np.array(self.meta["std"], dtype=np.float32)
+
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        self.features = load("features.npy")
+        self.offsets = load("track_offsets.npy")
+        self.artists = load("artists.npy")
+        self.artist_starts = load("artist_starts.npy")
+        self.artist_tracks = load("artist_tracks.npy")
+        self.centroids = load("centroids.npy") if self.meta["ivf_cells"] else None
+        if self.centroids is not None:
+            self.cell_starts = load("cell_starts.npy")
+            self.cell_tracks = load("cell_tracks.npy")
+        with open(os.path.join(path, "tracks.jsonl"), "rb") as f:
+            self._tracks = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.meta["tracks"] else b""
+
+    @staticmethod
+    def exists(path: str = DEFAULT_PATH) -> bool:
+        return os.path.exists(os.path.join(path, "meta.json"))
+
+    def track(self, track_id: int) -> dict:
+        return json.loads(self._tracks[int(self.offsets[track_id]):int(self.offsets[track_id + 1])])
+
+    def target(self, features: Sequence[float]) -> np.ndarray:
+        """Raw (tempo, energy, valence, acousticness) -> a unit query vector."""
+        return unit_rows((np.asarray(features, dtype=np.float32) - self.mean) / self.std)
+
+    def artist_tracks_of(self, artist: str) -> np.ndarray:
+        artist = artist.lower()
+        i = int(np.searchsorted(self.artists, artist))
+        if i < len(self.artists) and self.artists[i] == artist:
+            return self.artist_tracks[int(self.artist_starts[i]):int(self.artist_starts[i + 1])]
+        return self.artist_tracks[:0]
+
+    def nearest(self, query: np.ndarray, k: int = 10, exact: bool = False,
+                per_artist: int = PER_ARTIST, skip_artist: str = "") -> List[Track]:
+        """Up to k tracks most similar to the unit vector `query`, best first.
+
+        Tracks facing away from the query (cosine <= 0) are never returned.
+        """
+        if self.centroids is not None and not exact:
+            cells = top_k(self.centroids @ query, NPROBE)
+            candidates = np.concatenate([self.cell_tracks[self.cell_starts[c]:self.cell_starts[c + 1]] for c in cells])
+            scores = self.features[candidates] @ query
+        else:
+            candidates = None
+            scores = self.features @ query
+
+        # Over-fetch, then cap each artist so one back catalog can't fill the list
+        picks, per = [], {}
+        for i in top_k(scores, k * 4 if per_artist else k):
+            track_id = int(candidates[i]) if candidates is not None else int(i)
+            if scores[i] <= 0:
+                break
+            track = self.track(track_id)
+            seen = per.get(track["artist"], 0)
+            if per_artist and seen >= per_artist or track["artist"].lower() == skip_artist:
+                continue
+            per[track["artist"]] = seen + 1
+            picks.append(Track(track["title"], track["artist"], float(scores[i])))
+            if len(picks) == k:
+                break
+        return picks
+
+    def for_mood(self, mood: str, k: int = 10) -> List[Track]:
+        target = MOOD_TARGETS.get(mood)
+        return self.nearest(self.target(target), k) if target else []
+
+    def for_activity(self, activity: str, k: int = 10) -> List[Track]:
+        target = ACTIVITY_TARGETS.get(activity)
+        return self.nearest(self.target(target), k) if target else []
+
+    def for_artist(self, artist: str, k: int = 10) -> List[Track]:
+        """The artist's most typical tracks, then other artists' tracks that sound like them."""
+        own = np.sort(self.artist_tracks_of(artist))
+        if not len(own):
+            return []
+        query = unit_rows(self.features[own].mean(axis=0))
+        scores = self.features[own] @ query
+        picks = []
+        for i in top_k(scores, PER_ARTIST):
+            track = self.track(int(own[i]))
+            picks.append(Track(track["title"], track["artist"], float(scores[i])))
+        if len(picks) >= k:
+            return picks[:k]
+        return picks + self.nearest(query, k - len(picks), skip_artist=artist.lower())
+
+
+_default_engine = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def get_default_engine() -> Optional[PlaylistEngine]:
+    """The engine at MUSIC_INDEX, or None when none has been built."""
+    global _default_engine, _default_loaded
+    with _default_lock:
+        if not _default_loaded:
+            path = os.getenv("MUSIC_INDEX", DEFAULT_PATH)
+            _default_engine = PlaylistEngine(path) if path and PlaylistEngine.exists(path) else None
+            _default_loaded = True
+        return _default_engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the playlist engine.")
+    parser.add_argument("--index", default=os.getenv("MUSIC_INDEX", DEFAULT_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="load a .csv or .jsonl track dump")
+    build.add_argument("source")
+    build.add_argument("--ivf", action=argparse.BooleanOptionalAction, default=None,
+                       help=f"build the approximate index (default: for {IVF_MIN}+ tracks)")
+    for kind in ("mood", "activity", "artist"):
+        query = commands.add_parser(kind, help=f"show a playlist for a {kind}")
+        query.add_argument("keyword")
+        query.add_argument("-k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        meta = build_engine(args.source, args.index, ivf=args.ivf)
+        print(f"Loaded {meta['tracks']} tracks ({meta['skipped']} skipped, {meta['ivf_cells']} IVF cells) "
+              f"into {args.index} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        return
+
+    engine = PlaylistEngine(args.index)
+    start = time.perf_counter()
+    tracks = getattr(engine, f"for_{args.command}")(args.keyword.lower(), args.k)
+    elapsed = (time.perf_counter() - start) * 1000
+    for rank, track in enumerate(tracks, 1):
+        print(f"{rank}. {track.title} – {track.artist}  ({track.score:.3f})")
+    print(f"{len(tracks)} tracks in {elapsed:.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
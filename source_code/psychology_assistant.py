@@ -1,60 +1,29 @@
 from source_code.base_assistant import AIAssistant
+from typing import Optional
 from source_code.models import Request, Response
+from source_code.conversation import Conversation, Step
 import random
 
+GOODBYES = [
+    "🌼 Be kind to yourself. You’re doing better than you think.",
+    "🫶 You’re not alone — I’ll always be here when you need someone to talk to.",
+    "☀️ Take it one moment at a time. I believe in you."
+    "🌈 Take gentle care of yourself — I’ll be here whenever you need someone to talk to.",
+    "💛 You did great opening up today. I'm proud of you. Come back anytime, okay?",
+    "🌻 You’re not alone. Even small steps forward matter. I’m always here when you need me.",
+    "🫶 Wishing you peace and comfort today. Come back anytime — I’ll be here for you.",
+    "🌟 You’ve got this. Remember to rest, breathe, and be kind to yourself. Talk soon!"
+]
+
 class PsychologyAssistant(AIAssistant):
     def greetUser(self) -> str:
         return f"🧠 Hello {self.user.name}, I’m here to listen and help however I can."
 
     def handleRequest(self, request: Request) -> Response:
-        while True:
-            print("💭 What’s been on your mind lately? What’s been weighing your heart?")
-            for attempt in range(3):
-                user_input = input("Your answer: ").strip().lower()
-
-                if not user_input or len(user_input.split()) < 3:
-                    print("🧐 Hmm… I didn’t quite catch that. Could you share a bit more?")
-                    continue
-
-                print("\n" + random.choice([
-                    "💬 Thank you for opening up. Let’s work through this together.",
-                    "🤝 I’m really glad you shared that. It’s okay to feel this way.",
-                    "🌱 You’re not alone — your feelings are valid, and I’m here for you."
-                ]))
-
-                print("\nWould you like me to just listen more, or offer some advice to help you cope?")
-                follow_up = input("Type 'listen' or 'advice': ").strip().lower()
-
-                if "advice" in follow_up:
-                    print("🤖 " + self.offer_coping_advice().message)
-                elif "listen" in follow_up:
-                    print("🧏 I’m here, feel free to share more if you’d like.")
-                else:
-                    print("❓ I’m not sure what you meant — I’ll just be here if you want to talk.")
-
-                break  # exit retry loop after a successful entry
-
-            # Ask if they want to continue talking
-            print("\n🫂 Would you like to share anything else or keep talking?")
-            more = input("Your answer (yes/no): ").strip().lower()
-
-            if more in ["no", "n"]:
-                goodbye_msg = random.choice([
-                    "🌼 Be kind to yourself. You’re doing better than you think.",
-                    "🫶 You’re not alone — I’ll always be here when you need someone to talk to.",
-                    "☀️ Take it one moment at a time. I believe in you."
-                    "🌈 Take gentle care of yourself — I’ll be here whenever you need someone to talk to.",
-                    "💛 You did great opening up today. I'm proud of you. Come back anytime, okay?",
-                    "🌻 You’re not alone. Even small steps forward matter. I’m always here when you need me.",
-                    "🫶 Wishing you peace and comfort today. Come back anytime — I’ll be here for you.",
-                    "🌟 You’ve got this. Remember to rest, breathe, and be kind to yourself. Talk soon!"
-                ])
-                return self.generateResponse(goodbye_msg)
-            elif more in ["yes", "y"]:
-                print("🧠 Of course, I'm listening.")
-                continue
-            else:
-                return self.generateResponse("💛 Whether you’d like to keep talking or just take a break — I’m always here when you need me.")
+        return self.startConversation().run(request, self.io)
+
+    def startConversation(self, state: Optional[dict] = None) -> Conversation:
+        return PsychologyConversation(self, state)
 
     def offer_coping_advice(self) -> Response:
         tips = [
@@ -79,4 +48,60 @@ class PsychologyAssistant(AIAssistant):
             "Repeat to yourself: ‘This feeling is temporary. I can get through this.’",
             "If you can’t fix the problem now, be kind to your body — stretch, drink water, or rest. That’s healing too."
         ]
-        return self.generateResponse(f"🧘 Here’s a gentle suggestion that might help:\n{random.choice(tips)}")
\ No newline at end of file
+        return self.generateResponse(f"🧘 Here’s a gentle suggestion that might help:\n{random.choice(tips)}")
+
+class PsychologyConversation(Conversation):
+    def begin(self, request: Request) -> Step:
+        return self.ask_share()
+
+    def ask_share(self) -> Step:
+        self.say("💭 What’s been on your mind lately? What’s been weighing your heart?")
+        self.state["attempts"] = 0
+        return self.ask("Your answer: ", "share")
+
+    def step_share(self, reply: str) -> Step:
+        user_input = reply.strip().lower()
+
+        if not user_input or len(user_input.split()) < 3:
+            self.say("🧐 Hmm… I didn’t quite catch that. Could you share a bit more?")
+            self.state["attempts"] += 1
+            if self.state["attempts"] < 3:
+                return self.ask("Your answer: ", "share")
+            return self.ask_more()
+
+        self.say("\n" + random.choice([
+            "💬 Thank you for opening up. Let’s work through this together.",
+            "🤝 I’m really glad you shared that. It’s okay to feel this way.",
+            "🌱 You’re not alone — your feelings are valid, and I’m here for you."
+        ]))
+
+        self.say("\nWould you like me to just listen more, or offer some advice to help you cope?")
+        return self.ask("Type 'listen' or 'advice': ", "listen_or_advice")
+
+    def step_listen_or_advice(self, reply: str) -> Step:
+        follow_up = reply.strip().lower()
+
+        if "advice" in follow_up:
+            self.say("🤖 " + self.assistant.offer_coping_advice().message)
+        elif "listen" in follow_up:
+            self.say("🧏 I’m here, feel free to share more if you’d like.")
+        else:
+            self.say("❓ I’m not sure what you meant — I’ll just be here if you want to talk.")
+        return self.ask_more()
+
+    # Ask if they want to continue talking
+    def ask_more(self) -> Step:
+        self.say("\n🫂 Would you like to share anything else or keep talking?")
+        return self.ask("Your answer (yes/no): ", "more")
+
+    def step_more(self, reply: str) -> Step:
+        more = reply.strip().lower()
+
+        if more in ["no", "n"]:
+            goodbye_msg = random.choice(GOODBYES)
+            return self.finish(self.assistant.generateResponse(goodbye_msg))
+        elif more in ["yes", "y"]:
+            self.say("🧠 Of course, I'm listening.")
+            return self.ask_share()
+        else:
+            return self.finish(self.assistant.generateResponse("💛 Whether you’d like to keep talking or just take a break — I’m always here when you need me."))
@@ -0,0 +1,216 @@
+"""Request quotas for free and premium users, shared between processes.
+
+Every (user, tier) has a token bucket: `capacity` tokens that refill evenly
+over `window` seconds. A request spends tokens according to its CommandType,
+so a tier can make Gemini-backed GENERAL turns cost more than the others.
+A tier with no capacity is unlimited.
+
+With a path, buckets live in SQLite and check-and-consume is one UPDATE ...
+RETURNING statement, so two workers can never both spend the last token.
+Without one they live in memory. Either way the hot path stays in memory
+where it can: unlimited tiers never touch the store, and a bucket seen
+empty is refused from its cached snapshot until enough tokens are due
+(other workers can only have spent more since).
+
+Configuration (read by get_default_quota):
+    QUOTA_PATH           SQLite file shared by all workers ("" keeps quotas in memory)
+    QUOTA_FREE_LIMIT     requests a free user gets per window (default 3)
+    QUOTA_FREE_WINDOW    seconds until a used-up free quota is full again (default 86400)
+    QUOTA_FREE_COSTS     per-CommandType costs, e.g. "GENERAL=2,MUSIC=1" (default 1 each)
+    QUOTA_PREMIUM_LIMIT  same for premium users (default 0 = unlimited)
+"""
+import getpass
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from source_code.models import CommandType, UserProfile
+
+# Request limit for free users; premium users can ask unlimitedly
+FREE_LIMIT = 3
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".ai_assistant_quota.sqlite3")
+
+
+@dataclass(frozen=True)
+class Tier:
+    capacity: Optional[float]           # None: unlimited
+    window: float = 86400.0             # seconds for an empty bucket to refill completely
+    costs: Mapping[CommandType, float] = field(default_factory=dict)
+    default_cost: float = 1.0
+
+    def cost(self, command_type: Optional[CommandType]) -> float:
+        return self.costs.get(command_type, self.default_cost)
+
+    @property
+    def min_cost(self) -> float:
+        return min([self.default_cost, *self.costs.values()])
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.window
+
+
+DEFAULT_TIERS = {
+    "free": Tier(capacity=FREE_LIMIT),
+    "premium": Tier(capacity=None),
+}
+
+
+class QuotaResult(NamedTuple):
+    allowed: bool
+    remaining: Optional[float]   # tokens left after this request; None when unlimited
+    retry_after: float           # seconds until the request would be allowed
+
+
+def local_identity() -> str:
+    # The console and GUI have no login of their own; the OS account is the user, whatever name they type
+    try:
+        return "local:" + getpass.getuser()
+    except Exception:   # no login name, e.g. in some containers
+        return "local"
+
+
+def quota_key(user: UserProfile, identity: Optional[str] = None) -> Tuple[str, str]:
+    """(user key, tier name) for a profile.
+
+    Buckets follow `identity` (default: the local OS account), never the
+    display name: two people called "Lien" must not share one, and typing a
+    new name must not refill it.
+    """
+    return identity or local_identity(), "premium" if user.isPremium else "free"
+
+
+class QuotaEngine:
+    def __init__(self, tiers: Optional[Mapping[str, Tier]] = None, path: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        self.tiers = dict(tiers or DEFAULT_TIERS)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}   # bucket -> (tokens, updated); the store without a path
+        self._empty: Dict[str, Tuple[float, float]] = {}     # bucket -> last snapshot that refused a request
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+            # WAL lets workers read while one writes; NORMAL sync skips the fsync on every spend
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS quota (bucket TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    @staticmethod
+    def bucket(key: str, tier_name: str) -> str:
+        return f"{tier_name}:{key}"
+
+    @staticmethod
+    def refill(tier: Tier, tokens: float, updated: float, now: float) -> float:
+        return min(tier.capacity, tokens + max(0.0, now - updated) * tier.rate)
+
+    def consume(self, key: str, tier_name: str, command_type: Optional[CommandType] = None) -> QuotaResult:
+        """Atomically spend the cost of `command_type` if the bucket holds enough."""
+        tier = self.tiers[tier_name]
+        if tier.capacity is None:
+            return QuotaResult(True, None, 0.0)
+
+        cost = tier.cost(command_type)
+        bucket = self.bucket(key, tier_name)
+        now = self.clock()
+        with self._lock:
+            # Fast path: refused recently and not enough refilled since
+            snapshot = self._empty.get(bucket)
+            if snapshot is not None:
+                tokens = self.refill(tier, *snapshot, now)
+                if tokens < cost:
+                    return QuotaResult(False, tokens, (cost - tokens) / tier.rate)
+                del self._empty[bucket]
+
+            if self._db is None:
+                tokens = self.refill(tier, *self._buckets.get(bucket, (tier.capacity, now)), now)
+                if tokens >= cost:
+                    self._buckets[bucket] = (tokens - cost, now)
+                    return QuotaResult(True, tokens - cost, 0.0)
+                self._buckets[bucket] = (tokens, now)
+            else:
+                self._db.execute("INSERT OR IGNORE INTO quota (bucket, tokens, updated) VALUES (?, ?, ?)",
+                                 (bucket, tier.capacity, now))
+                row = self._db.execute(
+                    "UPDATE quota SET tokens = min(:cap, tokens + max(0, :now - updated) * :rate) - :cost, updated = :now "
+                    "WHERE bucket = :bucket AND min(:cap, tokens + max(0, :now - updated) * :rate) >= :cost "
+                    "RETURNING tokens",
+                    {"cap": tier.capacity, "now": now, "rate": tier.rate, "cost": cost, "bucket": bucket},
+                ).fetchone()
+                if row is not None:
+                    return QuotaResult(True, row[0], 0.0)
+                tokens = self.refill(tier, *self._db.execute(
+                    "SELECT tokens, updated FROM quota WHERE bucket = ?", (bucket,)).fetchone(), now)
+
+            self._empty[bucket] = (tokens, now)
+            return QuotaResult(False, tokens, (cost - tokens) / tier.rate)
+
+    def remaining(self, key: str, tier_name: str) -> Optional[float]:
+        """Tokens available right now, without spending any; None when unlimited."""
+        tier = self.tiers[tier_name]
+        if tier.capacity is None:
+            return None
+        bucket = self.bucket(key, tier_name)
+        now = self.clock()
+        with self._lock:
+            if self._db is None:
+                state = self._buckets.get(bucket)
+            else:
+                state = self._db.execute("SELECT tokens, updated FROM quota WHERE bucket = ?", (bucket,)).fetchone()
+        return tier.capacity if state is None else self.refill(tier, *state, now)
+
+    def exhausted(self, key: str, tier_name: str) -> bool:
+        """True when not even the cheapest request fits."""
+        remaining = self.remaining(key, tier_name)
+        return remaining is not None and remaining < self.tiers[tier_name].min_cost
+
+    def reset(self, key: str, tier_name: str):
+        bucket = self.bucket(key, tier_name)
+        with self._lock:
+            self._empty.pop(bucket, None)
+            self._buckets.pop(bucket, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM quota WHERE bucket = ?", (bucket,))
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def parse_costs(text: str) -> Dict[CommandType, float]:
+    """"GENERAL=2,MUSIC=1" -> {CommandType.GENERAL: 2.0, CommandType.MUSIC: 1.0}"""
+    costs = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, value = item.partition("=")
+        costs[CommandType(name.strip().upper())] = float(value)
+    return costs
+
+
+def tier_from_env(prefix: str, default_limit: float) -> Tier:
+    limit = float(os.getenv(f"{prefix}_LIMIT", default_limit))
+    return Tier(
+        capacity=limit or None,
+        window=float(os.getenv(f"{prefix}_WINDOW", 86400)),
+        costs=parse_costs(os.getenv(f"{prefix}_COSTS", "")),
+    )
+
+
+_default_quota = None
+_default_quota_lock = threading.Lock()
+
+
+def get_default_quota() -> QuotaEngine:
+    """Process-wide quota engine configured from the environment."""
+    global _default_quota
+    with _default_quota_lock:
+        if _default_quota is None:
+            _default_quota = QuotaEngine(
+                tiers={"free": tier_from_env("QUOTA_FREE", FREE_LIMIT), "premium": tier_from_env("QUOTA_PREMIUM", 0)},
+                path=os.getenv("QUOTA_PATH", DEFAULT_PATH) or None,
+            )
+        return _default_quota
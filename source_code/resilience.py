@@ -0,0 +1,383 @@
+"""Retries, hedged requests and a circuit breaker around GeminiClient.
+
+ResilientClient has the same generate/agenerate/stream interface as
+GeminiClient, so gemini_api and the server use it without other changes:
+
+    client = ResilientClient(GeminiClient(), hedge=HedgePolicy())
+    answer = client.generate("tell me a joke")
+
+- Retries: timeouts, connection errors and retryable statuses (429, 5xx) are
+  tried again after a jittered exponential delay ("full jitter"), so clients
+  that failed together do not all come back at the same moment. The deadline
+  covers the whole call: each attempt only gets what is left of it, and no
+  retry is made once the delay would use up the rest.
+- Hedging: once enough answers have been timed, a call still running after
+  the p95 latency gets a second, identical request; the first answer wins.
+  It costs at most one extra request per slow call and cuts the tail.
+- Circuit breaker: after `failure_threshold` failed attempts in a row the
+  breaker opens and calls fail at once with CircuitOpenError (gemini_api
+  turns that into FALLBACK_ANSWER) instead of each waiting out a timeout.
+  After `reset_timeout` seconds one probe call is let through; its success
+  closes the breaker again.
+
+Environment: GEMINI_RETRIES (attempts, default 3), GEMINI_HEDGE (1 to hedge),
+GEMINI_BREAKER_FAILURES (default 5), GEMINI_BREAKER_RESET (seconds, default 30).
+Try them against the fault-injecting stub:
+    PYTHONPATH=. python source_code/gemini_stub.py --fail-rate 0.3 --slow-rate 0.05
+"""
+import asyncio
+import bisect
+import concurrent.futures
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Iterator, Optional
+
+from source_code.gemini_client import GeminiClient, GeminiConnectionError, GeminiError, GeminiTimeout, get_default_client
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+FALLBACK_ANSWER = ("🛠️ My general-knowledge helper is having trouble right now, so I can't answer that one. "
+                   "I can still help with music, fitness, studying, books or how you're feeling. "
+                   "Please try your question again in a little while.")
+
+
+class CircuitOpenError(GeminiError):
+    """The breaker is open: the call was not attempted."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failure says the upstream is unhealthy (as opposed to a bad request)."""
+    if isinstance(error, (GeminiTimeout, GeminiConnectionError)):
+        return True
+    return isinstance(error, GeminiError) and error.status in RETRY_STATUSES
+
+
+class RetryPolicy:
+    def __init__(self, attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0,
+                 rng: Optional[random.Random] = None):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number `attempt` (0 = the first retry)."""
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class HedgePolicy:
+    """Sends a second request once a call has taken longer than the recent p95."""
+
+    def __init__(self, quantile: float = 0.95, min_samples: int = 20, min_delay: float = 0.05, window: int = 256):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._recent = deque(maxlen=window)   # latencies in arrival order
+        self._sorted = []                     # the same latencies, sorted
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                oldest = self._recent[0]
+                del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+            self._recent.append(seconds)
+            bisect.insort(self._sorted, seconds)
+
+    def delay(self) -> Optional[float]:
+        """How long to wait before hedging, or None until enough calls have been timed."""
+        with self._lock:
+            if len(self._sorted) < self.min_samples:
+                return None
+            p = self._sorted[min(len(self._sorted) - 1, int(len(self._sorted) * self.quantile))]
+        return max(self.min_delay, p)
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                # Exactly one probe at a time; everyone else keeps failing fast
+                self._probing = True
+                return
+        raise CircuitOpenError("Gemini is unavailable right now")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release(self):
+        """The call was abandoned (cancelled or closed) before it said anything about health."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+            self._probing = False
+
+
+class ResilienceStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.hedges = 0        # second requests sent
+        self.hedge_wins = 0    # ... that answered first
+        self.short_circuits = 0
+
+    def count(self, name: str):
+        """Add one to a counter; calls from several threads would otherwise lose updates."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self, breaker: CircuitBreaker) -> dict:
+        with self._lock:
+            counts = {
+                "calls": self.calls,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "short_circuits": self.short_circuits,
+            }
+        return {**counts, "breaker": breaker.state}
+
+
+class ResilientClient:
+    def __init__(self, client: GeminiClient, retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None, hedge: Optional[HedgePolicy] = None):
+        self.client = client
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.stats = ResilienceStats()
+
+    @property
+    def model(self) -> str:
+        return self.client.model
+
+    def _start_attempt(self):
+        try:
+            self.breaker.check()
+        except CircuitOpenError:
+            self.stats.count("short_circuits")
+            raise
+        self.stats.count("attempts")
+
+    def _failed(self, error: Exception, attempt: int, remaining: float) -> Optional[float]:
+        """Record a failed attempt; return the delay before retrying, or None to give up.
+
+        `remaining` is what is left of the call's deadline: a retry that could
+        only start after it is not made.
+        """
+        if not is_retryable(error):
+            # The request was at fault, not the upstream
+            self.breaker.record_success()
+            return None
+        self.breaker.record_failure()
+        if attempt + 1 >= self.retry.attempts:
+            return None
+        delay = self.retry.delay(attempt)
+        if delay >= remaining:
+            return None
+        self.stats.count("retries")
+        return delay
+
+    def _won(self, started: float, hedged: bool):
+        if hedged:
+            self.stats.count("hedge_wins")
+        if self.hedge is not None:
+            self.hedge.observe(time.monotonic() - started)
+
+    # Blocking
+
+    def generate(self, question: str, deadline: Optional[float] = None) -> Optional[str]:
+        self.stats.count("calls")
+        give_up_at = time.monotonic() + (deadline or self.client.timeout)
+        for attempt in range(self.retry.attempts):
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                raise GeminiTimeout("Request timed out")
+            self._start_attempt()
+            try:
+                answer = self._hedged(question, remaining)
+            except Exception as e:
+                delay = self._failed(e, attempt, give_up_at - time.monotonic())
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return answer
+
+    def _hedged(self, question: str, deadline: float) -> Optional[str]:
+        started = time.monotonic()
+        first = self.client.submit(question, deadline)
+        futures = [first]
+        hedge_after = self.hedge.delay() if self.hedge is not None else None
+        if hedge_after is not None and hedge_after < deadline:
+            done, _ = concurrent.futures.wait(futures, timeout=hedge_after)
+            if not done:
+                futures.append(self.client.submit(question, deadline - hedge_after))
+                self.stats.count("hedges")
+
+        error = None
+        while futures:
+            remaining = deadline - (time.monotonic() - started)
+            done, _ = concurrent.futures.wait(futures, timeout=max(0.0, remaining),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    for other in futures:
+                        other.cancel()
+                    self._won(started, future is not first)
+                    return future.result()
+                error = future.exception()
+        for future in futures:
+            future.cancel()
+        raise error or GeminiTimeout("Request timed out")
+
+    # Asyncio
+
+    async def agenerate(self, question: str, deadline: Optional[float] = None) -> Optional[str]:
+        self.stats.count("calls")
+        give_up_at = time.monotonic() + (deadline or self.client.timeout)
+        for attempt in range(self.retry.attempts):
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                raise GeminiTimeout("Request timed out")
+            self._start_attempt()
+            try:
+                answer = await self._ahedged(question, remaining)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                delay = self._failed(e, attempt, give_up_at - time.monotonic())
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return answer
+
+    async def _ahedged(self, question: str, deadline: float) -> Optional[str]:
+        started = time.monotonic()
+        first = asyncio.wrap_future(self.client.submit(question, deadline))
+        futures = {first}
+        hedge_after = self.hedge.delay() if self.hedge is not None else None
+        if hedge_after is not None and hedge_after < deadline:
+            done, _ = await asyncio.wait(futures, timeout=hedge_after)
+            if not done:
+                futures.add(asyncio.wrap_future(self.client.submit(question, deadline - hedge_after)))
+                self.stats.count("hedges")
+
+        error = None
+        try:
+            while futures:
+                remaining = deadline - (time.monotonic() - started)
+                done, futures = await asyncio.wait(futures, timeout=max(0.0, remaining),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    if future.exception() is None:
+                        self._won(started, future is not first)
+                        return future.result()
+                    error = future.exception()
+            raise error or GeminiTimeout("Request timed out")
+        finally:
+            for future in futures:
+                future.cancel()
+
+    # Streaming: retried only until the first chunk arrives, never hedged; the
+    # deadline budget only limits the attempts, not how long the chunks keep coming
+
+    def stream(self, question: str, deadline: Optional[float] = None) -> Iterator[str]:
+        self.stats.count("calls")
+        give_up_at = time.monotonic() + (deadline or self.client.timeout)
+        for attempt in range(self.retry.attempts):
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                raise GeminiTimeout("Request timed out")
+            self._start_attempt()
+            started = False
+            try:
+                for chunk in self.client.stream(question, remaining):
+                    started = True
+                    yield chunk
+            except GeneratorExit:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                delay = self._failed(e, attempt, give_up_at - time.monotonic())
+                # Chunks already shown cannot be taken back
+                if delay is None or started:
+                    raise
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return
+
+    def warm_up(self, connections: Optional[int] = None, timeout: float = 5.0) -> int:
+        return self.client.warm_up(connections, timeout)
+
+    def stats_dict(self) -> dict:
+        return self.stats.as_dict(self.breaker)
+
+    def close(self):
+        self.client.close()
+
+
+def from_env(client: GeminiClient) -> ResilientClient:
+    """Wrap `client` with the policies configured in the environment."""
+    return ResilientClient(
+        client,
+        retry=RetryPolicy(attempts=int(os.getenv("GEMINI_RETRIES", "3"))),
+        breaker=CircuitBreaker(failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+                               reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET", "30"))),
+        hedge=HedgePolicy() if os.getenv("GEMINI_HEDGE", "0") == "1" else None,
+    )
+
+
+_default_clients = {}
+_default_lock = threading.Lock()
+
+
+def get_resilient_client(api_key: Optional[str] = None) -> ResilientClient:
+    """Process-wide ResilientClient around get_default_client(api_key)."""
+    client = get_default_client(api_key)
+    with _default_lock:
+        resilient = _default_clients.get(client)
+        if resilient is None:
+            resilient = _default_clients[client] = from_env(client)
+        return resilient
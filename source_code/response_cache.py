@@ -0,0 +1,168 @@
+"""LRU + TTL cache for Gemini answers, optionally persisted to SQLite.
+
+Entries are keyed on the model name plus the normalized prompt, so "Tell me a
+joke" and "tell me a joke!" share one answer. Only real answers should be put
+in the cache; callers keep error strings out of it.
+
+The SQLite table is kept bounded too: expired rows are deleted whenever an
+answer is written, and past `max_rows` the rows closest to expiry (with one
+TTL, the oldest) are deleted to make room.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    return _WHITESPACE.sub(" ", prompt.lower()).strip().rstrip("?!. ")
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, path: Optional[str] = None,
+                 max_rows: int = 100_000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._entries = OrderedDict()  # key -> (answer, expires_at), oldest first
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._db = None
+        # Rows in the table, kept up to date so a write never has to count them (another
+        # process writing the same file only skews it until the next start recounts)
+        self._rows = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, answer TEXT NOT NULL, expires_at REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_expiry ON responses (expires_at)")
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._rows = self._db.execute("SELECT count(*) FROM responses").fetchone()[0]
+            self._prune()
+            self._db.commit()
+
+    @staticmethod
+    def key(prompt: str, model: str) -> str:
+        return f"{model}\n{normalize_prompt(prompt)}"
+
+    def get(self, prompt: str, model: str) -> Optional[str]:
+        key = self.key(prompt, model)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT answer, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = row
+                    self._store(key, entry)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            answer, expires_at = entry
+            if expires_at <= now:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return answer
+
+    def put(self, prompt: str, model: str, answer: str):
+        if not answer:
+            return
+        key = self.key(prompt, model)
+        now = time.time()
+        entry = (answer, now + self.ttl)
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                if self._db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone() is None:
+                    self._rows += 1
+                self._db.execute("INSERT OR REPLACE INTO responses (key, answer, expires_at) VALUES (?, ?, ?)", (key, *entry))
+                # Answers nobody asks for again would otherwise only go at the next start
+                self._rows -= self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+                self._prune()
+                self._db.commit()
+
+    def _store(self, key: str, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            # Only leaves memory; the persisted copy can be loaded again later
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _prune(self):
+        """Delete the rows closest to expiry until at most max_rows are left."""
+        excess = self._rows - self.max_rows
+        if excess > 0:
+            self._rows -= self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY expires_at LIMIT ?)", (excess,)
+            ).rowcount
+
+    def _drop(self, key: str):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._rows -= self._db.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+                self._rows = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """Process-wide cache configured from the environment.
+
+    GEMINI_CACHE_SIZE and GEMINI_CACHE_TTL (seconds) size the in-memory LRU;
+    set GEMINI_CACHE_PATH to a SQLite file to keep answers across restarts,
+    and GEMINI_CACHE_ROWS to cap how many answers that file holds.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                max_entries=int(os.getenv("GEMINI_CACHE_SIZE", "1024")),
+                ttl=float(os.getenv("GEMINI_CACHE_TTL", "3600")),
+                path=os.getenv("GEMINI_CACHE_PATH") or None,
+                max_rows=int(os.getenv("GEMINI_CACHE_ROWS", "100000")),
+            )
+        return _default_cache
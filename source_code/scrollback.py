@@ -0,0 +1,220 @@
+"""Bounded chat scrollback for the Tk chat window.
+
+Everything shown in the chat is appended to an on-disk Transcript (JSONL, one
+block of (text, tag) segments per line). The Text widget only holds a window
+of those blocks, kept within a line and character budget:
+
+- new blocks go in at the bottom, and old ones are trimmed off the top;
+- scrolling to the top pages older blocks back in from disk (and drops the
+  newest ones once over budget); scrolling back down pages them in again.
+  A page that is over budget by itself is cut down from its far end, so only
+  the blocks next to the view are kept;
+- a new message while scrolled away jumps back to the live end.
+
+Each shown block starts at a Text mark named "sb<index>", so trimming and
+paging never have to count characters in the widget.
+
+Budget (0 turns the limit off):
+    CHAT_SCROLLBACK_LINES   default 5000
+    CHAT_SCROLLBACK_CHARS   default 400000
+    CHAT_TRANSCRIPT         keep the transcript at this path (default: a temp file)
+"""
+import json
+import os
+import tempfile
+from array import array
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+Segment = Tuple[str, str]    # (text, tag)
+
+# Blocks read from disk per page, and how far below the budget a trim goes
+PAGE_BLOCKS = 50
+TRIM_TO = 0.75
+
+
+class Transcript:
+    """Append-only block store on disk; only one offset per block stays in memory."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.file = open(path, "w+b") if path else tempfile.TemporaryFile("w+b")
+        self.offsets = array("q")
+        self.end = 0
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def append(self, segments: Sequence[Segment]) -> int:
+        line = json.dumps(segments, ensure_ascii=False).encode("utf-8") + b"\n"
+        self.file.seek(self.end)
+        self.file.write(line)
+        self.offsets.append(self.end)
+        self.end += len(line)
+        return len(self.offsets) - 1
+
+    def read(self, start: int, stop: int) -> List[List[Segment]]:
+        if start >= stop:
+            return []
+        self.file.flush()
+        self.file.seek(self.offsets[start])
+        return [[tuple(segment) for segment in json.loads(self.file.readline())] for _ in range(start, stop)]
+
+    def close(self):
+        self.file.close()
+
+
+def block_size(segments: Sequence[Segment]) -> Tuple[int, int]:
+    chars = lines = 0
+    for text, _ in segments:
+        chars += len(text)
+        lines += text.count("\n")
+    return chars, lines
+
+
+class Scrollback:
+    """Keeps a Text widget showing blocks [first, last) of a Transcript, within budget."""
+
+    def __init__(self, widget, transcript: Optional[Transcript] = None, max_lines: int = 5000, max_chars: int = 400_000):
+        self.widget = widget
+        self.transcript = transcript or Transcript()
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.first = self.last = 0
+        self.sizes = deque()          # (chars, lines) of every shown block, in order
+        self.shown_chars = self.shown_lines = 0
+
+    def over_budget(self, fraction: float = 1.0) -> bool:
+        return ((self.max_chars and self.shown_chars > self.max_chars * fraction)
+                or (self.max_lines and self.shown_lines > self.max_lines * fraction))
+
+    # Adding blocks
+
+    def append(self, segments: Sequence[Segment]):
+        """Record a new block and show it at the bottom."""
+        index = self.transcript.append(segments)
+        self.widget.config(state="normal")
+        if self.last != index:
+            # The user paged back through history; come back to the live end
+            self.show_tail()
+        else:
+            self.insert_bottom([segments])
+            if self.over_budget():
+                self.trim_top(TRIM_TO)
+        self.widget.config(state="disabled")
+        self.widget.see("end")
+
+    def insert_bottom(self, blocks):
+        for segments in blocks:
+            start = self.widget.index("end-1c")
+            self.widget.insert("end", *[part for segment in segments for part in segment])
+            self.widget.mark_set(f"sb{self.last}", start)
+            self.add_size(segments, at_top=False)
+            self.last += 1
+
+    def insert_top(self, blocks):
+        # Marks keep right gravity, so every shown block's mark moves down with the insert
+        for segments in reversed(blocks):
+            self.first -= 1
+            self.widget.insert("1.0", *[part for segment in segments for part in segment])
+            self.widget.mark_set(f"sb{self.first}", "1.0")
+            self.add_size(segments, at_top=True)
+
+    def add_size(self, segments, at_top: bool):
+        chars, lines = block_size(segments)
+        if at_top:
+            self.sizes.appendleft((chars, lines))
+        else:
+            self.sizes.append((chars, lines))
+        self.shown_chars += chars
+        self.shown_lines += lines
+
+    # Dropping blocks
+
+    def trim_top(self, fraction: float = 1.0, keep: Optional[int] = None):
+        """Drop the oldest shown blocks until under budget, never past block `keep` (default: the newest)."""
+        keep = self.last - 1 if keep is None else keep
+        dropped = self.first
+        while self.first < keep and self.over_budget(fraction):
+            chars, lines = self.sizes.popleft()
+            self.shown_chars -= chars
+            self.shown_lines -= lines
+            self.first += 1
+        if self.first > dropped:
+            self.widget.delete("1.0", f"sb{self.first}")
+            self.widget.mark_unset(*[f"sb{i}" for i in range(dropped, self.first)])
+
+    def trim_bottom(self, fraction: float = 1.0, keep: Optional[int] = None):
+        """Drop the newest shown blocks until under budget, never past block `keep` (default: the oldest)."""
+        keep = self.first if keep is None else keep
+        dropped = self.last
+        while self.last > keep + 1 and self.over_budget(fraction):
+            chars, lines = self.sizes.pop()
+            self.shown_chars -= chars
+            self.shown_lines -= lines
+            self.last -= 1
+        if self.last < dropped:
+            self.widget.delete(f"sb{self.last}", "end")
+            self.widget.mark_unset(*[f"sb{i}" for i in range(self.last, dropped)])
+
+    # Paging
+
+    def show_tail(self):
+        """Reset the window to the newest blocks that fit the trimmed budget."""
+        if self.last > self.first:
+            self.widget.mark_unset(*[f"sb{i}" for i in range(self.first, self.last)])
+        self.widget.delete("1.0", "end")
+        self.sizes.clear()
+        self.shown_chars = self.shown_lines = 0
+        self.first = self.last = len(self.transcript)
+        while self.first > 0 and not self.over_budget(TRIM_TO):
+            start = max(0, self.first - PAGE_BLOCKS)
+            self.insert_top(self.transcript.read(start, self.first))
+        self.trim_top(TRIM_TO)
+
+    def page_up(self) -> bool:
+        """Load older blocks above the view. Returns False when there is nothing older."""
+        if self.first == 0:
+            return False
+        top = self.first
+        self.widget.config(state="normal")
+        self.insert_top(self.transcript.read(max(0, self.first - PAGE_BLOCKS), self.first))
+        self.trim_bottom(keep=top)
+        # Still over: the page alone is too big, so drop its oldest blocks but keep one to scroll into
+        self.trim_top(keep=top - 1)
+        self.widget.config(state="disabled")
+        # Keep the block that was on top where the user left it
+        self.widget.yview(f"sb{top}")
+        return True
+
+    def page_down(self) -> bool:
+        """Load newer blocks below the view. Returns False when already at the live end."""
+        if self.last >= len(self.transcript):
+            return False
+        bottom = self.last - 1
+        self.widget.config(state="normal")
+        self.insert_bottom(self.transcript.read(self.last, min(len(self.transcript), self.last + PAGE_BLOCKS)))
+        self.trim_top(keep=bottom)
+        self.trim_bottom(keep=bottom + 1)
+        self.widget.config(state="disabled")
+        self.widget.see(f"sb{bottom}")
+        return True
+
+    def on_scroll(self, first: float, last: float) -> bool:
+        """Call with the widget's visible fraction; pages when the view hits either end."""
+        if first <= 0.0 and self.first > 0:
+            return self.page_up()
+        if last >= 1.0 and self.last < len(self.transcript):
+            return self.page_down()
+        return False
+
+    def close(self):
+        self.transcript.close()
+
+
+def make_scrollback(widget) -> Optional[Scrollback]:
+    """Scrollback configured from the environment; None when both limits are 0."""
+    max_lines = int(os.getenv("CHAT_SCROLLBACK_LINES", "5000"))
+    max_chars = int(os.getenv("CHAT_SCROLLBACK_CHARS", "400000"))
+    if not max_lines and not max_chars:
+        return None
+    return Scrollback(widget, Transcript(os.getenv("CHAT_TRANSCRIPT") or None), max_lines, max_chars)
@@ -0,0 +1,351 @@
+"""Asyncio chat server: many UserProfile sessions in one process.
+
+A small HTTP/1.1 JSON API (keep-alive, standard library only):
+
+    POST   /sessions                 {"name": "Lien", "age": 20, "isPremium": false, "user_id": "optional"}
+                                     -> {"session_id": ..., "messages": [...]}
+    POST   /sessions/<id>/turns      {"text": "I want to build muscle"}
+                                     -> {"messages": [...], "prompt": "Your answer: ", "response": null, ...}
+    DELETE /sessions/<id>
+    GET    /stats
+    GET    /metrics                  per-stage latency histograms, Prometheus text format
+    GET    /metrics.json             the same as p50/p95/p99 per stage and CommandType
+
+Every turn is routed like main.py: the intent router picks the assistant and
+the assistant's Conversation runs until it either finishes (`response` is
+set) or asks a question (`prompt` is set, and the next turn's text is the
+answer). A session waiting on its user holds only the conversation's parked
+state dict. GENERAL turns are proxied to Gemini, or to a stand-in via
+GEMINI_BASE_URL / --gemini-url, with at most --gemini-concurrency in flight.
+
+Quota checks and conversation steps touch SQLite and log files, so they run
+in worker threads (asyncio.to_thread) and never stall the event loop; a
+session's own turns still run one at a time. Request bodies larger than
+--max-body bytes are refused with 413 and the connection is closed.
+
+Usage:
+    PYTHONPATH=. python source_code/server.py --port 8080
+"""
+import argparse
+import asyncio
+import json
+import secrets
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Optional, Union
+
+from source_code.intent_router import route_followup, route_intent
+from source_code.io_channel import ScriptedChannel
+from source_code.assistant_registry import SessionAssistants
+from source_code.main import LIMIT_MESSAGE, restore_conversation
+from source_code.models import CommandType, Request, UserProfile
+from source_code.quota import QuotaEngine, get_default_quota, quota_key
+from source_code.response_cache import normalize_prompt
+from source_code.single_flight import AsyncSingleFlight
+from source_code.tracing import TRACER, span
+
+if TYPE_CHECKING:
+    from source_code.gemini_client import GeminiClient
+    from source_code.resilience import ResilientClient
+
+FOLLOWUP_PROMPT = "You can say something like 'playlist' or 'talk to you': "
+MAX_BODY = 64 * 1024   # bytes; a turn's text is a chat message, not a document
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ChatSession:
+    """One user's chat: who they are and where their current request stands."""
+
+    def __init__(self, user: UserProfile, quota_id: str):
+        self.user = user
+        self.quota_id = quota_id         # whose quota this session spends: the client's user_id, else the session
+        # Assistants never block here: a ScriptedChannel with no answers raises instead of waiting
+        self.assistants = SessionAssistants(user, ScriptedChannel(), identity=quota_id)
+        self.pending_input = None        # request text while we wait on the feelings follow-up
+        self.followup_attempts = 0
+        self.conversation_state = None   # parked Conversation state while an assistant waits
+        self.last_seen = time.monotonic()
+        # A turn may wait on a worker thread: a second turn of the same session waits its turn
+        self.lock = asyncio.Lock()
+
+    @property
+    def waiting(self) -> bool:
+        return self.pending_input is not None or self.conversation_state is not None
+
+
+class ChatServer:
+    def __init__(self, gemini: Optional[Union["GeminiClient", "ResilientClient"]] = None, gemini_concurrency: int = 8,
+                 session_ttl: float = 1800.0, quota: Optional[QuotaEngine] = None, max_body: int = MAX_BODY):
+        self.sessions: Dict[str, ChatSession] = {}
+        self.quota = quota or get_default_quota()
+        self.gemini = gemini
+        self.gemini_slots = asyncio.Semaphore(gemini_concurrency)
+        # Sessions asking the same question at once share one Gemini call (and one slot)
+        self.gemini_flight = AsyncSingleFlight()
+        self.session_ttl = session_ttl
+        self.max_body = max_body
+        self.turns_served = 0
+        self.started = time.monotonic()
+
+    # Session handling
+
+    def create_session(self, data: dict) -> dict:
+        try:
+            user = UserProfile(
+                name=str(data.get("name", "")).strip(),
+                age=int(data.get("age", -1)),
+                preferences=dict(data.get("preferences", {})),
+                isPremium=bool(data.get("isPremium", False)),
+            )
+        except (TypeError, ValueError) as e:
+            raise HTTPError(400, str(e))
+
+        self.expire_sessions()
+        session_id = secrets.token_hex(8)
+        user_id = str(data.get("user_id") or "").strip()
+        self.sessions[session_id] = ChatSession(user, f"user:{user_id}" if user_id else f"session:{session_id}")
+        return {
+            "session_id": session_id,
+            "messages": ["👋 Hey there! I’m your personal AI Assistant.",
+                         "I can help you with music, fitness, studying, and more."],
+        }
+
+    def get_session(self, session_id: str) -> ChatSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, "Unknown session")
+        session.last_seen = time.monotonic()
+        return session
+
+    def expire_sessions(self):
+        cutoff = time.monotonic() - self.session_ttl
+        for session_id in [sid for sid, s in self.sessions.items() if s.last_seen < cutoff]:
+            del self.sessions[session_id]
+
+    # Turn handling
+
+    async def turn(self, session: ChatSession, text: str) -> dict:
+        text = text.strip()
+        if not text:
+            raise HTTPError(400, "Text cannot be empty")
+        self.turns_served += 1
+
+        # The user is answering an assistant's question
+        if session.conversation_state is not None:
+            conversation = restore_conversation(session.conversation_state, session.user, assistants=session.assistants)
+            step = await asyncio.to_thread(self.resume_conversation, conversation, text)
+            return self.step_result(session, conversation, step, [])
+
+        # The user is answering "playlist or talk to you?"
+        if session.pending_input is not None:
+            command_type = route_followup(text).command_type
+            if command_type is None:
+                session.followup_attempts += 1
+                if session.followup_attempts < 2:
+                    return {"messages": ["Hmm... I didn’t quite understand. Can you try rephrasing?"], "prompt": FOLLOWUP_PROMPT, "response": None}
+                command_type = CommandType.GENERAL
+                messages = ["❓Still a bit unclear... Let me know if there's anything else I can help with."]
+            else:
+                messages = []
+            original, session.pending_input = session.pending_input, None
+            return await self.dispatch(session, original, command_type, messages)
+
+        # A brand new request
+        if await asyncio.to_thread(self.quota.exhausted, *quota_key(session.user, session.quota_id)):
+            return self.limited()
+
+        with span("classify") as timed:
+            route = route_intent(text)
+            timed.label = route.command_type
+        if route.command_type is None:
+            session.pending_input = text
+            session.followup_attempts = 0
+            return {
+                "messages": ["🧠 I hear you. I know some feelings can be heavy.",
+                             "Would you like me to:",
+                             "🎵 1) Recommend a song or playlist to soothe your mood",
+                             "💬 2) Just listen to what you want to share — I’m here for you."],
+                "prompt": FOLLOWUP_PROMPT,
+                "response": None,
+            }
+        return await self.dispatch(session, text, route.command_type, [], route.confidence)
+
+    async def dispatch(self, session: ChatSession, text: str, command_type: CommandType, messages: list,
+                       confidence: float = 1.0) -> dict:
+        result = await asyncio.to_thread(self.quota.consume, *quota_key(session.user, session.quota_id), command_type)
+        if not result.allowed:
+            return self.limited(messages)
+        session.user.preferences["raw_input"] = text
+
+        if command_type == CommandType.GENERAL:
+            answer = await self.gemini_flight.do(normalize_prompt(text), lambda: self.ask_gemini(text))
+            return {"messages": messages, "prompt": None, "command_type": command_type.value,
+                    "response": {"message": answer, "confidence": confidence, "actionPerformed": True}}
+
+        assistant = session.assistants.get(command_type)
+        messages = messages + ["💡 " + assistant.greetUser()]
+        # turn() already rejected empty text
+        request = Request.trusted(text, datetime.now(), command_type)
+        conversation, step = await asyncio.to_thread(self.start_conversation, assistant, request)
+        return self.step_result(session, conversation, step, messages)
+
+    # Run in a worker thread: assistants read and write review cards and intake logs
+
+    @staticmethod
+    def start_conversation(assistant, request: Request):
+        with span("handle_request", request.command_type):
+            conversation = assistant.startConversation()
+            return conversation, conversation.start(request)
+
+    @staticmethod
+    def resume_conversation(conversation, text: str):
+        with span("handle_request", conversation.state.get("command_type")):
+            return conversation.resume(text)
+
+    @staticmethod
+    def limited(messages: list = ()) -> dict:
+        return {"messages": [*messages, LIMIT_MESSAGE], "prompt": None, "response": None, "limited": True}
+
+    @staticmethod
+    def step_result(session: ChatSession, conversation, step, messages: list) -> dict:
+        session.conversation_state = None if step.done else conversation.to_dict()
+        return {
+            "messages": messages + list(step.messages),
+            "prompt": step.prompt,
+            "command_type": conversation.state.get("command_type"),
+            "response": asdict(step.response) if step.done else None,
+        }
+
+    async def ask_gemini(self, text: str) -> str:
+        async with self.gemini_slots:
+            # Imported on the first GENERAL turn: requests is the slowest import by far
+            from source_code.gemini_api import acall_gemini_api
+            return await acall_gemini_api(text, self.gemini)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "waiting_sessions": sum(1 for s in self.sessions.values() if s.waiting),
+            "turns_served": self.turns_served,
+            "uptime_seconds": round(time.monotonic() - self.started, 1),
+            "gemini_flight": self.gemini_flight.stats_dict(),
+            # Retries, hedges and breaker state when the client is a ResilientClient
+            "gemini_resilience": self.gemini.stats_dict() if hasattr(self.gemini, "stats_dict") else None,
+        }
+
+    # HTTP plumbing
+
+    async def route(self, method: str, path: str, body: dict):
+        parts = [p for p in path.split("?", 1)[0].split("/") if p]
+        if method == "POST" and parts == ["sessions"]:
+            return 201, self.create_session(body)
+        if method == "POST" and len(parts) == 3 and parts[0] == "sessions" and parts[2] == "turns":
+            session = self.get_session(parts[1])
+            async with session.lock:
+                with span("turn") as timed:
+                    reply = await self.turn(session, str(body.get("text", "")))
+                    timed.label = reply.get("command_type")
+            return 200, reply
+        if method == "DELETE" and len(parts) == 2 and parts[0] == "sessions":
+            self.get_session(parts[1])
+            del self.sessions[parts[1]]
+            return 200, {"deleted": parts[1]}
+        if method == "GET" and parts == ["stats"]:
+            return 200, self.stats()
+        if method == "GET" and parts == ["metrics"]:
+            return 200, TRACER.to_prometheus()
+        if method == "GET" and parts == ["metrics.json"]:
+            return 200, TRACER.to_json()
+        raise HTTPError(404, f"No route for {method} {path}")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                # Too big to read: answer without it, then drop the connection it is still arriving on
+                too_big = length > self.max_body
+                raw = await reader.readexactly(length) if length and not too_big else b""
+                try:
+                    if too_big:
+                        raise HTTPError(413, f"Request body over {self.max_body} bytes")
+                    body = json.loads(raw) if raw else {}
+                    status, payload = await self.route(method.upper(), path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except ValueError as e:
+                    status, payload = 400, {"error": f"Invalid JSON: {e}"}
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                              and not too_big)
+                # Text payloads (the Prometheus dump) go out as they are
+                if isinstance(payload, str):
+                    data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+                else:
+                    data, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve_forever(args):
+    from source_code.gemini_client import GeminiClient
+    from source_code.resilience import from_env
+    gemini = from_env(GeminiClient(base_url=args.gemini_url, max_concurrency=args.gemini_concurrency))
+    server = ChatServer(gemini, gemini_concurrency=args.gemini_concurrency, session_ttl=args.session_ttl,
+                        max_body=args.max_body)
+    listener = await server.serve(args.host, args.port)
+    print(f"Chat server listening on http://{args.host}:{args.port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve many assistant sessions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--gemini-url", default=None, help="Gemini base URL (default: GEMINI_BASE_URL or Google)")
+    parser.add_argument("--gemini-concurrency", type=int, default=8, help="most GENERAL turns in flight at once")
+    parser.add_argument("--session-ttl", type=float, default=1800.0, help="drop sessions idle this many seconds")
+    parser.add_argument("--max-body", type=int, default=MAX_BODY, help="refuse request bodies over this many bytes")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Single-flight: concurrent calls with the same key share one execution.
+
+When many users ask the same GENERAL question at once, the first caller (the
+leader) makes the Gemini call and everyone else asking while it is in flight
+waits for that call and gets the same answer, or the same exception. Once
+the call finishes the key is free again; remembering answers is the response
+cache's job, not this one's.
+
+SingleFlight is for threads (GUI, console). AsyncSingleFlight is for one
+event loop (the server). Cancelling one asyncio waiter never cancels the
+shared call for the others; the call is cancelled only once every waiter
+has given up. A thread cannot be interrupted, so a threaded waiter can
+only stop waiting (`timeout`); the leader's call runs to completion.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class FlightStats:
+    """Counts shared by both flavours; `saved` is upstream calls that never had to be made."""
+
+    def __init__(self):
+        self.calls = 0       # executions actually started
+        self.saved = 0       # callers served by someone else's execution
+        self.cancelled = 0   # executions cancelled because every waiter left
+
+    def as_dict(self, in_flight: int) -> dict:
+        requests = self.calls + self.saved
+        return {
+            "calls": self.calls,
+            "saved": self.saved,
+            "cancelled": self.cancelled,
+            "in_flight": in_flight,
+            "saved_ratio": round(self.saved / requests, 3) if requests else 0.0,
+        }
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.stats = FlightStats()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Run fn() unless a call for `key` is already running; either way return its result.
+
+        A waiter that gives up after `timeout` seconds gets TimeoutError.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats.saved += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats.calls += 1
+                leader = True
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise TimeoutError(f"Gave up waiting for the shared call after {timeout}s")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def stats_dict(self) -> dict:
+        return self.stats.as_dict(len(self._calls))
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines running on one event loop."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, list] = {}   # key -> [task, number of waiters]
+        self.stats = FlightStats()
+
+    async def do(self, key: Hashable, make: Callable[[], Awaitable[Any]]) -> Any:
+        """Await make() unless a call for `key` is already running; either way return its result."""
+        entry = self._calls.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(make())
+            entry = self._calls[key] = [task, 0]
+            self.stats.calls += 1
+            task.add_done_callback(lambda _, key=key, entry=entry: self._finished(key, entry))
+        else:
+            self.stats.saved += 1
+
+        entry[1] += 1
+        try:
+            # shield: one waiter being cancelled must not cancel the call for the rest
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            task = entry[0]
+            if entry[1] == 1 and not task.done():
+                # Nobody else wants it: stop the call, and let the next caller start afresh
+                task.cancel()
+                self._finished(key, entry)
+                self.stats.cancelled += 1
+            raise
+        finally:
+            entry[1] -= 1
+
+    def _finished(self, key: Hashable, entry: list):
+        if self._calls.get(key) is entry:
+            del self._calls[key]
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def stats_dict(self) -> dict:
+        return self.stats.as_dict(len(self._calls))
+
+
+_default_flight = None
+_default_flight_lock = threading.Lock()
+
+
+def get_default_flight() -> SingleFlight:
+    """Process-wide flight for the threaded Gemini calls."""
+    global _default_flight
+    with _default_flight_lock:
+        if _default_flight is None:
+            _default_flight = SingleFlight()
+        return _default_flight
@@ -0,0 +1,379 @@
+"""Spaced-repetition review cards for StudyAssistant, scheduled with SM-2.
+
+Every card belongs to one user and one deck (a subject). Reviewing a card
+grades how well it was remembered, 0 (forgot) to 5 (perfect); SM-2 turns the
+grade into the card's next interval and adjusts its ease, so cards that are
+remembered come back less and less often and forgotten ones start over.
+
+With a path, cards live in SQLite with an index on (user, due): "what is due
+now" is one seek into that B-tree plus a read of the due rows, however many
+millions of cards other users hold, and a review is a single-row UPDATE.
+Without one they live in memory, with a heap of (due, card id) per user;
+superseded heap entries are skipped when they surface and the heap is rebuilt
+once they outnumber the live ones.
+
+Decks are imported and exported as CSV or JSONL (`deck`, `front`, `back`,
+plus the scheduling columns on export), streamed in batches so a deck never
+has to fit in memory:
+
+    PYTHONPATH=. python source_code/srs.py import deck.csv
+    PYTHONPATH=. python source_code/srs.py export -o backup.jsonl
+    PYTHONPATH=. python source_code/srs.py due --user user:42
+
+Cards belong to the identity quotas use, not to a typed name: the local OS
+account on the console and GUI ("local:<login>", the default here), and
+"user:<user_id>" (or "session:<id>") on the server.
+
+Configuration (read by get_default_scheduler):
+    SRS_PATH   SQLite file holding every user's cards ("" keeps them in memory)
+"""
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from source_code.quota import local_identity
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".ai_assistant_srs.sqlite3")
+DAY = 86400.0
+# SM-2 constants: a new card starts at ease 2.5 and never drops below 1.3
+START_EASE = 2.5
+MIN_EASE = 1.3
+PASS_GRADE = 3
+MAX_GRADE = 5
+# Rows per transaction during imports
+BATCH = 5000
+
+COLUMNS = ("deck", "front", "back", "ease", "interval", "reps", "lapses", "due")
+
+
+class Card(NamedTuple):
+    id: int
+    user: str
+    deck: str
+    front: str
+    back: str
+    ease: float       # interval multiplier after a successful review
+    interval: float   # days until the next review
+    reps: int         # successful reviews in a row
+    lapses: int       # times forgotten
+    due: float        # epoch seconds of the next review
+
+
+def sm2(card: Card, grade: int, now: float) -> Card:
+    """`card` after a review graded 0-5 at `now`."""
+    if not 0 <= grade <= MAX_GRADE:
+        raise ValueError(f"Grade must be between 0 and {MAX_GRADE}.")
+    if grade < PASS_GRADE:
+        # Forgotten: learn it again from a one-day interval
+        reps, interval, lapses = 0, 1.0, card.lapses + 1
+    else:
+        reps, lapses = card.reps + 1, card.lapses
+        interval = 1.0 if reps == 1 else 6.0 if reps == 2 else round(card.interval * card.ease, 1)
+    miss = MAX_GRADE - grade
+    ease = round(max(MIN_EASE, card.ease + 0.1 - miss * (0.08 + miss * 0.02)), 2)
+    return card._replace(ease=ease, interval=interval, reps=reps, lapses=lapses, due=now + interval * DAY)
+
+
+def read_deck(path: str) -> Iterator[dict]:
+    """Stream cards from a .csv or .jsonl file."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".json")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def write_deck(rows: Iterable[dict], f, fmt: str = "jsonl") -> int:
+    """Write exported rows to the open file `f` as CSV or JSONL; returns the count."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+    else:
+        for count, row in enumerate(rows, 1):
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return count
+
+
+class ReviewScheduler:
+    def __init__(self, path: Optional[str] = None, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        # The store without a path
+        self._cards: Dict[int, Card] = {}
+        self._keys: Dict[Tuple[str, str, str], int] = {}        # (user, deck, front) -> card id
+        self._heaps: Dict[str, List[Tuple[float, int]]] = {}    # user -> heap of (due, card id), may hold stale entries
+        self._live: Dict[str, int] = {}                         # user -> cards in their heap
+        self._ids = itertools.count(1)
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cards (id INTEGER PRIMARY KEY, user TEXT NOT NULL, deck TEXT NOT NULL, "
+                "front TEXT NOT NULL, back TEXT NOT NULL DEFAULT '', ease REAL NOT NULL, interval REAL NOT NULL, "
+                "reps INTEGER NOT NULL, lapses INTEGER NOT NULL, due REAL NOT NULL, UNIQUE (user, deck, front))")
+            # The due queue: every user's cards in due order
+            self._db.execute("CREATE INDEX IF NOT EXISTS cards_due ON cards (user, due)")
+
+    def new_card(self, user: str, deck: str, front: str, back: str = "", now: Optional[float] = None) -> Card:
+        # Adding a card is its first study session, so the first review is a day later
+        now = self.clock() if now is None else now
+        return Card(0, user, deck, front, back, START_EASE, 1.0, 0, 0, now + DAY)
+
+    def add(self, user: str, deck: str, front: str, back: str = "") -> Tuple[Card, bool]:
+        """The user's card for (deck, front), and whether it was just created."""
+        card = self.new_card(user, deck, front, back)
+        with self._lock:
+            if self._db is None:
+                card_id = self._keys.get((user, deck, front))
+                if card_id is not None:
+                    return self._cards[card_id], False
+                self._insert(card)
+                return self._cards[self._keys[(user, deck, front)]], True
+
+            row = self._db.execute(
+                "INSERT INTO cards (user, deck, front, back, ease, interval, reps, lapses, due) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (user, deck, front) DO NOTHING RETURNING id",
+                card[1:]).fetchone()
+            if row is not None:
+                return card._replace(id=row[0]), True
+            return self._get("user = ? AND deck = ? AND front = ?", (user, deck, front)), False
+
+    def _insert(self, card: Card) -> bool:
+        # In-memory store only; the caller holds the lock
+        key = (card.user, card.deck, card.front)
+        if key in self._keys:
+            return False
+        card = card._replace(id=next(self._ids))
+        self._keys[key] = card.id
+        self._cards[card.id] = card
+        heapq.heappush(self._heaps.setdefault(card.user, []), (card.due, card.id))
+        self._live[card.user] = self._live.get(card.user, 0) + 1
+        return True
+
+    def _get(self, where: str, args: tuple) -> Optional[Card]:
+        row = self._db.execute(f"SELECT * FROM cards WHERE {where}", args).fetchone()
+        return Card(*row) if row is not None else None
+
+    def get(self, card_id: int) -> Optional[Card]:
+        with self._lock:
+            if self._db is None:
+                return self._cards.get(card_id)
+            return self._get("id = ?", (card_id,))
+
+    def due(self, user: str, limit: int = 20, now: Optional[float] = None) -> List[Card]:
+        """Up to `limit` of the user's cards due by `now`, most overdue first."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            if self._db is None:
+                return self._due_in_memory(user, limit, now)
+            rows = self._db.execute(
+                "SELECT * FROM cards WHERE user = ? AND due <= ? ORDER BY due LIMIT ?", (user, now, limit)).fetchall()
+            return [Card(*row) for row in rows]
+
+    def _due_in_memory(self, user: str, limit: int, now: float) -> List[Card]:
+        heap = self._heaps.get(user)
+        if not heap:
+            return []
+        # Pop what is due, then put it back: O(k log n) for k due cards
+        popped, cards = [], []
+        while heap and len(cards) < limit and heap[0][0] <= now:
+            due, card_id = entry = heapq.heappop(heap)
+            card = self._cards.get(card_id)
+            if card is None or card.due != due:
+                continue   # superseded by a later review
+            popped.append(entry)
+            cards.append(card)
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return cards
+
+    def next_due(self, user: str) -> Optional[Card]:
+        """The user's card that comes up first, due or not."""
+        with self._lock:
+            if self._db is None:
+                heap = self._heaps.get(user)
+                while heap:
+                    due, card_id = heap[0]
+                    card = self._cards.get(card_id)
+                    if card is not None and card.due == due:
+                        return card
+                    heapq.heappop(heap)
+                return None
+            return self._get("user = ? ORDER BY due LIMIT 1", (user,))
+
+    def review(self, card_id: int, grade: int, now: Optional[float] = None) -> Card:
+        """Record a review of the card graded 0-5 and schedule its next one."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            if self._db is None:
+                card = self._cards.get(card_id)
+                if card is None:
+                    raise KeyError(card_id)
+                card = self._cards[card_id] = sm2(card, grade, now)
+                heap = self._heaps[card.user]
+                heapq.heappush(heap, (card.due, card_id))
+                # The old entry stays behind until it surfaces; compact when stale ones dominate
+                if len(heap) > 2 * self._live[card.user] + 64:
+                    self._compact(card.user)
+                return card
+
+            # IMMEDIATE: another worker can't review the card between our read and write
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                card = self._get("id = ?", (card_id,))
+                if card is None:
+                    raise KeyError(card_id)
+                card = sm2(card, grade, now)
+                self._db.execute("UPDATE cards SET ease = ?, interval = ?, reps = ?, lapses = ?, due = ? WHERE id = ?",
+                                 (card.ease, card.interval, card.reps, card.lapses, card.due, card_id))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return card
+
+    def _compact(self, user: str):
+        # Keep each card's current entry only; O(n) over this user's heap
+        heap = [(due, card_id) for due, card_id in self._heaps[user] if self._cards[card_id].due == due]
+        heapq.heapify(heap)
+        self._heaps[user] = heap
+
+    def import_deck(self, user: str, rows: Iterable[dict]) -> int:
+        """Add the user's cards from `rows`, BATCH at a time; returns how many were new.
+
+        Rows need `deck` and `front`; `back` and the scheduling columns of an
+        export are optional. Cards the user already has keep their progress.
+        """
+        now = self.clock()
+        added = 0
+        rows = iter(rows)
+        while True:
+            batch = [self._from_row(user, row, now) for row in itertools.islice(rows, BATCH)]
+            if not batch:
+                return added
+            with self._lock:
+                if self._db is None:
+                    added += sum(self._insert(card) for card in batch)
+                    continue
+                self._db.execute("BEGIN")
+                try:
+                    before = self._db.total_changes
+                    self._db.executemany(
+                        "INSERT INTO cards (user, deck, front, back, ease, interval, reps, lapses, due) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (user, deck, front) DO NOTHING",
+                        (card[1:] for card in batch))
+                    added += self._db.total_changes - before
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+
+    def _from_row(self, user: str, row: dict, now: float) -> Card:
+        deck, front = str(row.get("deck") or "").strip(), str(row.get("front") or "").strip()
+        if not deck or not front:
+            raise ValueError(f"A card needs a deck and a front: {row}")
+        card = self.new_card(user, deck, front, str(row.get("back") or ""), now)
+        # Empty CSV cells mean "not exported": keep the new-card value
+        return card._replace(**{name: kind(row[name]) for name, kind in
+                                (("ease", float), ("interval", float), ("reps", int), ("lapses", int), ("due", float))
+                                if row.get(name) not in (None, "")})
+
+    def export_deck(self, user: str, deck: Optional[str] = None) -> Iterator[dict]:
+        """Stream the user's cards (one deck, or all of them) as rows for write_deck."""
+        if self._db is None:
+            with self._lock:
+                # The user's heap lists just their cards (each once with its current due date)
+                cards = [self._cards[card_id] for due, card_id in self._heaps.get(user, ())
+                         if self._cards[card_id].due == due and (deck is None or self._cards[card_id].deck == deck)]
+            cards.sort(key=lambda card: (card.deck, card.front))
+            for card in cards:
+                yield {name: getattr(card, name) for name in COLUMNS}
+            return
+
+        # A connection of its own reads a consistent snapshot without holding the lock
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            query = f"SELECT {', '.join(COLUMNS)} FROM cards WHERE user = ?"
+            args: tuple = (user,)
+            if deck is not None:
+                query += " AND deck = ?"
+                args += (deck,)
+            # (user, deck, front) order is the unique index's own, so rows stream without a sort
+            for row in db.execute(query + " ORDER BY deck, front", args):
+                yield dict(zip(COLUMNS, row))
+        finally:
+            db.close()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> ReviewScheduler:
+    """Process-wide review scheduler configured from the environment."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = ReviewScheduler(path=os.getenv("SRS_PATH", DEFAULT_PATH) or None)
+        return _default_scheduler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import, export or inspect a user's review cards.")
+    parser.add_argument("--path", default=os.getenv("SRS_PATH", DEFAULT_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("import", help="add cards from a .csv or .jsonl deck")
+    load.add_argument("source")
+    dump = commands.add_parser("export", help="write a user's cards with their progress")
+    dump.add_argument("--deck", default=None)
+    dump.add_argument("-o", "--output", default="-", help=".csv or .jsonl file (default: JSONL on stdout)")
+    due = commands.add_parser("due", help="list a user's cards due now")
+    due.add_argument("-n", type=int, default=20)
+    for command in (load, dump, due):
+        command.add_argument("--user", default=local_identity(),
+                             help="whose cards, e.g. user:42 on the server (default: this OS account, as on the console)")
+    args = parser.parse_args(argv)
+
+    scheduler = ReviewScheduler(args.path)
+    if args.command == "import":
+        start = time.perf_counter()
+        added = scheduler.import_deck(args.user, read_deck(args.source))
+        print(f"Imported {added} new cards in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    elif args.command == "export":
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+        try:
+            count = write_deck(scheduler.export_deck(args.user, args.deck), out,
+                               "csv" if args.output.endswith(".csv") else "jsonl")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        print(f"Exported {count} cards", file=sys.stderr)
+    else:
+        for card in scheduler.due(args.user, args.n):
+            print(f"{card.deck}: {card.front}  (due {time.strftime('%Y-%m-%d %H:%M', time.localtime(card.due))})")
+    scheduler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,54 @@
+import time
 from source_code.base_assistant import AIAssistant
+from typing import Optional
 from source_code.models import Request, Response
+from source_code.quota import local_identity
+from source_code.conversation import Conversation, Step
+from source_code.srs import DAY, MAX_GRADE, ReviewScheduler, get_default_scheduler
+
+# Cards reviewed per study session at most; the rest stay due for the next one
+REVIEWS_PER_SESSION = 10
+
+
+def study_key(identity: Optional[str] = None) -> str:
+    # Cards outlive the session, so like quota buckets they follow who is signed in
+    # (see quota_key), never the display name anyone can type
+    return identity or local_identity()
+
+
+def describe_wait(seconds: float) -> str:
+    if seconds <= 0:
+        return "now"
+    hours = max(1, round(seconds / 3600))
+    if hours < 24:
+        return f"in {hours} hour{'s' if hours > 1 else ''}"
+    days = round(seconds / DAY)
+    return f"in {days} day{'s' if days > 1 else ''}"
 
 class StudyAssistant(AIAssistant):
     def greetUser(self) -> str:
         return f"📚 Hello {self.user.name}, let’s power through your study goals!"
 
     def handleRequest(self, request: Request) -> Response:
-        # Step 1: Ask which subject
-        subject = input("🧠 Tell me which subject you’d like to review:\n📘 Your answer: ").strip()
-        if not subject:
-            return self.generateResponse("⚠️ I didn’t catch that. Please tell me which subject you'd like to review.")
-        self.user.preferences["subject"] = subject
+        return self.startConversation().run(request, self.io)
 
-        print(f"\n✅ Great! Let’s review some key points in {subject} together!")
-
-        # Step 2: Ask what kind of help
-        while True:
-            choice = input("\n💡 Would you like to (a) schedule a study session or (b) get help with a topic you’re struggling with?\n👉 Your answer: ").lower()
-
-            if "schedule" in choice or "session" in choice or choice == "a":
-                return self.schedule_study_session(subject)
-            elif "explain" in choice or "topic" in choice or choice == "b":
-                topic = input(f"\n🤔 What topic in {subject} are you having trouble with?\n📝 Topic: ").strip()
-                print("\n📖 Okay! Let me break it down for you...\n")
-                explanation = self.explain_topic(topic)
-                print(explanation.message)
-
-                # Step 3: Follow-up check
-                follow_up = input("\n🧠 Do you feel more confident now? (yes/no): ").strip().lower()
-                if follow_up == "no":
-                    analogy_response = self.explain_with_analogy(topic)
-                    return analogy_response
-                else:
-                    return self.generateResponse("🙌 Awesome! Let me know if you'd like to review anything else.")
-            else:
-                print("❌ Sorry, I couldn’t understand what you want. Please choose either (a) schedule or (b) explain a topic.")
-
-    def schedule_study_session(self, subject: str) -> Response:
-        return self.generateResponse(
-            f"📅 Study session scheduled for {subject} using spaced repetition: 1st in 1 day, 2nd in 3 days, and 3rd in a week. Let’s make it stick! 🧠")
+    def startConversation(self, state: Optional[dict] = None) -> Conversation:
+        return StudyConversation(self, state)
+
+    @property
+    def scheduler(self) -> ReviewScheduler:
+        return get_default_scheduler()
+
+    def schedule_study_session(self, subject: str, reviewed: int = 0) -> Response:
+        # Adds the subject to the user's review cards; SM-2 spaces its reviews out from there
+        card, _ = self.scheduler.add(study_key(self.identity), subject, subject)
+        message = f"📅 Study session scheduled for {subject} using spaced repetition: next review {describe_wait(card.due - time.time())}."
+        if reviewed:
+            message += f"\n✅ {reviewed} review{'s' if reviewed > 1 else ''} done, each rescheduled by how well you remembered it."
+        upcoming = self.scheduler.next_due(study_key(self.identity))
+        if upcoming is not None and upcoming.id != card.id:
+            message += f"\n⏰ Next up: {upcoming.front} ({upcoming.deck}) {describe_wait(upcoming.due - time.time())}."
+        return self.generateResponse(message + "\nThe better you remember it, the longer until the next review. Let’s make it stick! 🧠")
 
     def explain_topic(self, topic: str) -> Response:
         return self.generateResponse(
@@ -51,4 +61,77 @@ class StudyAssistant(AIAssistant):
             "pointers": "A pointer is like a bookmark in a book—it doesn’t hold information itself, but tells you where to find it."
         }
         explanation = analogies.get(topic.lower(), f"Let me rephrase {topic} using a real-life analogy to help it click.")
-        return self.generateResponse(f"🔁 No worries! Here's another way to think about it:\n{explanation}")
\ No newline at end of file
+        return self.generateResponse(f"🔁 No worries! Here's another way to think about it:\n{explanation}")
+
+class StudyConversation(Conversation):
+    # Step 1: Ask which subject
+    def begin(self, request: Request) -> Step:
+        return self.ask("🧠 Tell me which subject you’d like to review:\n📘 Your answer: ", "subject")
+
+    def step_subject(self, reply: str) -> Step:
+        subject = reply.strip()
+        if not subject:
+            return self.finish(self.assistant.generateResponse("⚠️ I didn’t catch that. Please tell me which subject you'd like to review."))
+        self.state["subject"] = subject
+        self.user.preferences["subject"] = subject
+
+        self.say(f"\n✅ Great! Let’s review some key points in {subject} together!")
+        return self.ask_choice()
+
+    # Step 2: Ask what kind of help
+    def ask_choice(self) -> Step:
+        return self.ask("\n💡 Would you like to (a) schedule a study session or (b) get help with a topic you’re struggling with?\n👉 Your answer: ", "choice")
+
+    def step_choice(self, reply: str) -> Step:
+        choice = reply.lower()
+        subject = self.state["subject"]
+
+        if "schedule" in choice or "session" in choice or choice == "a":
+            # Cards due by now are reviewed first, most overdue first
+            due = self.assistant.scheduler.due(study_key(self.assistant.identity), REVIEWS_PER_SESSION)
+            self.state["due"] = [card.id for card in due]
+            self.state["reviewed"] = 0
+            return self.ask_review()
+        elif "explain" in choice or "topic" in choice or choice == "b":
+            return self.ask(f"\n🤔 What topic in {subject} are you having trouble with?\n📝 Topic: ", "topic")
+        else:
+            self.say("❌ Sorry, I couldn’t understand what you want. Please choose either (a) schedule or (b) explain a topic.")
+            return self.ask_choice()
+
+    def ask_review(self) -> Step:
+        while self.state["due"]:
+            card = self.assistant.scheduler.get(self.state["due"][0])
+            if card is not None:
+                return self.ask(f"\n🔁 Time to review {card.front} ({card.deck}). How well do you remember it? "
+                                f"(0 = forgot, {MAX_GRADE} = perfect)\n👉 Your answer: ", "grade")
+            self.state["due"].pop(0)
+        return self.finish(self.assistant.schedule_study_session(self.state["subject"], self.state["reviewed"]))
+
+    def step_grade(self, reply: str) -> Step:
+        grade = reply.strip()
+        if not grade.isdigit() or int(grade) > MAX_GRADE:
+            self.say(f"❌ Please answer with a number from 0 to {MAX_GRADE}.")
+            return self.ask_review()
+        card = self.assistant.scheduler.review(self.state["due"].pop(0), int(grade))
+        self.state["reviewed"] += 1
+        self.say(f"🗓️ Next review of {card.front} {describe_wait(card.due - time.time())}.")
+        return self.ask_review()
+
+    def step_topic(self, reply: str) -> Step:
+        topic = reply.strip()
+        self.state["topic"] = topic
+        # A topic the user struggled with is worth reviewing later too
+        if topic:
+            self.assistant.scheduler.add(study_key(self.assistant.identity), self.state["subject"], topic)
+        self.say("\n📖 Okay! Let me break it down for you...\n")
+        explanation = self.assistant.explain_topic(topic)
+        self.say(explanation.message)
+
+        # Step 3: Follow-up check
+        return self.ask("\n🧠 Do you feel more confident now? (yes/no): ", "confident")
+
+    def step_confident(self, reply: str) -> Step:
+        if reply.strip().lower() == "no":
+            return self.finish(self.assistant.explain_with_analogy(self.state["topic"]))
+        else:
+            return self.finish(self.assistant.generateResponse("🙌 Awesome! Let me know if you'd like to review anything else."))
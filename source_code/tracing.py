@@ -0,0 +1,288 @@
+"""Per-stage latency tracing for the request pipeline.
+
+Wrap a stage in a span, labelled with the request's CommandType once known:
+
+    with span("classify") as s:
+        command_type = classify_command(text)
+        s.label = command_type
+
+Durations go into a log-bucketed histogram per (stage, label): 8 buckets per
+doubling, so percentiles are within ~9% and recording is O(1) with no
+per-sample memory. Each thread records into its own histograms, so recording
+takes no lock; exports merge them. Time spent waiting on the user (see
+`waiting()`, used by the interactive IOChannels) is taken out of every open
+span on that thread, so "handle_request" means the assistant's own time,
+not the user's.
+
+Exports: TRACER.to_json() and TRACER.to_prometheus(). The chat server serves
+them at /metrics.json and /metrics.
+
+Environment:
+    TRACING=0            turn spans into no-ops
+    TRACE_EXPORT=path    on exit, console/GUI write the histograms (.prom for Prometheus text, else JSON)
+    TRACE_PROFILE=path   profile the whole session with cProfile; view with snakeviz or flameprof
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+BUCKETS_PER_DOUBLING = 8
+# Prometheus "le" bounds in seconds
+PROMETHEUS_BOUNDS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def bucket_of(ns: int) -> int:
+    """Doubling number * 8 + which eighth of that doubling `ns` falls in; integer ops only."""
+    bits = ns.bit_length()
+    if bits < 4:
+        return ns
+    return (bits - 3) * BUCKETS_PER_DOUBLING + ((ns >> (bits - 4)) & 7)
+
+
+def bucket_upper_ns(bucket: int) -> float:
+    if bucket < BUCKETS_PER_DOUBLING:
+        return bucket + 1
+    doubling, eighth = divmod(bucket, BUCKETS_PER_DOUBLING)
+    return (8 + eighth + 1) << (doubling - 1)
+
+
+class Histogram:
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int):
+        bucket = bucket_of(ns)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other: "Histogram"):
+        for bucket, count in list(other.buckets.items()):
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound, in ns, of the bucket holding the given fraction of samples."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(bucket_upper_ns(bucket), self.max_ns)
+        return self.max_ns
+
+    def summary(self) -> dict:
+        ms = 1e-6
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count * ms if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * ms,
+            "p95_ms": self.percentile(0.95) * ms,
+            "p99_ms": self.percentile(0.99) * ms,
+            "max_ms": self.max_ns * ms,
+        }
+
+
+class ThreadState:
+    """What one thread has recorded. Only that thread writes it, so recording takes no lock."""
+    __slots__ = ("thread", "histograms", "waited_ns")
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.waited_ns = 0
+
+    def record(self, stage: str, label, ns: int):
+        key = (stage, label if label is None or label.__class__ is str else label.value)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.record(ns if ns > 0 else 0)
+
+
+class Span:
+    __slots__ = ("state", "stage", "label", "start", "waited_at_start")
+
+    def __init__(self, state: ThreadState, stage: str, label):
+        self.state = state
+        self.stage = stage
+        self.label = label
+
+    def __enter__(self):
+        self.waited_at_start = self.state.waited_ns
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *_):
+        elapsed = time.perf_counter_ns() - self.start
+        # Minus whatever this thread spent waiting on the user inside the span
+        self.state.record(self.stage, self.label, elapsed - (self.state.waited_ns - self.waited_at_start))
+        return False
+
+
+class _NullSpan:
+    stage = label = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def label_name(label) -> str:
+    if label is None:
+        return "-"
+    return getattr(label, "value", str(label))
+
+
+class Tracer:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._states = []   # live threads' ThreadStates, merged on export
+        self._retired: Dict[Tuple[str, str], Histogram] = {}   # what finished threads recorded
+
+    def _state(self) -> ThreadState:
+        try:
+            return self._local.state
+        except AttributeError:
+            state = self._local.state = ThreadState()
+            with self._lock:
+                self._states.append(state)
+            return state
+
+    def span(self, stage: str, label=None):
+        """Time a stage; set `.label` on the returned span if the CommandType is only known later."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self._state(), stage, label)
+
+    @contextmanager
+    def waiting(self):
+        """Mark time spent waiting on the user: recorded as "user_wait" and left out of enclosing spans."""
+        if not self.enabled:
+            yield
+            return
+        state = self._state()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            waited = time.perf_counter_ns() - start
+            state.waited_ns += waited
+            state.record("user_wait", None, waited)
+
+    def record(self, stage: str, label, ns: int):
+        if self.enabled:
+            self._state().record(stage, label, ns)
+
+    def histograms(self) -> Dict[Tuple[str, str], Histogram]:
+        """All threads' histograms merged, keyed by (stage, command type name)."""
+        with self._lock:
+            # The GUI starts a thread per message: fold finished threads in so they don't pile up
+            for state in [state for state in self._states if not state.thread.is_alive()]:
+                self._merge_into(self._retired, state.histograms)
+                self._states.remove(state)
+            merged: Dict[Tuple[str, str], Histogram] = {}
+            self._merge_into(merged, self._retired)
+            for state in self._states:
+                self._merge_into(merged, state.histograms)
+        return merged
+
+    @staticmethod
+    def _merge_into(merged: dict, histograms: dict):
+        for (stage, label), histogram in list(histograms.items()):
+            key = (stage, label_name(label))
+            if key not in merged:
+                merged[key] = Histogram()
+            merged[key].merge(histogram)
+
+    def reset(self):
+        with self._lock:
+            self._retired = {}
+            for state in self._states:
+                state.histograms = {}
+
+    # Exports
+
+    def to_json(self) -> dict:
+        """{stage: {command_type: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}}"""
+        report = {}
+        for (stage, label), histogram in sorted(self.histograms().items()):
+            report.setdefault(stage, {})[label] = histogram.summary()
+        return report
+
+    def to_prometheus(self, name: str = "assistant_stage_seconds") -> str:
+        lines = [f"# HELP {name} Time spent per pipeline stage and command type.", f"# TYPE {name} histogram"]
+        for (stage, label), histogram in sorted(self.histograms().items()):
+            tags = f'stage="{stage}",command_type="{label}"'
+            for bound in PROMETHEUS_BOUNDS:
+                # A bucket counts toward a bound once its whole range is below it
+                limit = bound * 1e9
+                count = sum(n for bucket, n in histogram.buckets.items() if bucket_upper_ns(bucket) <= limit)
+                lines.append(f'{name}_bucket{{{tags},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{tags},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{tags}}} {histogram.total_ns / 1e9:.6f}")
+            lines.append(f"{name}_count{{{tags}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_json(), f, indent=2)
+
+
+TRACER = Tracer(enabled=os.getenv("TRACING", "1") != "0")
+
+
+def span(stage: str, label=None):
+    return TRACER.span(stage, label)
+
+
+def waiting():
+    return TRACER.waiting()
+
+
+@contextmanager
+def traced_session(profile_path: Optional[str] = None, export_path: Optional[str] = None):
+    """Run a whole console/GUI session, optionally under cProfile, exporting histograms at the end.
+
+    Both paths default to TRACE_PROFILE and TRACE_EXPORT.
+    """
+    profile_path = profile_path or os.getenv("TRACE_PROFILE")
+    export_path = export_path or os.getenv("TRACE_EXPORT")
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield TRACER
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            print(f"📈 Profile written to {profile_path} (try: snakeviz {profile_path})", file=sys.stderr)
+        if export_path:
+            TRACER.export(export_path)
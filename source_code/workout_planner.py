@@ -0,0 +1,312 @@
+"""Weekly workout plans built to fit the user, for FitnessAssistant.
+
+A plan is chosen under four constraints:
+- days: exactly the requested number of training days, spread across the week;
+- target muscle: trained as often as recovery allows (up to 3x/week), with
+  the most volume;
+- recovery: no muscle is worked on two days in a row (Sunday -> Monday
+  included), and hard days never run longer than the level allows, so
+  extra days become cardio or mobility;
+- volume: weekly sets per muscle and sets per session stay within the
+  level's limits.
+
+There are few distinct inputs (goal kind x 7 days x 10 muscle choices x 3
+levels), and they repeat across users, so finished schedules are kept in
+an LRU cache (PLAN_CACHE_SIZE) keyed on (goal, days, muscle, level).
+
+    PYTHONPATH=. python source_code/workout_planner.py "build muscle" 4 --muscle chest
+"""
+import argparse
+import math
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from source_code.catalogs import Catalog
+
+PLAN_CACHE_SIZE = 2048   # more than every (goal, days, muscle, level) combination
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+EXERCISES = {
+    "chest": ("Bench press", "Incline dumbbell press", "Push-ups", "Cable fly"),
+    "shoulder": ("Overhead press", "Lateral raise", "Face pull"),
+    "triceps": ("Triceps dips", "Rope pushdown", "Skull crushers"),
+    "back": ("Pull-ups", "Barbell row", "Lat pulldown", "Seated cable row"),
+    "biceps": ("Barbell curl", "Hammer curl", "Incline curl"),
+    "forearms": ("Farmer's carry", "Wrist curl", "Reverse curl"),
+    "legs": ("Back squat", "Romanian deadlift", "Walking lunge", "Leg press"),
+    "glutes": ("Hip thrust", "Bulgarian split squat", "Glute bridge"),
+    "abs": ("Plank", "Hanging leg raise", "Cable crunch", "Dead bug"),
+}
+MUSCLES = tuple(EXERCISES)
+
+# Session type -> muscles it works. Sessions that work none are light days.
+SESSIONS: Dict[str, Tuple[str, ...]] = {
+    "push": ("chest", "shoulder", "triceps"),
+    "pull": ("back", "biceps", "forearms"),
+    "legs": ("legs", "glutes", "abs"),
+    "upper": ("chest", "back", "shoulder", "biceps", "triceps"),
+    "lower": ("legs", "glutes", "abs"),
+    "full body": ("chest", "back", "legs", "glutes", "shoulder", "abs"),
+    "hiit": ("legs", "glutes", "abs"),
+    "cardio": (),
+    "mobility": (),
+}
+LABELS = {"hiit": "HIIT", "full body": "Full body"}
+LIGHT_DETAILS = {
+    "cardio": "{cardio} min steady cardio (brisk walk, bike or easy run)",
+    "mobility": "30 min stretching, yoga flow and foam rolling",
+}
+
+
+class Goal(NamedTuple):
+    name: str
+    sessions: Tuple[str, ...]   # preferred session types, best first
+    light: str                  # what an extra day becomes
+    reps: str
+    volume: float               # share of the level's weekly set budget
+    cardio: int                 # minutes added to hard days (and a light cardio day)
+    light_share: float          # at least this share of the training days are light
+
+
+GOALS = {
+    "build muscle": Goal("build muscle", ("push", "pull", "legs", "upper", "lower", "full body"), "mobility", "6-12", 1.0, 0, 0.0),
+    "tone body": Goal("tone body", ("upper", "lower", "full body", "hiit"), "cardio", "12-15", 0.8, 15, 0.0),
+    "lose weight": Goal("lose weight", ("full body", "hiit", "upper", "lower"), "cardio", "15-20", 0.6, 30, 0.25),
+    "endurance": Goal("endurance", ("full body", "lower", "hiit"), "cardio", "15-20", 0.5, 40, 0.5),
+    "flexibility": Goal("flexibility", ("full body",), "mobility", "12-15", 0.4, 0, 0.5),
+    "general fitness": Goal("general fitness", ("full body", "upper", "lower"), "cardio", "10-15", 0.7, 20, 0.0),
+}
+# Free-text goals are matched by keywords that start a word ("gain" is not in "again",
+# "run" not in "brunch"); anything else gets a balanced plan
+GOAL_CATALOG = Catalog(word_start=True, goal={
+    "lose weight": "lose weight", "weight": "lose weight", "fat": "lose weight", "lean": "lose weight",
+    "slim": "lose weight", "cut": "lose weight",
+    "tone": "tone body", "define": "tone body", "firm": "tone body",
+    "muscle": "build muscle", "bulk": "build muscle", "strong": "build muscle", "strength": "build muscle",
+    "gain": "build muscle", "mass": "build muscle",
+    "endurance": "endurance", "stamina": "endurance", "marathon": "endurance", "run": "endurance",
+    "cardio": "endurance",
+    "flexib": "flexibility", "mobility": "flexibility", "stretch": "flexibility", "yoga": "flexibility",
+})
+DEFAULT_GOAL = "general fitness"
+
+
+class Level(NamedTuple):
+    max_hard_run: int           # hard days in a row
+    session_sets: int           # sets in one session
+    weekly_sets: Tuple[int, int]  # per muscle: (maintenance, most for the target)
+
+
+LEVELS = {
+    "beginner": Level(2, 12, (6, 10)),
+    "intermediate": Level(3, 16, (8, 15)),
+    "advanced": Level(5, 20, (10, 20)),
+}
+DEFAULT_LEVEL = "intermediate"
+
+
+class Exercise(NamedTuple):
+    name: str
+    sets: int
+
+
+class DayPlan(NamedTuple):
+    day: str
+    session: Optional[str]      # None on rest days
+    exercises: Tuple[Exercise, ...]
+    cardio: int
+
+
+def label(session: str) -> str:
+    return LABELS.get(session, session.title())
+
+
+def resolve_goal(text: str) -> str:
+    match = GOAL_CATALOG.match(text or "")
+    return match.value if match else DEFAULT_GOAL
+
+
+def spread_days(days: int) -> Tuple[int, ...]:
+    """The `days` weekdays spaced as evenly as possible, starting on Monday."""
+    return tuple(sorted({math.floor(i * 7 / days) for i in range(days)}))
+
+
+def choose_sessions(goal: Goal, training_days: Tuple[int, ...], muscle: Optional[str], level: Level) -> Tuple[str, ...]:
+    """The session for every training day that best fits the constraints.
+
+    Depth-first over the days with memoized states. Among the assignments
+    that satisfy the recovery rules, prefer (in order) the target muscle
+    trained most often (up to 3x), the most muscles covered, then the goal's
+    preferred session types.
+    """
+    options = goal.sessions + (goal.light,)
+    rank = {session: len(options) - i for i, session in enumerate(options)}
+    bits = {session: sum(1 << MUSCLES.index(m) for m in SESSIONS[session]) for session in options}
+    target = 1 << MUSCLES.index(muscle) if muscle in EXERCISES else 0
+    count = len(training_days)
+    lights_needed = math.floor(count * goal.light_share)
+    wraps = count > 1 and training_days[0] == 0 and training_days[-1] == 6
+
+    def best(i, previous, run, lead, hits, covered, first, lights):
+        # -> (target hits, muscles covered, preference) of the best completion, and its sessions
+        if i == count:
+            if lights < lights_needed:
+                return None
+            if wraps and bits[previous] & bits[first]:
+                return None
+            if wraps and lead is not None and run + lead > level.max_hard_run:
+                return None
+            return (min(hits, 3), bin(covered).count("1"), 0), ()
+        if lights + count - i < lights_needed:
+            return None
+        key = (i, previous, run, lead, min(hits, 3), covered, first, lights)
+        if key in memo:
+            return memo[key]
+
+        adjacent = i > 0 and training_days[i] == training_days[i - 1] + 1
+        result = None
+        for session in options:
+            worked = bits[session]
+            if adjacent and worked & bits[previous]:
+                continue
+            hard = worked != 0
+            streak = (run + 1 if adjacent else 1) if hard else 0
+            if streak > level.max_hard_run:
+                continue
+            # The run that starts the week is finished by the first break in it
+            next_lead = lead
+            if lead is None and (not hard or (i > 0 and not adjacent)):
+                next_lead = run
+            found = best(i + 1, session, streak, next_lead, hits + (1 if worked & target else 0),
+                         covered | worked, first if i else session, lights + (not hard))
+            if found is None:
+                continue
+            score = found[0][:2] + (found[0][2] + rank[session],)
+            if result is None or score > result[0]:
+                result = (score, (session,) + found[1])
+        memo[key] = result
+        return result
+
+    memo = {}
+    found = best(0, None, 0, None, 0, 0, None, 0)
+    # The light session is always allowed, so some assignment always exists
+    return found[1]
+
+
+def allocate_sets(goal: Goal, sessions: Tuple[str, ...], muscle: Optional[str], level: Level) -> Tuple[Dict[str, int], ...]:
+    """Sets per muscle for each session, within the weekly and per-session limits.
+
+    A muscle's weekly sets are split evenly over its sessions, the remainder
+    going to the sessions with the fewest sets so far (the first ones on a
+    tie), so the week adds up to the weekly limit unless the per-session
+    limit gets in the way.
+    """
+    maintenance, most = level.weekly_sets
+    frequency = {m: sum(1 for s in sessions if m in SESSIONS[s]) for m in MUSCLES}
+    weekly = {m: round((most if m == muscle else maintenance) * goal.volume) if frequency[m] else 0 for m in MUSCLES}
+
+    counts = [dict.fromkeys(SESSIONS[session], 0) for session in sessions]
+    for m in sorted(MUSCLES, key=lambda m: m != muscle):
+        worked = [i for i, session in enumerate(sessions) if m in SESSIONS[session]]
+        if not worked:
+            continue
+        base, extra = divmod(weekly[m], len(worked))
+        lucky = sorted(worked, key=lambda i: sum(counts[i].values()))[:extra]
+        for i in worked:
+            counts[i][m] = base + (i in lucky)
+
+    plans = []
+    given = dict.fromkeys(MUSCLES, 0)
+    for session, planned in zip(sessions, counts):
+        sets = {m: n for m, n in planned.items() if n}
+        # Over the session cap: trim the other muscles first, the target last
+        while sum(sets.values()) > level.session_sets:
+            trimmable = [m for m in sets if m != muscle and sets[m] > 1] or [m for m in sets if sets[m] > 1]
+            if not trimmable:
+                break
+            biggest = max(trimmable, key=lambda m: sets[m])
+            sets[biggest] -= 1
+        for m, count in sets.items():
+            given[m] += count
+        plans.append(sets)
+
+    # Sets trimmed above go to the muscle's sessions that still have room, target first
+    for session, sets in zip(sessions, plans):
+        for m in sorted(SESSIONS[session], key=lambda m: m != muscle):
+            extra = min(weekly[m] - given[m], level.session_sets - sum(sets.values()))
+            if extra > 0:
+                sets[m] = sets.get(m, 0) + extra
+                given[m] += extra
+    return tuple(plans)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def plan_week(goal: str, days: int, muscle: Optional[str] = None, level: str = DEFAULT_LEVEL) -> Tuple[DayPlan, ...]:
+    """The week's plan for a resolved goal name (see resolve_goal)."""
+    profile = GOALS[goal]
+    limits = LEVELS[level]
+    muscle = muscle if muscle in EXERCISES else None
+    training_days = spread_days(max(1, min(7, days)))
+    sessions = choose_sessions(profile, training_days, muscle, limits)
+    volumes = dict(zip(training_days, allocate_sets(profile, sessions, muscle, limits)))
+    chosen = dict(zip(training_days, sessions))
+
+    week = []
+    for day, name in enumerate(WEEKDAYS):
+        session = chosen.get(day)
+        if session is None:
+            week.append(DayPlan(name, None, (), 0))
+            continue
+        exercises = []
+        # Target muscle first, while the lifter is fresh
+        for m in sorted(volumes[day], key=lambda m: m != muscle):
+            sets = volumes[day][m]
+            moves = EXERCISES[m][:max(1, math.ceil(sets / 4))]
+            for n, move in enumerate(moves):
+                exercises.append(Exercise(move, sets // len(moves) + (1 if n < sets % len(moves) else 0)))
+        cardio = profile.cardio if SESSIONS[session] or session == "cardio" else 0
+        week.append(DayPlan(name, session, tuple(exercises), cardio))
+    return tuple(week)
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def schedule_text(goal: str, days: int, muscle: Optional[str] = None, level: str = DEFAULT_LEVEL) -> str:
+    """plan_week as the text FitnessAssistant shows; cached separately so a repeat is one lookup."""
+    profile = GOALS[goal]
+    lines = []
+    for day in plan_week(goal, days, muscle, level):
+        if day.session is None:
+            lines.append(f"{day.day}: Rest")
+        elif not day.exercises:
+            lines.append(f"{day.day}: {label(day.session)} – " + LIGHT_DETAILS[day.session].format(cardio=day.cardio or 30))
+        else:
+            focus = f" ({muscle} focus)" if muscle in SESSIONS[day.session] else ""
+            moves = ", ".join(f"{e.name} {e.sets}×{profile.reps}" for e in day.exercises)
+            extra = f" + {day.cardio} min cardio" if day.cardio else ""
+            lines.append(f"{day.day}: {label(day.session)}{focus} – {moves}{extra}")
+    return "\n".join(lines)
+
+
+def cache_info() -> dict:
+    return {"plans": plan_week.cache_info()._asdict(), "texts": schedule_text.cache_info()._asdict()}
+
+
+def cache_clear():
+    plan_week.cache_clear()
+    schedule_text.cache_clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print a weekly workout plan.")
+    parser.add_argument("goal")
+    parser.add_argument("days", type=int)
+    parser.add_argument("--muscle", choices=MUSCLES)
+    parser.add_argument("--level", choices=tuple(LEVELS), default=DEFAULT_LEVEL)
+    args = parser.parse_args(argv)
+    goal = resolve_goal(args.goal.lower())
+    print(f"Goal: {goal}")
+    print(schedule_text(goal, args.days, args.muscle, args.level))
+
+
+if __name__ == "__main__":
+    main()
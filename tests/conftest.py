@@ -0,0 +1,6 @@
+import os
+
+# Tests use in-memory stores; nothing is written to the real ones in the home directory
+os.environ.setdefault("SRS_PATH", "")
+os.environ.setdefault("NUTRITION_LOGS", "")
+os.environ.setdefault("QUOTA_PATH", "")
@@ -0,0 +1,115 @@
+import json
+import random
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from source_code import nutrition, srs
+from source_code.conversation import Conversation
+from source_code.io_channel import ScriptedChannel
+from source_code.main import restore_conversation, select_assistant
+from source_code.models import CommandType, Request, UserProfile
+
+# (CommandType, request, answers to every question it asks)
+FLOWS = [
+    (CommandType.FITNESS, "I want to build muscle", ["legs", "yes", "build muscle", "5"]),
+    (CommandType.FITNESS, "help me get fit", ["toes", "chest", "yes", "lose weight", "eight", "3"]),
+    (CommandType.STUDY, "I need to review", ["math", "a"]),
+    (CommandType.STUDY, "study help", ["history", "b", "the cold war", "no"]),
+    (CommandType.PSYCHOLOGY, "I feel a bit lost today", ["school is stressful", "advice", "no"]),
+    (CommandType.NUTRITION, "log my lunch", ["2 eggs and a banana"]),
+    (CommandType.MUSIC, "make me a playlist", ["something for studying"]),
+]
+
+
+@pytest.fixture
+def fresh_stores(monkeypatch):
+    """Call to start over with empty review cards and food logs."""
+    def reset():
+        monkeypatch.setattr(srs, "_default_scheduler", None)
+        monkeypatch.setattr(nutrition, "_logs", OrderedDict())
+    return reset
+
+
+def user() -> UserProfile:
+    return UserProfile("Lien", 20, {}, False)
+
+
+def request(command_type: CommandType, text: str) -> Request:
+    return Request(text, datetime(2026, 5, 4, 12, 0), command_type)
+
+
+def transcript(step, shown: list) -> list:
+    shown.extend(message.strip() for message in step.messages if message.strip())
+    if step.prompt is not None:
+        shown.append(step.prompt.strip())
+    return shown
+
+
+@pytest.mark.parametrize("command_type, text, answers", FLOWS, ids=[f"{c.value}:{t}" for c, t, _ in FLOWS])
+def test_parked_conversation_resumes_like_an_uninterrupted_one(fresh_stores, command_type, text, answers):
+    fresh_stores()
+    random.seed(7)
+    io = ScriptedChannel(answers)
+    expected = select_assistant(command_type, user(), io).startConversation().run(request(command_type, text), io)
+
+    fresh_stores()
+    random.seed(7)
+    profile = user()
+    conversation = select_assistant(command_type, profile, ScriptedChannel()).startConversation()
+    step = conversation.start(request(command_type, text))
+    shown = transcript(step, [])
+    for answer in answers:
+        assert not step.done
+        # Park between every question, as the server does, and pick up in a new assistant
+        state = json.loads(json.dumps(conversation.to_dict()))
+        conversation = restore_conversation(state, profile)
+        step = conversation.resume(answer)
+        transcript(step, shown)
+
+    assert step.done and step.prompt is None
+    assert step.response.message == expected.message
+    assert shown == io.transcript
+
+
+def test_idle_sessions_are_only_their_state(fresh_stores):
+    fresh_stores()
+    profile = user()
+    command_type, text, answers = FLOWS[4]
+    parked = []
+    for _ in range(500):
+        conversation = select_assistant(command_type, profile, ScriptedChannel()).startConversation()
+        assert not conversation.start(request(command_type, text)).done
+        parked.append(json.dumps(conversation.to_dict()))
+    assert max(len(state) for state in parked) < 200
+
+    def answer(state: str, reply: str):
+        conversation = restore_conversation(json.loads(state), profile)
+        step = conversation.resume(reply)
+        return step, json.dumps(conversation.to_dict())
+
+    # Each answer may be picked up by any worker thread; no thread waits on a user
+    with ThreadPoolExecutor(4) as workers:
+        for reply in answers:
+            results = list(workers.map(answer, parked, [reply] * len(parked)))
+            parked = [state for _, state in results]
+    assert all(step.done for step, _ in results)
+
+
+def test_to_dict_is_a_copy_of_the_state():
+    conversation = select_assistant(CommandType.STUDY, user()).startConversation()
+    conversation.start(request(CommandType.STUDY, "help me study"))
+    state = conversation.to_dict()
+    assert state == {"command_type": CommandType.STUDY.value, "input": "help me study", "step": "subject"}
+    state["step"] = "choice"
+    assert conversation.state["step"] == "subject"
+
+
+def test_resume_after_the_end_is_an_error():
+    conversation = Conversation(select_assistant(CommandType.MUSIC, user()))
+    step = conversation.start(request(CommandType.MUSIC, "play me something romantic"))
+    assert step.done
+    with pytest.raises(RuntimeError):
+        conversation.resume("again")
@@ -0,0 +1,69 @@
+import io
+import sys
+
+import pytest
+
+from source_code import intent_model
+from source_code.intent_model import DEFAULT_CONFIDENCE, get_default_model, main
+from source_code.intent_router import INTENT_ROUTER, route_intent
+from source_code.models import CommandType
+
+TEXTS = [
+    "i want to build muscle",
+    "recommend me a book to read",
+    "i already ate",
+    "how many calories in a banana",
+    "i feel sad",
+    "tell me a joke",
+    "",
+    "zzz qqq",
+]
+
+
+def test_model_reads_whole_words():
+    model = get_default_model()
+    assert model.route("i want to build muscle").command_type == CommandType.FITNESS
+    assert model.route("recommend me a book to read").command_type == CommandType.BOOK
+    # "already" contains "read", which the substring table takes for a book request
+    assert model.route("i already ate").command_type != CommandType.BOOK
+    assert model.route("zzz qqq") == (CommandType.GENERAL, DEFAULT_CONFIDENCE)
+
+
+def test_route_matches_classify_batch():
+    model = get_default_model()
+    for text, route in zip(TEXTS, model.classify_batch(TEXTS)):
+        assert route.command_type == model.route(text).command_type, text
+        assert route.confidence == pytest.approx(model.route(text).confidence, abs=1e-5), text
+
+
+def test_batches_are_split(monkeypatch):
+    model = get_default_model()
+    whole = model.classify_batch(TEXTS)
+    monkeypatch.setattr(intent_model, "BATCH_SIZE", 3)
+    assert [route.command_type for route in model.classify_batch(TEXTS)] == [route.command_type for route in whole]
+
+
+def test_live_routing_stays_on_the_keyword_table():
+    for text in TEXTS:
+        assert route_intent(text) == INTENT_ROUTER.route(text)
+    assert get_default_model() is get_default_model()
+
+
+def test_cli_routes_a_file_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(intent_model, "BATCH_SIZE", 3)
+    source, sink = tmp_path / "in.txt", tmp_path / "out.txt"
+    source.write_text("\n".join(TEXTS) + "\n", encoding="utf-8")
+    main([str(source), "-o", str(sink)])
+    lines = sink.read_text(encoding="utf-8").splitlines()
+    expected = get_default_model().classify_batch(TEXTS)
+    assert [line.split("\t")[0] for line in lines] == [route.command_type.value if route.command_type else "FEELINGS"
+                                                     for route in expected]
+
+
+def test_cli_leaves_stdin_and_stdout_open(monkeypatch):
+    stdin, stdout = io.StringIO("i want to build muscle\ni feel sad\n"), io.StringIO()
+    monkeypatch.setattr(sys, "stdin", stdin)
+    monkeypatch.setattr(sys, "stdout", stdout)
+    main(["-"])
+    assert not stdin.closed and not stdout.closed
+    assert [line.split("\t")[0] for line in stdout.getvalue().splitlines()] == [CommandType.FITNESS.value, "FEELINGS"]
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from source_code.intent_router import INTENT_ROUTER, route_followup
+from source_code import keyword_index
+from source_code.keyword_index import KeywordIndex
+from source_code.models import CommandType
+
+TABLE = (
+    ("mood", ("sad", "happy", "relax")),
+    ("activity", ("read", "reading", "run", "relaxing walk")),
+    ("genre", ("fantasy", "romance", "read")),
+)
+
+
+def wide(table, extra: int, seed: int = 5):
+    """The same table padded with made-up keywords."""
+    rng = random.Random(seed)
+    return tuple((label, tuple(words) + tuple("".join(rng.choice("bcdfgklmprstvz") for _ in range(rng.randint(3, 7)))
+                                               for _ in range(extra))) for label, words in table)
+
+
+def brute_counts(table, text):
+    counts = {}
+    for label, words in table:
+        for word in words:
+            if word in text:
+                counts[label] = counts.get(label, 0) + 1
+    return counts
+
+
+def brute_first(table, text):
+    for label, words in table:
+        for word in words:
+            if word in text:
+                return word, label
+    return None
+
+
+@pytest.mark.parametrize("table", [TABLE, wide(TABLE, 30)], ids=["short", "wide"])
+def test_matches_like_substring_checks(table):
+    index = KeywordIndex(table)
+    assert index.first("i'm relaxing after a walk") == ("relax", "mood")
+    assert index.first("fantasy romance") == ("fantasy", "genre")
+    assert index.counts("a relaxing walk, reading fantasy") == {"mood": 1, "activity": 3, "genre": 2}
+    assert index.counts("already running") == {"activity": 2, "genre": 1}
+    assert index.first("nothing here") is None
+    assert index.counts("") == {}
+
+    # Overlapping and nested keywords, the cases a one-pass scan is most likely to miss
+    rng = random.Random(1)
+    words = [word for _, group in table for word in group]
+    for _ in range(3000):
+        text = "".join(rng.choice(words)[rng.randrange(3):] + rng.choice(["", " ", "s"]) for _ in range(rng.randint(0, 6)))
+        assert index.counts(text) == brute_counts(table, text), text
+        assert index.first(text) == brute_first(table, text), text
+        assert index.tally(text) == [index.counts(text).get(label, 0) for label in index.labels]
+
+
+@pytest.mark.parametrize("table", [TABLE, wide(TABLE, 30)], ids=["short", "wide"])
+def test_word_start(table):
+    index = KeywordIndex(table, word_start=True)
+    assert index.first("i already ate") is None
+    assert index.first("reading now") == ("read", "activity")
+    assert index.counts("already reading") == {"activity": 2, "genre": 1}
+    assert index.first("a relaxing walk") == ("relax", "mood")
+    assert index.counts("unrelaxing walk") == {}
+
+
+def test_word_cache_starts_over_when_full(monkeypatch):
+    monkeypatch.setattr(keyword_index, "WORD_CACHE", 2)
+    index = KeywordIndex(TABLE)
+    for text in ("sad day", "happy run", "one two three", "reading fantasy", "sad day"):
+        assert index.counts(text) == brute_counts(TABLE, text), text
+    assert len(index._known) <= 2
+
+
+def test_empty_table():
+    index = KeywordIndex(())
+    assert index.first("anything") is None
+    assert index.counts("anything") == {}
+    assert index.tally("anything") == []
+
+
+def test_intent_router_keeps_the_old_priority():
+    assert INTENT_ROUTER.route("play a song for my workout").command_type == CommandType.MUSIC
+    assert INTENT_ROUTER.route("i feel like listening to music").command_type is None
+    assert INTENT_ROUTER.route("what is the capital of peru").command_type == CommandType.GENERAL
+    route = INTENT_ROUTER.route("gym workout then homework")
+    assert route == (CommandType.FITNESS, pytest.approx(2 / 3))
+    assert route_followup("just talk to me").command_type == CommandType.PSYCHOLOGY
+    assert route_followup("no idea").command_type is None
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from source_code import nutrition
+from source_code.nutrition import COLUMN, FoodDB, IntakeLog, MealItem, get_default_db, get_intake_log, grams, parse_meal
+from source_code.nutrition_assistant import nutrition_key
+from source_code.quota import local_identity
+
+DAY = 739000
+
+
+@pytest.fixture(scope="module")
+def db():
+    return get_default_db()
+
+
+def test_parse_meal_reads_amounts_and_units():
+    assert parse_meal("I had 2 eggs, 150g rice and a banana") == [
+        MealItem("eggs", 2.0, None), MealItem("rice", 150.0, "g"), MealItem("banana", 1.0, None)]
+    assert parse_meal("two slices of pizza with a glass of milk") == [
+        MealItem("pizza", 2.0, "slices"), MealItem("milk", 1.0, "glass")]
+    assert parse_meal("half an avocado") == [MealItem("avocado", 0.5, None)]
+    assert parse_meal("just had lunch") == []
+
+
+def test_lookup_exact_prefix_word_and_misspelt(db):
+    assert db.names[db.lookup("banana")] == "banana"
+    assert db.names[db.lookup("bananas")] == "banana"
+    assert db.names[db.lookup("chicken br")] == "chicken breast"
+    assert db.lookup("chicken") is not None and "chicken" in db.names[db.lookup("chicken")]
+    assert db.names[db.lookup("brocoli")] == "broccoli"
+    assert db.lookup("xylophone") is None
+
+
+def test_grams_by_unit_or_serving(db):
+    egg = db.lookup("egg")
+    assert grams(db, egg, MealItem("egg", 2, None)) == pytest.approx(2 * float(db.servings[egg]))
+    assert grams(db, egg, MealItem("egg", 150, "g")) == 150
+    assert grams(db, egg, MealItem("egg", 1, "kg")) == 1000
+
+
+def tiny_db():
+    values = np.zeros((2, len(nutrition.NUTRIENTS)), dtype=np.float32)
+    values[0, COLUMN["calories"]], values[0, COLUMN["sugar"]] = 500, 20    # per 100 g
+    values[1, COLUMN["calories"]] = 100
+    return FoodDB(["cake", "bread"], [100, 50], values)
+
+
+def test_alerts_fire_once_when_a_limit_is_crossed():
+    log = IntakeLog(tiny_db(), limits={"calories": 2000, "sugar": 50})
+    assert log.add(0, 200, DAY) == []                       # 1000 kcal, 40 g sugar
+    alerts = log.add(0, 100, DAY)                            # 1500 kcal, 60 g sugar
+    assert [(a.nutrient, a.total, a.limit) for a in alerts] == [("sugar", 60.0, 50.0)]
+    assert [a.nutrient for a in log.add(0, 120, DAY)] == ["calories"]
+    assert log.add(0, 100, DAY) == []                        # already past both
+    assert log.add(0, 100, DAY + 1) == []                    # a new day starts from zero
+    assert log.contributors(DAY, "sugar") == ["cake"]
+
+
+def test_totals_match_the_running_day_totals():
+    log = IntakeLog(tiny_db())
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        log.add(int(rng.integers(2)), float(rng.integers(10, 300)), DAY + int(rng.integers(5)))
+    daily = log.daily(DAY, DAY + 5)
+    for offset in range(5):
+        assert np.allclose(daily[offset], log.day_totals(DAY + offset))
+    assert np.allclose(log.totals(DAY, DAY + 5), daily.sum(axis=0))
+
+
+def test_logs_are_reloaded_from_their_file(tmp_path):
+    db = tiny_db()
+    path = str(tmp_path / "log.jsonl")
+    log = IntakeLog(db, path)
+    log.add(0, 120, DAY)
+    log.add(1, 80, DAY + 1)
+    again = IntakeLog(db, path)
+    assert again.size == 2
+    assert np.allclose(again.day_totals(DAY), log.day_totals(DAY))
+
+
+def test_only_recent_logs_stay_open(tmp_path, monkeypatch):
+    monkeypatch.setenv("NUTRITION_LOGS", str(tmp_path))
+    monkeypatch.setattr(nutrition, "LOG_CACHE", 2)
+    monkeypatch.setattr(nutrition, "_logs", nutrition.OrderedDict())
+    first = get_intake_log("user:1")
+    first.add(0, 100, DAY)
+    get_intake_log("user:2")
+    assert get_intake_log("user:1") is first           # touched again: user:2 is now the oldest
+    get_intake_log("user:3")
+    assert list(nutrition._logs) == ["user:1", "user:3"]
+    get_intake_log("user:2")
+    assert "user:1" not in nutrition._logs
+    reloaded = get_intake_log("user:1")
+    assert reloaded is not first and reloaded.size == 1
+
+
+def test_logs_follow_the_identity_not_the_name():
+    assert nutrition_key() == local_identity()
+    assert nutrition_key("user:42") == "user:42"
@@ -0,0 +1,121 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from source_code.models import CommandType, UserProfile
+from source_code.quota import QuotaEngine, Tier, parse_costs, quota_key
+
+FAR = 1e12   # a window so long that nothing refills while a test runs
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def engine(capacity=3, window=300.0, costs=None, path=None, clock=None) -> QuotaEngine:
+    tiers = {"free": Tier(capacity=capacity, window=window, costs=costs or {}), "premium": Tier(capacity=None)}
+    return QuotaEngine(tiers, path=path, clock=clock or Clock())
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return None if request.param == "memory" else str(tmp_path / "quota.sqlite3")
+
+
+def test_bucket_refuses_when_empty_and_refills_over_the_window(store):
+    clock = Clock()
+    quota = engine(capacity=3, window=300.0, path=store, clock=clock)
+    assert [quota.consume("u", "free").allowed for _ in range(4)] == [True, True, True, False]
+
+    refused = quota.consume("u", "free")
+    assert not refused.allowed
+    assert refused.retry_after == pytest.approx(100.0)   # one token per 100 s
+    assert quota.exhausted("u", "free")
+
+    clock.now += 100
+    assert quota.consume("u", "free").allowed
+    assert not quota.consume("u", "free").allowed
+
+    clock.now += 10_000
+    assert quota.remaining("u", "free") == 3
+
+
+def test_costs_per_command_type(store):
+    quota = engine(capacity=3, costs={CommandType.GENERAL: 2}, path=store)
+    assert quota.consume("u", "free", CommandType.GENERAL).remaining == 1
+    # Too expensive for what is left, but a cheaper request still fits
+    assert not quota.consume("u", "free", CommandType.GENERAL).allowed
+    assert not quota.exhausted("u", "free")
+    assert quota.consume("u", "free", CommandType.MUSIC).allowed
+    assert quota.exhausted("u", "free")
+
+
+def test_unlimited_tier_and_separate_buckets(store):
+    quota = engine(capacity=1, path=store)
+    assert all(quota.consume("u", "premium").allowed for _ in range(100))
+    assert quota.remaining("u", "premium") is None
+    assert quota.consume("a", "free").allowed
+    assert quota.consume("b", "free").allowed
+    assert not quota.consume("a", "free").allowed
+
+    quota.reset("a", "free")
+    assert quota.consume("a", "free").allowed
+
+
+def test_sqlite_buckets_are_shared_between_engines(tmp_path):
+    path = str(tmp_path / "quota.sqlite3")
+    first, second = engine(capacity=2, path=path), engine(capacity=2, path=path)
+    assert first.consume("u", "free").allowed
+    assert second.consume("u", "free").allowed
+    assert not first.consume("u", "free").allowed
+    assert not second.consume("u", "free").allowed
+
+
+def test_threads_never_overspend(store):
+    quota = engine(capacity=50, window=FAR, path=store, clock=time.time)
+    allowed = []
+    start = threading.Barrier(8)
+
+    def worker():
+        start.wait()
+        allowed.append(sum(quota.consume("shared", "free").allowed for _ in range(20)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(allowed) == 50
+
+
+def spend(path: str, attempts: int) -> int:
+    quota = QuotaEngine({"free": Tier(capacity=100, window=FAR)}, path=path)
+    try:
+        return sum(quota.consume("shared", "free").allowed for _ in range(attempts))
+    finally:
+        quota.close()
+
+
+def test_processes_sharing_a_file_never_overspend(tmp_path):
+    path = str(tmp_path / "quota.sqlite3")
+    with multiprocessing.get_context("spawn").Pool(6) as pool:
+        allowed = pool.starmap(spend, [(path, 60)] * 6)
+    assert sum(allowed) == 100
+
+
+def test_quota_key_follows_the_identity_not_the_name():
+    lien, other_lien = UserProfile("Lien", 20, {}, False), UserProfile("Lien", 30, {}, True)
+    assert quota_key(lien, "user:1") == ("user:1", "free")
+    assert quota_key(other_lien, "user:2") == ("user:2", "premium")
+    assert quota_key(lien)[0] == quota_key(UserProfile("Somebody else", 20, {}, False))[0]
+
+
+def test_parse_costs():
+    assert parse_costs("general=2, MUSIC=0.5,") == {CommandType.GENERAL: 2.0, CommandType.MUSIC: 0.5}
+    assert parse_costs("") == {}
@@ -0,0 +1,143 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from source_code.gemini_client import GeminiConnectionError, GeminiError, GeminiTimeout
+from source_code.resilience import CircuitBreaker, CircuitOpenError, ResilientClient, RetryPolicy
+
+
+class MaxDelay:
+    """rng for RetryPolicy: always the longest delay, so the timings are predictable."""
+
+    def uniform(self, low, high):
+        return high
+
+
+class FakeClient:
+    """Stands in for GeminiClient: each submit() takes the next outcome."""
+
+    model = "fake"
+    timeout = 1.0
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.deadlines = []
+
+    def submit(self, question, deadline):
+        self.deadlines.append(deadline)
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        future = concurrent.futures.Future()
+        if isinstance(outcome, Exception):
+            future.set_exception(outcome)
+        elif outcome is not None:
+            future.set_result(outcome)
+        # None: the request hangs until the caller's deadline
+        return future
+
+
+def resilient(client, attempts=5, delay=0.05, failures=100):
+    return ResilientClient(client, retry=RetryPolicy(attempts, base_delay=delay, max_delay=delay, rng=MaxDelay()),
+                           breaker=CircuitBreaker(failure_threshold=failures))
+
+
+def test_retries_until_an_answer():
+    client = FakeClient(GeminiConnectionError("down"), GeminiError("busy", status=503), "hello")
+    wrapper = resilient(client)
+    assert wrapper.generate("hi", deadline=1.0) == "hello"
+    stats = wrapper.stats_dict()
+    assert (stats["calls"], stats["attempts"], stats["retries"]) == (1, 3, 2)
+
+
+def test_retries_share_one_deadline():
+    client = FakeClient(GeminiConnectionError("down"))
+    wrapper = resilient(client, attempts=10, delay=0.06)
+    started = time.monotonic()
+    with pytest.raises(GeminiConnectionError):
+        wrapper.generate("hi", deadline=0.15)
+    assert time.monotonic() - started < 0.15
+    # 0.06 s between attempts: the third failure leaves too little for another
+    assert len(client.deadlines) == 3
+    assert client.deadlines == sorted(client.deadlines, reverse=True)
+    assert client.deadlines[0] <= 0.15 and client.deadlines[-1] < 0.06
+
+
+def test_a_hung_attempt_uses_up_the_budget():
+    client = FakeClient(None)
+    wrapper = resilient(client, attempts=3)
+    started = time.monotonic()
+    with pytest.raises(GeminiTimeout):
+        wrapper.generate("hi", deadline=0.1)
+    assert time.monotonic() - started < 0.2
+    assert len(client.deadlines) == 1
+
+
+def test_async_retries_share_one_deadline():
+    client = FakeClient(GeminiConnectionError("down"))
+    wrapper = resilient(client, attempts=10, delay=0.06)
+    with pytest.raises(GeminiConnectionError):
+        asyncio.run(wrapper.agenerate("hi", deadline=0.15))
+    assert len(client.deadlines) == 3
+
+
+def test_bad_requests_are_not_retried():
+    client = FakeClient(GeminiError("bad request", status=400))
+    wrapper = resilient(client, failures=1)
+    with pytest.raises(GeminiError):
+        wrapper.generate("hi")
+    assert len(client.deadlines) == 1
+    assert wrapper.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_probes_and_closes():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    now[0] = 10.0
+    breaker.check()                      # the one probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()                  # everyone else still fails fast
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.opened_at == 10.0
+
+    now[0] = 20.0
+    breaker.check()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.check()
+
+
+def test_open_breaker_short_circuits_calls():
+    client = FakeClient(GeminiConnectionError("down"))
+    wrapper = resilient(client, attempts=1, failures=1)
+    with pytest.raises(GeminiConnectionError):
+        wrapper.generate("hi")
+    with pytest.raises(CircuitOpenError):
+        wrapper.generate("hi")
+    assert len(client.deadlines) == 1
+    assert wrapper.stats_dict()["short_circuits"] == 1
+
+
+def test_stats_count_calls_from_many_threads():
+    wrapper = resilient(FakeClient("hello"))
+
+    def work():
+        for _ in range(500):
+            wrapper.generate("hi")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = wrapper.stats_dict()
+    assert stats["calls"] == stats["attempts"] == 4000
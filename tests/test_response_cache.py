@@ -0,0 +1,101 @@
+import sqlite3
+
+from source_code import response_cache
+from source_code.response_cache import ResponseCache, normalize_prompt
+
+
+def test_hits_share_normalized_prompts_per_model():
+    cache = ResponseCache()
+    cache.put("Tell me a joke", "flash", "Why did...")
+    assert cache.get("  tell me   a JOKE!? ", "flash") == "Why did..."
+    assert cache.get("tell me a joke", "pro") is None
+    assert normalize_prompt(" Hi\tthere?! ") == "hi there"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_empty_answers_are_not_cached():
+    cache = ResponseCache()
+    cache.put("question", "flash", "")
+    assert cache.get("question", "flash") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire_after_the_ttl():
+    cache = ResponseCache(ttl=0)
+    cache.put("question", "flash", "answer")
+    assert cache.get("question", "flash") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "flash", "A")
+    cache.put("b", "flash", "B")
+    assert cache.get("a", "flash") == "A"     # "b" is now the oldest
+    cache.put("c", "flash", "C")
+    assert cache.get("b", "flash") is None
+    assert cache.get("a", "flash") == "A" and cache.get("c", "flash") == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_persisted_answers_outlive_eviction_and_restarts(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(max_entries=1, path=path)
+    cache.put("a", "flash", "A")
+    cache.put("b", "flash", "B")
+    assert cache.get("a", "flash") == "A"     # evicted from memory, loaded back from SQLite
+    cache.close()
+
+    reopened = ResponseCache(path=path)
+    assert reopened.get("b", "flash") == "B"
+    reopened.clear()
+    assert reopened.get("a", "flash") is None
+    reopened.close()
+
+
+def test_expired_rows_are_dropped_on_open(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(ttl=0, path=path)
+    cache.put("a", "flash", "A")
+    cache.close()
+    reopened = ResponseCache(path=path)
+    assert reopened.get("a", "flash") is None
+    assert reopened.stats()["expirations"] == 0
+    reopened.close()
+
+
+def rows(path):
+    with sqlite3.connect(path) as db:
+        return [key.split("\n")[1] for key, in db.execute("SELECT key FROM responses ORDER BY expires_at")]
+
+
+def test_writes_delete_expired_rows(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(ttl=10, path=path)
+    cache.put("a", "flash", "A")
+    now[0] += 20
+    cache.put("b", "flash", "B")            # "a" is never asked for again, but goes anyway
+    assert rows(path) == ["b"]
+    cache.close()
+
+
+def test_table_keeps_the_newest_rows(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path=path, max_rows=3)
+    for prompt in "abcd":
+        now[0] += 1
+        cache.put(prompt, "flash", prompt.upper())
+    cache.put("c", "flash", "C again")      # replacing a row does not count twice
+    assert rows(path) == ["b", "d", "c"]
+    cache.close()
+
+    reopened = ResponseCache(path=path, max_rows=2)
+    assert rows(path) == ["d", "c"]
+    reopened.put("e", "flash", "E")
+    assert rows(path) == ["c", "e"]
+    reopened.close()
@@ -0,0 +1,208 @@
+import random
+
+import pytest
+
+from source_code.scrollback import PAGE_BLOCKS, TRIM_TO, Scrollback, Transcript, block_size
+
+
+class FakeText:
+    """The few tkinter.Text calls Scrollback makes, over a string, one tag per character and named marks.
+
+    Like Tk, marks have right gravity (text inserted at a mark goes before it),
+    deleting a range collapses the marks inside it to its start, and inserting
+    at "end" goes before the widget's final newline, which is not stored here.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.tags = []
+        self.marks = {}
+        self.state = "normal"
+        self.seen = self.viewed = None
+
+    def position(self, index: str) -> int:
+        if index == "1.0":
+            return 0
+        if index in ("end", "end-1c"):
+            return len(self.text)
+        return self.marks[index]
+
+    def config(self, state):
+        self.state = state
+
+    def index(self, index: str) -> int:
+        return self.position(index)
+
+    def insert(self, index, *parts):
+        assert self.state == "normal", "inserted into a disabled widget"
+        at = self.position(index)
+        text = "".join(parts[0::2])
+        tags = [tag for chunk, tag in zip(parts[0::2], parts[1::2]) for _ in chunk]
+        self.text = self.text[:at] + text + self.text[at:]
+        self.tags[at:at] = tags
+        for name, mark in self.marks.items():
+            if mark >= at:
+                self.marks[name] = mark + len(text)
+
+    def delete(self, start, end):
+        assert self.state == "normal", "deleted from a disabled widget"
+        start, end = self.position(start), self.position(end)
+        self.text = self.text[:start] + self.text[end:]
+        del self.tags[start:end]
+        for name, mark in self.marks.items():
+            if mark > start:
+                self.marks[name] = start if mark < end else mark - (end - start)
+
+    def mark_set(self, name, index):
+        self.marks[name] = index if isinstance(index, int) else self.position(index)
+
+    def mark_unset(self, *names):
+        for name in names:
+            del self.marks[name]
+
+    def see(self, index):
+        self.seen = index
+
+    def yview(self, index):
+        self.viewed = index
+
+
+def block(number: int, lines: int):
+    return [(f"🧑 You: message {number}\n", "user"), ("🤖 " + "line\n" * lines, "assistant")]
+
+
+def check(scrollback: Scrollback, widget: FakeText, history: list):
+    """Marks, widget contents and the running budget all agree with blocks [first, last)."""
+    first, last = scrollback.first, scrollback.last
+    assert 0 <= first <= last <= len(history) == len(scrollback.transcript)
+    assert set(widget.marks) == {f"sb{i}" for i in range(first, last)}
+    assert widget.state == "disabled"
+
+    bounds = [widget.marks[f"sb{i}"] for i in range(first, last)] + [len(widget.text)]
+    assert bounds[0] == 0 if last > first else widget.text == ""
+    for i, (start, end) in enumerate(zip(bounds, bounds[1:]), start=first):
+        assert widget.text[start:end] == "".join(text for text, _ in history[i])
+        assert widget.tags[start:end] == [tag for text, tag in history[i] for _ in text]
+
+    assert list(scrollback.sizes) == [block_size(history[i]) for i in range(first, last)]
+    assert scrollback.shown_chars == len(widget.text)
+    assert scrollback.shown_lines == widget.text.count("\n")
+
+
+@pytest.fixture
+def window():
+    widget = FakeText()
+    scrollback = Scrollback(widget, Transcript(), max_lines=60, max_chars=3000)
+    history = []
+
+    def append(lines: int = 2):
+        segments = block(len(history), lines)
+        history.append(segments)
+        scrollback.append(segments)
+
+    yield scrollback, widget, history, append
+    scrollback.close()
+
+
+def test_append_trims_the_oldest_blocks_to_the_budget(window):
+    scrollback, widget, history, append = window
+    for _ in range(5):
+        append()
+        check(scrollback, widget, history)
+    assert scrollback.first == 0 and widget.seen == "end"
+
+    for _ in range(200):
+        append()
+        check(scrollback, widget, history)
+        assert scrollback.last == len(history)
+        assert not scrollback.over_budget()
+    assert scrollback.first > 0
+
+
+def test_a_block_larger_than_the_budget_is_still_shown(window):
+    scrollback, widget, history, append = window
+    append(lines=500)
+    check(scrollback, widget, history)
+    assert (scrollback.first, scrollback.last) == (0, 1)
+    append()
+    check(scrollback, widget, history)
+    assert scrollback.first == 1
+
+
+def test_paging_up_to_the_start_and_back_down_to_the_live_end(window):
+    scrollback, widget, history, append = window
+    for _ in range(300):
+        append()
+    pages = 0
+    while scrollback.page_up():
+        pages += 1
+        check(scrollback, widget, history)
+        assert not scrollback.over_budget()
+        assert widget.viewed in widget.marks
+    assert scrollback.first == 0 and pages > 1
+    assert not scrollback.page_up()
+
+    while scrollback.page_down():
+        check(scrollback, widget, history)
+        assert not scrollback.over_budget()
+        assert widget.seen in widget.marks
+    assert scrollback.last == len(history)
+    assert not scrollback.page_down()
+
+
+def test_a_new_message_while_paged_back_jumps_to_the_live_end(window):
+    scrollback, widget, history, append = window
+    for _ in range(300):
+        append()
+    scrollback.page_up()
+    scrollback.page_up()
+    assert scrollback.last < len(history) - 1
+
+    append()
+    check(scrollback, widget, history)
+    assert scrollback.last == len(history)
+    assert not scrollback.over_budget(TRIM_TO)
+    assert widget.seen == "end"
+
+
+def test_on_scroll_pages_only_at_either_end(window):
+    scrollback, widget, history, append = window
+    for _ in range(300):
+        append()
+    assert not scrollback.on_scroll(0.3, 0.6)
+    assert not scrollback.on_scroll(0.9, 1.0)      # already at the live end
+    assert scrollback.on_scroll(0.0, 0.2)
+    first = scrollback.first
+    assert scrollback.on_scroll(0.8, 1.0)
+    assert scrollback.first > first
+    check(scrollback, widget, history)
+
+
+def test_random_walk_keeps_marks_and_budget_consistent(window):
+    scrollback, widget, history, append = window
+    rng = random.Random(12)
+    for _ in range(1500):
+        action = rng.random()
+        if action < 0.6:
+            append(lines=rng.choice([0, 1, 2, 5, 30]))
+        elif action < 0.8:
+            scrollback.page_up()
+        else:
+            scrollback.page_down()
+        check(scrollback, widget, history)
+        # Paging keeps the block at the edge of the view and one beyond it, so only those may be over budget
+        assert not scrollback.over_budget() or scrollback.last - scrollback.first <= 2
+
+
+
+def test_a_page_that_fits_is_loaded_whole():
+    widget, history = FakeText(), []
+    scrollback = Scrollback(widget, Transcript(), max_lines=300, max_chars=0)   # chars 0: no limit
+    for number in range(400):
+        history.append(block(number, 1))
+        scrollback.append(history[-1])
+    first = scrollback.first
+    assert scrollback.page_up()
+    assert scrollback.first == first - PAGE_BLOCKS
+    check(scrollback, widget, history)
+    scrollback.close()
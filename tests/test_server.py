@@ -0,0 +1,72 @@
+import asyncio
+import json
+import threading
+
+from source_code.quota import QuotaEngine
+from source_code.server import ChatServer
+
+
+class ThreadRecordingQuota(QuotaEngine):
+    """A quota with no limits that notes which thread each call ran on."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    def exhausted(self, key, tier_name):
+        self.threads.append(threading.get_ident())
+        return super().exhausted(key, tier_name)
+
+    def consume(self, key, tier_name, command_type=None):
+        self.threads.append(threading.get_ident())
+        return super().consume(key, tier_name, command_type)
+
+
+async def post(port: int, path: str, body: bytes):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    payload = json.loads(await reader.readexactly(int(headers["content-length"])))
+    writer.close()
+    return status, headers, payload
+
+
+def serve(server: ChatServer, client):
+    async def run():
+        listener = await server.serve(port=0)
+        async with listener:
+            return await client(listener.sockets[0].getsockname()[1])
+    return asyncio.run(run())
+
+
+def test_quota_and_assistants_run_off_the_event_loop():
+    quota = ThreadRecordingQuota()
+    server = ChatServer(quota=quota)
+
+    async def client(port):
+        loop_thread = threading.get_ident()
+        _, _, created = await post(port, "/sessions", json.dumps({"name": "Lien", "age": 20}).encode())
+        status, _, reply = await post(port, f"/sessions/{created['session_id']}/turns",
+                                      json.dumps({"text": "I want to build muscle"}).encode())
+        return loop_thread, status, reply
+
+    loop_thread, status, reply = serve(server, client)
+    assert status == 200 and reply["command_type"] == "FITNESS"
+    assert len(quota.threads) == 2 and loop_thread not in quota.threads
+
+
+def test_oversized_bodies_are_refused():
+    server = ChatServer(max_body=100)
+
+    async def client(port):
+        return await post(port, "/sessions", b" " * 101)
+
+    status, headers, payload = serve(server, client)
+    assert status == 413 and "100 bytes" in payload["error"]
+    assert headers["connection"] == "close"
+    assert server.sessions == {}
@@ -0,0 +1,71 @@
+import pytest
+
+from source_code.assistant_registry import SessionAssistants, create_assistant
+from source_code.models import CommandType, UserProfile
+from source_code.quota import local_identity
+from source_code.srs import DAY, MIN_EASE, START_EASE, ReviewScheduler, sm2
+from source_code.study_assistant import study_key
+
+NOW = 1_000_000.0
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def scheduler(request, tmp_path):
+    scheduler = ReviewScheduler(str(tmp_path / "srs.sqlite3") if request.param == "sqlite" else None, clock=lambda: NOW)
+    yield scheduler
+    scheduler.close()
+
+
+def test_sm2_intervals_grow_with_good_reviews():
+    card = ReviewScheduler().new_card("u", "math", "limits", now=NOW)
+    intervals = []
+    for _ in range(4):
+        card = sm2(card, 4, NOW)
+        intervals.append(card.interval)
+    assert intervals == [1.0, 6.0, round(6.0 * START_EASE, 1), round(round(6.0 * START_EASE, 1) * START_EASE, 1)]
+    assert card.ease == START_EASE and card.reps == 4
+    assert card.due == NOW + card.interval * DAY
+
+
+def test_sm2_forgotten_cards_start_over():
+    card = ReviewScheduler().new_card("u", "math", "limits", now=NOW)
+    for _ in range(3):
+        card = sm2(card, 5, NOW)
+    card = sm2(card, 1, NOW)
+    assert (card.interval, card.reps, card.lapses) == (1.0, 0, 1)
+    for _ in range(10):
+        card = sm2(card, 0, NOW)
+    assert card.ease == MIN_EASE
+    with pytest.raises(ValueError):
+        sm2(card, 6, NOW)
+
+
+def test_due_is_most_overdue_first(scheduler):
+    cards = [scheduler.add("lien", "math", front)[0] for front in ("a", "b", "c", "d")]
+    # New cards come up a day later; reviews move them to different days
+    scheduler.review(cards[0].id, 5, now=NOW - 3 * DAY)   # due NOW - 2 days
+    scheduler.review(cards[1].id, 1, now=NOW - 4 * DAY)   # due NOW - 3 days
+    scheduler.review(cards[2].id, 4, now=NOW + DAY)       # due NOW + 2 days
+    due = scheduler.due("lien", now=NOW + DAY)
+    assert [card.front for card in due] == ["b", "a", "d"]
+    assert [card.front for card in scheduler.due("lien", limit=2, now=NOW + DAY)] == ["b", "a"]
+    assert scheduler.due("lien", now=NOW - 5 * DAY) == []
+    assert scheduler.next_due("lien").front == "b"
+    assert scheduler.due("someone else", now=NOW + 10 * DAY) == []
+
+
+def test_adding_a_card_twice_keeps_its_progress(scheduler):
+    card, created = scheduler.add("lien", "math", "limits")
+    reviewed = scheduler.review(card.id, 5)
+    again, created_again = scheduler.add("lien", "math", "limits")
+    assert created and not created_again
+    assert again == reviewed
+
+
+def test_cards_follow_the_identity_not_the_name():
+    user = UserProfile(name="Lien", age=20, preferences={}, isPremium=False)
+    assert study_key() == study_key(None) == local_identity()
+    assert create_assistant(CommandType.STUDY, user).identity is None
+    first = SessionAssistants(user, identity="user:1").get(CommandType.STUDY)
+    second = SessionAssistants(user, identity="user:2").get(CommandType.STUDY)
+    assert study_key(first.identity) == "user:1" and study_key(second.identity) == "user:2"
@@ -0,0 +1,69 @@
+import pytest
+
+from source_code.workout_planner import (DEFAULT_GOAL, GOALS, LEVELS, MUSCLES, SESSIONS, allocate_sets,
+                                         choose_sessions, plan_week, resolve_goal, spread_days)
+
+
+def weekly_limit(goal, level, m, muscle):
+    maintenance, most = LEVELS[level].weekly_sets
+    return round((most if m == muscle else maintenance) * GOALS[goal].volume)
+
+
+def all_weeks():
+    for goal in GOALS:
+        for level in LEVELS:
+            for muscle in (None,) + MUSCLES:
+                for days in range(1, 8):
+                    yield goal, level, muscle, days
+
+
+def test_weekly_sets_never_exceed_the_limits():
+    for goal, level, muscle, days in all_weeks():
+        limits = LEVELS[level]
+        sessions = choose_sessions(GOALS[goal], spread_days(days), muscle, limits)
+        plans = allocate_sets(GOALS[goal], sessions, muscle, limits)
+        assert all(sum(sets.values()) <= limits.session_sets for sets in plans)
+        # Every hard session has something to do
+        assert all(sets for session, sets in zip(sessions, plans) if SESSIONS[session]), (goal, level, muscle, days)
+        for m in MUSCLES:
+            worked = [sets for session, sets in zip(sessions, plans) if m in SESSIONS[session]]
+            if not worked:
+                continue
+            total, limit = sum(sets.get(m, 0) for sets in worked), weekly_limit(goal, level, m, muscle)
+            assert total <= limit, (goal, level, muscle, days, m)
+            # Short of the limit only when every session of the muscle is already full
+            if total < limit:
+                assert all(sum(sets.values()) == limits.session_sets for sets in worked), (goal, level, muscle, days, m)
+
+
+def test_remainder_goes_to_the_first_sessions():
+    goal, level = GOALS["build muscle"], LEVELS["intermediate"]
+    sessions = ("upper", "upper", "upper", "upper")
+    plans = allocate_sets(goal, sessions, "chest", level)
+    # 15 chest sets over four sessions: 4, 4, 4, 3; 8 back sets: 2 each
+    assert [sets["chest"] for sets in plans] == [4, 4, 4, 3]
+    assert [sets["back"] for sets in plans] == [2, 2, 2, 2]
+
+
+@pytest.mark.parametrize("days", range(1, 8))
+def test_no_muscle_two_days_in_a_row(days):
+    week = plan_week("build muscle", days, "legs", "advanced")
+    assert sum(1 for day in week if day.session) == days
+    for today, tomorrow in zip(week, week[1:] + week[:1]):
+        if today.session and tomorrow.session and days < 7:
+            assert not set(SESSIONS[today.session]) & set(SESSIONS[tomorrow.session]), (today, tomorrow)
+
+
+@pytest.mark.parametrize("text, goal", [
+    ("i want to gain muscle", "build muscle"),
+    ("cutting season", "lose weight"),
+    ("marathon training", "endurance"),
+    ("running", "endurance"),
+    ("more flexibility", "flexibility"),
+    ("again", DEFAULT_GOAL),
+    ("after brunch", DEFAULT_GOAL),
+    ("clean eating", DEFAULT_GOAL),
+    ("", DEFAULT_GOAL),
+])
+def test_goals_match_on_word_starts(text, goal):
+    assert resolve_goal(text) == goal